@@ -0,0 +1,124 @@
+"""
+Helpers shared by the benchmark scripts. Each script starts its own server
+with a throwaway SQLite file so that the numbers don't depend on local state.
+"""
+import asyncio
+import contextlib
+import os
+import pathlib
+import secrets
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Iterator
+
+import httpx
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+
+
+@contextlib.contextmanager
+def server(env: dict[str, str], port: int = 8100, args: list[str] | None = None, launcher: bool = False) -> Iterator[str]:
+    """
+    Starts uvicorn against a fresh SQLite database and yields its base URL
+
+    Args:
+        env (dict[str, str]): Extra environment variables for the server
+        port (int): The port to listen on
+        args (list[str]|None): Extra uvicorn command line arguments
+        launcher (bool): Start the server with 'run.py prod' instead, which reads its options from env
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        server_env = {
+            **os.environ,
+            "APPLICATION_ENV": "prod",
+            "DB_URI": f"sqlite:///{directory}/bench.db",
+            "JWT_SECRET_KEY": secrets.token_hex(32),
+            **env,
+        }
+        command: list[str] = (
+            [sys.executable, "run.py", "prod"]
+            if launcher
+            else [sys.executable, "-m", "uvicorn", "buddy.src.main:app", "--port", str(port), "--log-level", "warning", *(args or [])]
+        )
+        process = subprocess.Popen(command, cwd=ROOT, env={**server_env, "SERVER_PORT": str(port), "SERVER_LOG_LEVEL": "warning"})
+        base_url = f"http://127.0.0.1:{port}"
+        try:
+            for _ in range(200):
+                try:
+                    httpx.get(base_url + "/")
+                    break
+                except httpx.TransportError:
+                    time.sleep(0.1)
+            yield base_url
+        finally:
+            process.terminate()
+            process.wait()
+
+
+def login(base_url: str, username: str = "bench", password: str = "bench") -> str:
+    """
+    Signs up (if needed) and logs in
+
+    Returns:
+        str: The access token
+    """
+    httpx.post(base_url + "/signup", json={"username": username, "password": password})
+    response = httpx.post(base_url + "/token", data={"username": username, "password": password})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def _worker(client: httpx.AsyncClient, requests: list, latencies: list[float], errors: list[str], deadline: float) -> None:
+    index = 0
+    while time.perf_counter() < deadline:
+        request = requests[index % len(requests)]
+        method, path, kwargs = request() if callable(request) else request
+        index += 1
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, path, **kwargs)
+        except httpx.TransportError as error:
+            errors.append(type(error).__name__)
+            continue
+        latencies.append(time.perf_counter() - start)
+        if response.status_code >= 500:
+            errors.append(str(response.status_code))
+
+
+async def _load(base_url: str, requests: list, concurrency: int, seconds: float) -> dict[str, float]:
+    latencies: list[float] = []
+    errors: list[str] = []
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        deadline = time.perf_counter() + seconds
+        await asyncio.gather(*(_worker(client, requests, latencies, errors, deadline) for _ in range(concurrency)))
+
+    latencies.sort()
+    return {
+        "requests/s": len(latencies) / seconds,
+        "p50 ms": statistics.median(latencies) * 1000,
+        "p99 ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "errors": len(errors),
+    }
+
+
+def load(base_url: str, requests: list, concurrency: int, seconds: float = 10) -> dict[str, float]:
+    """
+    Sends requests from `concurrency` clients in a loop for `seconds` seconds
+
+    Args:
+        base_url (str): The server URL
+        requests (list): (method, path, httpx keyword arguments) tuples, or functions returning
+            them, that each client cycles through
+
+    Returns:
+        dict[str, float]: Throughput and latency percentiles
+    """
+    return asyncio.run(_load(base_url, requests, concurrency, seconds))
+
+
+def print_row(label: str, result: dict[str, float]) -> None:
+    print(f"{label:<32}" + "".join(f"{key}={value:>9.1f}  " for key, value in result.items()))
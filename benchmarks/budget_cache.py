@@ -0,0 +1,64 @@
+"""
+Measures how long a budget list response takes to produce when it's rendered from ORM rows,
+read from the in-process cache and read from the shared state process, in process and without
+the database.
+
+    python -m benchmarks.budget_cache [rows] [repeats]
+"""
+import multiprocessing
+import os
+import secrets
+import sys
+import time
+from decimal import Decimal
+from typing import Any, Callable
+
+from fastapi import Response
+
+from buddy.dtos import BudgetExpenseDto
+from buddy.src import budget_cache, shared_state
+from buddy.src.models import BudgetExpense
+from buddy.src.responses import JSONList
+
+
+def _best_us(func: Callable[[], Any], repeats: int) -> float:
+    best: float = float("inf")
+    for _ in range(repeats):
+        start: float = time.perf_counter()
+        for _ in range(100):
+            func()
+        best = min(best, (time.perf_counter() - start) / 100)
+    return best * 1e6
+
+
+def main() -> None:
+    rows: int = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    repeats: int = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    os.environ.setdefault("SHARED_STATE_ADDRESS", "/tmp/buddy-shared-state-benchmark.sock")
+    os.environ.setdefault("SHARED_STATE_AUTHKEY", secrets.token_hex(16))
+    server = multiprocessing.Process(target=shared_state.serve, daemon=True)
+    server.start()
+    time.sleep(1)
+
+    expenses: list[BudgetExpense] = [
+        BudgetExpense(user_id=1, expense_type=f"Expense {row}", amount=Decimal(row) / 100, description=None)
+        for row in range(rows)
+    ]
+    json_list: JSONList = JSONList(BudgetExpenseDto)
+    rendered: Response = json_list.response(expenses, Response())
+    results: dict[str, float] = {"rendered from rows": _best_us(lambda: json_list.response(expenses, Response()), repeats)}
+
+    for name in ("local", "manager"):
+        budget_cache._backend = budget_cache.backends[name]()
+        budget_cache.put(1, "budgetexpense", "", 1, rendered)
+        assert budget_cache.get(1, "budgetexpense", "", 1).body == rendered.body  # type: ignore[union-attr]
+        results[f"{name} cache hit"] = _best_us(lambda: budget_cache.get(1, "budgetexpense", "", 1), repeats)
+
+    server.terminate()
+    for label, us in results.items():
+        print(f"{rows} rows  {label:<20} {us:>8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Measures the per-request cost of setting the Content-Security-Policy header, comparing the old
+@app.middleware("http") hook (BaseHTTPMiddleware) with ContentSecurityPolicyMiddleware. Requests
+are sent straight to the ASGI app in process, so the numbers only include the middleware and
+a trivial endpoint.
+
+    python -m benchmarks.csp_middleware [requests]
+"""
+import asyncio
+import sys
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from starlette.types import Message
+
+from buddy.src.middleware import ContentSecurityPolicyMiddleware, content_security_policy
+
+
+def _base_http_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.middleware("http")
+    async def add_csp_header(request: Request, call_next):
+        response = await call_next(request)
+        inline_docs_script_hash = "sha256-QOOQu4W1oxGqd2nbXbxiA1Di6OHQOLQD+o+G9oWL8YY="
+        default_src = "default-src 'self';"
+        script_src = f"script-src 'self' https://cdn.jsdelivr.net/npm/swagger-ui-dist@5/swagger-ui-bundle.js '{inline_docs_script_hash}';"
+        style_src = "style-src 'self' https://cdn.jsdelivr.net/npm/swagger-ui-dist@5/swagger-ui.css;"
+        img_src = "img-src 'self' https://fastapi.tiangolo.com/img/favicon.png;"
+        response.headers["Content-Security-Policy"] = f"{default_src}{script_src}{style_src}{img_src}"
+        return response
+
+    return app
+
+
+def _asgi_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(ContentSecurityPolicyMiddleware)
+    return app
+
+
+def _no_middleware_app() -> FastAPI:
+    return FastAPI()
+
+
+def _add_routes(app: FastAPI) -> FastAPI:
+    @app.get("/", response_class=PlainTextResponse)
+    async def index() -> str:
+        return "ok"
+
+    @app.get("/stream")
+    async def stream() -> StreamingResponse:
+        async def chunks():
+            for _ in range(4):
+                yield b"chunk\n"
+        return StreamingResponse(chunks())
+
+    return app
+
+
+async def _requests_per_second(app: FastAPI, path: str, count: int) -> tuple[float, dict[bytes, bytes]]:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"",
+        "root_path": "", "headers": [(b"host", b"bench")], "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+    headers: list[tuple[bytes, bytes]] = []
+    messages: list[Message] = []
+
+    async def receive() -> Message:
+        # the request body, then a disconnect once the response has been sent
+        return messages.pop() if messages else {"type": "http.disconnect"}
+
+    async def send(message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers[:] = message["headers"]
+
+    async def request() -> None:
+        messages[:] = [{"type": "http.request", "body": b"", "more_body": False}]
+        await app(dict(scope), receive, send)
+
+    await request()  # builds the middleware stack
+    start: float = time.perf_counter()
+    for _ in range(count):
+        await request()
+    elapsed: float = time.perf_counter() - start
+    return count / elapsed, dict(headers)
+
+
+def main() -> None:
+    count: int = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    apps = {
+        "no middleware": _add_routes(_no_middleware_app()),
+        "BaseHTTPMiddleware": _add_routes(_base_http_app()),
+        "ContentSecurityPolicyMiddleware": _add_routes(_asgi_app()),
+    }
+    for path in ["/", "/stream"]:
+        for label, app in apps.items():
+            rate, headers = asyncio.run(_requests_per_second(app, path, count))
+            if label != "no middleware":
+                assert headers[b"content-security-policy"] == content_security_policy.encode()
+            print(f"{path:<8} {label:<32} {rate:>8.0f} requests/s  {1e6 / rate:>6.1f} us/request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""
+Compares DB_MODE=sync (threadpool endpoints) with DB_MODE=async (aiosqlite)
+at high concurrency.
+
+    python -m benchmarks.db_modes [concurrency] [seconds]
+"""
+import sys
+
+import httpx
+
+from benchmarks._harness import load, login, print_row, server
+
+
+def main() -> None:
+    concurrency: int = int(sys.argv[1]) if len(sys.argv) > 1 else 256
+    seconds: float = float(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    for mode in ["sync", "async"]:
+        with server({"DB_MODE": mode}) as base_url:
+            token: str = login(base_url)
+            headers = {"Authorization": f"Bearer {token}"}
+            for day in range(1, 29):
+                httpx.post(
+                    base_url + "/accounting/expenses/me",
+                    json={"expense_type": "Groceries", "amount": 12.5, "date": f"2024-01-{day:02}", "description": None},
+                    headers=headers,
+                )
+
+            result = load(base_url, [("GET", "/accounting/expenses/me", {"headers": headers})], concurrency, seconds)
+            print_row(f"DB_MODE={mode} c={concurrency}", result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Measures how long rendering a list endpoint's response body takes with Starlette's
+JSONResponse (stdlib json) and with ORJSONResponse, in process.
+
+    python -m benchmarks.json_render [rows] [repeats]
+"""
+import datetime
+import sys
+import time
+from decimal import Decimal
+from typing import Any, Callable
+
+from fastapi.responses import JSONResponse
+
+from buddy.dtos import AccountingExpenseDto
+from buddy.src.responses import ORJSONResponse
+
+
+def _best_ms(func: Callable[[], Any], repeats: int) -> float:
+    best: float = float("inf")
+    for _ in range(repeats):
+        start: float = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main() -> None:
+    rows: int = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    repeats: int = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    dtos: list[AccountingExpenseDto] = [
+        AccountingExpenseDto(
+            user_id=1,
+            expense_type=f"Expense {row % 50}",
+            date=datetime.date(2024, 1, 1) + datetime.timedelta(days=row % 365),
+            amount=Decimal(row) / 100,
+            description=None if row % 3 else f"Description of expense {row}",
+        )
+        for row in range(rows)
+    ]
+    # what FastAPI hands to the response class after validating the return value
+    content: list[dict[str, Any]] = [dto.model_dump(mode="json") for dto in dtos]
+
+    validate: float = _best_ms(lambda: [dto.model_dump(mode="json") for dto in dtos], repeats)
+    stdlib: float = _best_ms(lambda: JSONResponse(content), repeats)
+    orjson: float = _best_ms(lambda: ORJSONResponse(content), repeats)
+    print(f"{rows} rows: model_dump={validate:.1f} ms  JSONResponse={stdlib:.1f} ms  ORJSONResponse={orjson:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
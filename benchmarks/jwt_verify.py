@@ -0,0 +1,48 @@
+"""
+Measures access tokens verified per second by each JWT backend, with and without the
+verified-claims cache, in process.
+
+    python -m benchmarks.jwt_verify [seconds] [distinct tokens]
+"""
+import secrets
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+from buddy.src import jwt_backends
+from buddy.src.security import IdentitySecurity
+
+
+def _rate(verify: Callable[[str], object], tokens: list[str], seconds: float) -> float:
+    count: int = 0
+    deadline: float = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for token in tokens:
+            verify(token)
+        count += len(tokens)
+    return count / seconds
+
+
+def main() -> None:
+    seconds: float = float(sys.argv[1]) if len(sys.argv) > 1 else 3
+    distinct: int = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+
+    key: str = secrets.token_hex(32)
+    exp: datetime = datetime.now(tz=timezone.utc) + timedelta(hours=1)
+    for name, backend_type in jwt_backends.backends.items():
+        backend: jwt_backends.JwtBackend = backend_type()
+        tokens: list[str] = [
+            backend.encode({"sub": f"user{id}", "id": id, "exp": exp, "role": "user", "epoch": 0}, key)
+            for id in range(distinct)
+        ]
+        uncached: float = _rate(lambda token: backend.decode(token, key), tokens, seconds)
+
+        IdentitySecurity._jwt_backend = backend
+        IdentitySecurity._jwt_cache.clear()
+        cached: float = _rate(lambda token: IdentitySecurity._verify(token, key), tokens, seconds)
+        print(f"{name:<8} uncached={uncached:>10.0f}/s  cached={cached:>10.0f}/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Measures the time from ORM rows to response bytes for a list endpoint, in process, comparing
+one DTO per row plus FastAPI's response model handling with JSONList.
+
+    python -m benchmarks.list_serialization [rows] [repeats]
+"""
+import asyncio
+import datetime
+import sys
+import time
+from decimal import Decimal
+from typing import Any, Callable
+
+from fastapi import Response
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from buddy.dtos import AccountingExpenseDto
+from buddy.src.models import AccountingExpense
+from buddy.src.responses import JSONList, ORJSONResponse
+
+
+def _best_ms(func: Callable[[], Any], repeats: int) -> float:
+    best: float = float("inf")
+    for _ in range(repeats):
+        start: float = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main() -> None:
+    rows: int = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    repeats: int = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    expenses: list[AccountingExpense] = [
+        AccountingExpense(
+            user_id=1,
+            expense_type=f"Expense {row % 50}",
+            date=datetime.date(2024, 1, 1) + datetime.timedelta(days=row % 365),
+            amount=Decimal(row) / 100,
+            description=None if row % 3 else f"Description of expense {row}",
+        )
+        for row in range(rows)
+    ]
+    field = create_model_field(name="Response", type_=list[AccountingExpenseDto], mode="serialization")
+
+    def per_row() -> bytes:
+        # what the routes did before: a DTO per row, then FastAPI validates and dumps the list
+        dtos = [
+            AccountingExpenseDto(
+                expense_type=expense.expense_type,
+                amount=expense.amount,
+                description=expense.description,
+                user_id=expense.user_id,
+                date=expense.date,
+            )
+            for expense in expenses
+        ]
+        content = asyncio.run(serialize_response(field=field, response_content=dtos))
+        return ORJSONResponse(content).body
+
+    json_list: JSONList = JSONList(AccountingExpenseDto)
+
+    def batch() -> bytes:
+        return json_list.response(expenses, Response()).body
+
+    assert per_row() == batch()
+    before: float = _best_ms(per_row, repeats)
+    after: float = _best_ms(batch, repeats)
+    print(f"{rows} rows: per-row DTOs={before:.1f} ms  JSONList={after:.1f} ms  ({before / after:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
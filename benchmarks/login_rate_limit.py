@@ -0,0 +1,58 @@
+"""
+Measures what a login attempt costs the server before and after the limiter: one bcrypt
+verification, against one take() from the in-process buckets and from the shared state
+process, in process.
+
+    python -m benchmarks.login_rate_limit [attempts]
+"""
+import logging
+import multiprocessing
+import os
+import secrets
+import sys
+import time
+from typing import Any, Callable
+
+logging.getLogger("passlib").setLevel(logging.ERROR)
+
+from buddy.src import rate_limit, shared_state
+from buddy.src.security import PasswordSecurity, _verify_password
+
+
+def _us_per_call(func: Callable[[], Any], count: int) -> float:
+    start: float = time.perf_counter()
+    for _ in range(count):
+        func()
+    return (time.perf_counter() - start) / count * 1e6
+
+
+def main() -> None:
+    attempts: int = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+
+    os.environ.setdefault("SHARED_STATE_ADDRESS", "/tmp/buddy-shared-state-benchmark.sock")
+    os.environ.setdefault("SHARED_STATE_AUTHKEY", secrets.token_hex(16))
+    server = multiprocessing.Process(target=shared_state.serve, daemon=True)
+    server.start()
+    time.sleep(1)
+
+    hashed: str = PasswordSecurity.hash("password")
+    results: dict[str, float] = {"bcrypt verify": _us_per_call(lambda: _verify_password("wrong", hashed), 20)}
+
+    # an attacker's attempts: always the same client and username, always over the limit
+    buckets: list[rate_limit.Bucket] = [
+        ("login:ip:203.0.113.7", rate_limit.Limit(20, 60)),
+        ("login:username:admin", rate_limit.Limit(20, 60)),
+        ("login:client-username:203.0.113.7:admin", rate_limit.Limit(5, 60)),
+    ]
+    for name in ("local", "manager"):
+        backend: rate_limit.RateLimitBackend = rate_limit.backends[name]()
+        results[f"{name} take()"] = _us_per_call(lambda: backend.take(buckets), attempts)
+        assert backend.stats()["rejected"] == attempts - 5
+
+    server.terminate()
+    for label, us in results.items():
+        print(f"{label:<16} {us:>10.1f} us/attempt")
+
+
+if __name__ == "__main__":
+    main()
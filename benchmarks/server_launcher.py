@@ -0,0 +1,50 @@
+"""
+Compares what 'run.py prod' used to start, uvicorn.run() with its defaults, with the launcher's
+settings: the worker count, explicit event loop and HTTP parser, and limit_concurrency.
+
+    python -m benchmarks.server_launcher [concurrency] [seconds]
+"""
+import os
+import sys
+
+import httpx
+
+from benchmarks._harness import load, login, print_row, server
+
+# the launcher refuses several workers with per-process rate limit buckets. No login is rate limited here
+_no_rate_limit: dict[str, str] = {"RATE_LIMIT_BACKEND": "none"}
+
+# (label, environment, started through run.py)
+_setups: list[tuple[str, dict[str, str], bool]] = [
+    ("uvicorn.run() defaults", {}, False),
+    ("1 worker asyncio+h11", {"SERVER_WORKERS": "1", "SERVER_LOOP": "asyncio", "SERVER_HTTP": "h11"}, True),
+    ("1 worker uvloop+httptools", {"SERVER_WORKERS": "1"}, True),
+    ("2 workers uvloop+httptools", {"SERVER_WORKERS": "2", **_no_rate_limit}, True),
+    ("4 workers uvloop+httptools", {"SERVER_WORKERS": "4", **_no_rate_limit}, True),
+    ("4 workers limit_concurrency=32", {"SERVER_WORKERS": "4", "SERVER_LIMIT_CONCURRENCY": "32", **_no_rate_limit}, True),
+]
+
+
+def main() -> None:
+    concurrency: int = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    seconds: float = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+    print(f"{os.cpu_count()} CPUs, {concurrency} clients")
+
+    for label, env, launcher in _setups:
+        with server({"DB_MODE": "async", "SQLITE_PROFILE": "production", **env}, launcher=launcher) as base_url:
+            token: str = login(base_url)
+            headers = {"Authorization": f"Bearer {token}"}
+            for day in range(1, 29):
+                httpx.post(
+                    base_url + "/accounting/expenses/me",
+                    json={"expense_type": "Groceries", "amount": 12.5, "date": f"2024-01-{day:02}", "description": None},
+                    headers=headers,
+                )
+
+            print_row(f"{label} GET /", load(base_url, [("GET", "/", {})], concurrency, seconds))
+            result = load(base_url, [("GET", "/accounting/expenses/me", {"headers": headers})], concurrency, seconds)
+            print_row(f"{label} GET /accounting", result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Compares SQLITE_PROFILE=default with SQLITE_PROFILE=production under a
+concurrent mix of reads and writes, both directly against the engine
+(8 reader threads and 1 writer thread) and through the HTTP API
+(3 reads for every write).
+
+    python -m benchmarks.sqlite_profile [concurrency] [seconds]
+"""
+import datetime
+import itertools
+import os
+import sys
+import tempfile
+import threading
+import time
+from decimal import Decimal
+
+import httpx
+from sqlmodel import Session, select
+
+from benchmarks._harness import load, login, print_row, server
+from buddy.src import db
+from buddy.src.models import AccountingExpense, User, UserRoles
+
+
+def direct(profile: str, readers: int, seconds: float) -> dict[str, float]:
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["SQLITE_PROFILE"] = profile
+        os.environ["DB_URI"] = f"sqlite:///{directory}/bench.db"
+        get_session = db.start_sqlite_session()
+
+        with next(get_session()) as session:
+            session.add(User(username="bench", password="", role=UserRoles.user))
+            session.commit()
+
+        deadline: float = time.perf_counter() + seconds
+        reads: list[int] = [0] * readers
+        writes: list[int] = [0]
+
+        def read(index: int) -> None:
+            with next(get_session()) as session:
+                while time.perf_counter() < deadline:
+                    session.exec(select(User).where(User.id == 1)).one()
+                    session.rollback()
+                    reads[index] += 1
+
+        def write() -> None:
+            with next(get_session()) as session:
+                day = datetime.date(2000, 1, 1)
+                while time.perf_counter() < deadline:
+                    session.add(AccountingExpense(expense_type="Bench", amount=Decimal(1), date=day, description=None, user_id=1))
+                    session.commit()
+                    day += datetime.timedelta(days=1)
+                    writes[0] += 1
+
+        threads = [threading.Thread(target=read, args=(index,)) for index in range(readers)]
+        threads.append(threading.Thread(target=write))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        return {"reads/s": sum(reads) / seconds, "writes/s": writes[0] / seconds}
+
+
+def main() -> None:
+    concurrency: int = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    seconds: float = float(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    for profile in ["default", "production"]:
+        print_row(f"engine/{profile} readers=8", direct(profile, 8, seconds))
+
+    for mode in ["sync", "async"]:
+        for profile in ["default", "production"]:
+            with server({"DB_MODE": mode, "SQLITE_PROFILE": profile}) as base_url:
+                token: str = login(base_url)
+                headers = {"Authorization": f"Bearer {token}"}
+                for day in range(1, 29):
+                    httpx.post(
+                        base_url + "/accounting/expenses/me",
+                        json={"expense_type": "Groceries", "amount": 12.5, "date": f"2024-01-{day:02}", "description": None},
+                        headers=headers,
+                    )
+
+                counter = itertools.count()
+                read = ("GET", "/accounting/expenses/me", {"headers": headers})
+
+                def write() -> tuple:
+                    body = {"expense_type": f"Expense {next(counter)}", "amount": 1, "date": "2024-02-01", "description": None}
+                    return ("POST", "/accounting/expenses/me", {"headers": headers, "json": body})
+
+                result = load(base_url, [read, read, read, write], concurrency, seconds)
+                print_row(f"{mode}/{profile} c={concurrency}", result)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,11 @@
 from buddy.dtos.accounting_expense import *
 from buddy.dtos.accounting_income import *
+from buddy.dtos.accounting_summary import *
 from buddy.dtos.budget_expense import *
 from buddy.dtos.credentials import *
+from buddy.dtos.deletes import *
+from buddy.dtos.imports import *
 from buddy.dtos.monthly_income import *
+from buddy.dtos.reports import *
 from buddy.dtos.tokens import *
 from buddy.dtos.user import *
@@ -0,0 +1,17 @@
+__all__ = ["MonthlySummaryDto", "CategorySummaryDto"]
+from typing import Literal
+from pydantic import BaseModel
+from decimal import Decimal
+
+class MonthlySummaryDto(BaseModel):
+    month: str
+    income: Decimal|float
+    expenses: Decimal|float
+    net: Decimal|float
+
+class CategorySummaryDto(BaseModel):
+    month: str
+    kind: Literal["expense", "income"]
+    category: str
+    total: Decimal|float
+    entries: int
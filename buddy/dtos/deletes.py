@@ -0,0 +1,5 @@
+__all__ = ["DeleteReport"]
+from pydantic import BaseModel
+
+class DeleteReport(BaseModel):
+    deleted: int
@@ -0,0 +1,14 @@
+__all__ = ["ImportRowReport", "ImportReport"]
+from typing import Literal
+from pydantic import BaseModel
+
+class ImportRowReport(BaseModel):
+    row: int
+    status: Literal["duplicate", "error"]
+    detail: str|None
+
+class ImportReport(BaseModel):
+    created: int
+    duplicates: int
+    errors: int
+    rows: list[ImportRowReport]
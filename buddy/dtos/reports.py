@@ -0,0 +1,15 @@
+__all__ = ["CategoryVarianceDto", "VarianceReportDto"]
+from typing import Literal
+from pydantic import BaseModel
+from decimal import Decimal
+
+class CategoryVarianceDto(BaseModel):
+    kind: Literal["expense", "income"]
+    category: str
+    planned: Decimal|float
+    actual: Decimal|float
+    delta: Decimal|float
+
+class VarianceReportDto(BaseModel):
+    month: str
+    categories: list[CategoryVarianceDto]
@@ -0,0 +1,133 @@
+import os
+from typing import Hashable, Literal, Protocol
+
+from fastapi import Response
+
+from buddy.src import shared_state
+from buddy.src.cache import SizedLRUCache
+
+Collection = Literal["budgetexpense", "monthlyincome"]
+
+# a rendered list response: its body and the headers besides the ones Response sets from the body
+_Entry = tuple[bytes, list[tuple[str, str]]]
+
+
+class CacheBackend(Protocol):
+    def get(self, key: Hashable) -> _Entry | None:
+        ...
+
+    def set(self, key: Hashable, value: _Entry, size: int) -> None:
+        ...
+
+    def stats(self) -> dict[str, int]:
+        ...
+
+
+def _max_entries() -> int:
+    return int(os.getenv("BUDGET_CACHE_SIZE", "1024"))
+
+
+def _max_bytes() -> int:
+    return int(os.getenv("BUDGET_CACHE_BYTES", str(16 * 1024 * 1024)))
+
+
+class LocalBackend(SizedLRUCache[Hashable, _Entry]):
+    """
+    An in-process cache. Every worker process has its own copy
+    """
+
+    def __init__(self) -> None:
+        super().__init__(_max_entries(), _max_bytes())
+
+
+class ManagerBackend:
+    """
+    A cache kept in the shared state process, so every worker shares its entries. If the process can't be reached, reads miss and writes are dropped
+    """
+
+    def __init__(self) -> None:
+        self._cache: shared_state.SharedObject = shared_state.SharedObject("budget_cache")
+
+    def get(self, key: Hashable) -> _Entry | None:
+        return self._cache.call("get", key)
+
+    def set(self, key: Hashable, value: _Entry, size: int) -> None:
+        self._cache.call("set", key, value, size)
+
+    def stats(self) -> dict[str, int]:
+        return {**(self._cache.call("stats") or {}), "errors": self._cache.errors}
+
+
+class DisabledBackend:
+    def get(self, key: Hashable) -> _Entry | None:
+        return None
+
+    def set(self, key: Hashable, value: _Entry, size: int) -> None:
+        pass
+
+    def stats(self) -> dict[str, int]:
+        return {}
+
+
+backends: dict[str, type[CacheBackend]] = {"local": LocalBackend, "manager": ManagerBackend, "none": DisabledBackend}
+
+
+def from_env() -> CacheBackend:
+    """
+    Returns:
+        CacheBackend: the backend named by BUDGET_CACHE_BACKEND, an in-process cache by default
+    """
+    name: str = os.getenv("BUDGET_CACHE_BACKEND", "local")
+    if name not in backends:
+        raise RuntimeError(f"BUDGET_CACHE_BACKEND must be one of {', '.join(repr(backend) for backend in backends)}")
+    return backends[name]()
+
+
+_backend: CacheBackend = from_env()
+
+
+def shared_cache() -> SizedLRUCache[Hashable, _Entry]:
+    """
+    Returns:
+        The cache that the shared state process serves to ManagerBackend
+    """
+    return SizedLRUCache(_max_entries(), _max_bytes())
+
+
+def get(user_id: int, collection: Collection, query: str, version: int) -> Response | None:
+    """
+    Args:
+        user_id: The user whose rows are listed
+        collection: The collection the endpoint lists
+        query: The request's query string, which picks the page
+        version: The user's version of the collection. Entries cached for older versions are never returned
+
+    Returns:
+        Response | None: The cached list response, or None if it isn't cached
+    """
+    entry: _Entry | None = _backend.get((user_id, collection, query, version))
+    if entry is None:
+        return None
+    body, headers = entry
+    return Response(content=body, media_type="application/json", headers=dict(headers))
+
+
+def put(user_id: int, collection: Collection, query: str, version: int, response: Response) -> None:
+    """
+    Caches a rendered list response, under the same arguments as get()
+    """
+    headers: list[tuple[str, str]] = [
+        (name, value) for name, value in response.headers.items() if name not in ("content-length", "content-type")
+    ]
+    size: int = len(response.body) + sum(len(name) + len(value) for name, value in headers)
+    _backend.set((user_id, collection, query, version), (bytes(response.body), headers), size)
+
+
+def stats() -> dict[str, int | float]:
+    """
+    Returns:
+        dict[str, int | float]: The backend's counters and the share of reads that were hits
+    """
+    counters: dict[str, int] = _backend.stats()
+    reads: int = counters.get("hits", 0) + counters.get("misses", 0)
+    return {**counters, "hit_ratio": round(counters.get("hits", 0) / reads, 4) if reads > 0 else 0.0}
@@ -0,0 +1,211 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """
+    Thread-safe LRU cache whose entries expire after a time-to-live
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        """
+        Args:
+            maxsize (int): The maximum number of entries before the least recently used one is evicted
+            ttl (float): The default number of seconds an entry stays valid
+        """
+        self.maxsize: int = maxsize
+        self.ttl: float = ttl
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: K) -> V | None:
+        """
+        Args:
+            key: The key of the entry
+
+        Returns:
+            The cached value if it exists and hasn't expired; otherwise None
+        """
+        with self._lock:
+            entry: tuple[float, V] | None = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: K, value: V, expires_at: float | None = None) -> None:
+        """
+        Args:
+            key: The key of the entry
+            value: The value to cache
+            expires_at (float|None): A time.monotonic() deadline that caps the default time-to-live
+        """
+        if self.maxsize <= 0:
+            return
+
+        deadline: float = time.monotonic() + self.ttl
+        if expires_at is not None:
+            deadline = min(deadline, expires_at)
+
+        with self._lock:
+            self._entries[key] = (deadline, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: K) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        """
+        Returns:
+            dict[str, int]: The size of the cache and its hit, miss and eviction counters
+        """
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class SizedLRUCache(Generic[K, V]):
+    """
+    Thread-safe LRU cache bounded by both its number of entries and the total size of its values
+    """
+
+    def __init__(self, maxsize: int, maxbytes: int) -> None:
+        """
+        Args:
+            maxsize (int): The maximum number of entries
+            maxbytes (int): The maximum total size of the values, as reported to set()
+        """
+        self.maxsize: int = maxsize
+        self.maxbytes: int = maxbytes
+        self.bytes: int = 0
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self.evicted_bytes: int = 0
+        self._entries: OrderedDict[K, tuple[int, V]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: K) -> V | None:
+        """
+        Returns:
+            The cached value, or None if it isn't cached
+        """
+        with self._lock:
+            entry: tuple[int, V] | None = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: K, value: V, size: int) -> None:
+        """
+        Args:
+            key: The key of the entry
+            value: The value to cache
+            size (int): The size of the value in bytes. Values bigger than maxbytes aren't cached
+        """
+        if self.maxsize <= 0 or size > self.maxbytes:
+            return
+
+        with self._lock:
+            previous: tuple[int, V] | None = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[0]
+            self._entries[key] = (size, value)
+            self.bytes += size
+            while len(self._entries) > self.maxsize or self.bytes > self.maxbytes:
+                _, (evicted_size, _) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+                self.evicted_bytes += evicted_size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> dict[str, int]:
+        """
+        Returns:
+            dict[str, int]: The size of the cache and its hit, miss and eviction counters
+        """
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "bytes": self.bytes,
+                "maxbytes": self.maxbytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "evicted_bytes": self.evicted_bytes,
+            }
+
+
+class BloomFilter:
+    """
+    Thread-safe set of keys in a fixed amount of memory. Membership tests can return false
+    positives, at a rate set by the number of bits and hashes, but never false negatives.
+    Keys can't be removed.
+    """
+
+    def __init__(self, bits: int, hashes: int) -> None:
+        """
+        Args:
+            bits (int): The size of the filter
+            hashes (int): The number of bits set per key
+        """
+        self.bits: int = max(bits, 8)
+        self.hashes: int = hashes
+        self.size: int = 0
+        self._array = bytearray((self.bits + 7) // 8)
+        self._lock = threading.Lock()
+
+    def add(self, key: Hashable) -> None:
+        with self._lock:
+            for position in self._positions(key):
+                self._array[position >> 3] |= 1 << (position & 7)
+            self.size += 1
+
+    def __contains__(self, key: Hashable) -> bool:
+        return all(self._array[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def _positions(self, key: Hashable) -> list[int]:
+        # double hashing: the positions are h1 + i*h2 for two halves of one digest
+        digest: bytes = hashlib.blake2b(repr(key).encode(), digest_size=16).digest()
+        h1: int = int.from_bytes(digest[:8], "little")
+        h2: int = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
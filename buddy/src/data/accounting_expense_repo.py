@@ -1,11 +1,21 @@
 import datetime
 from decimal import Decimal
-from typing import Iterable
+from typing import Sequence
 
-from sqlmodel import Session, select
+import sqlalchemy as sa
+from sqlalchemy import Row
+from sqlalchemy.dialects.sqlite import insert
+from sqlmodel import Session, col, select
+from sqlmodel.sql.expression import SelectOfScalar
 
+from buddy.src.data import accounting_summary_repo, pagination, search, version_repo
+from buddy.src.data.pagination import Page
 from buddy.src.models import AccountingExpense, User
 
+# the columns that order one user's expenses and the expenses of every user, for keyset pagination
+sort_key: tuple[str, ...] = ("date", "expense_type")
+all_users_sort_key: tuple[str, ...] = ("date", "expense_type", "user_id")
+
 def _standardize_expense_type(expense_type: str) -> str:
     standardized: str = ""
     for word in expense_type.split(" "):
@@ -17,6 +27,22 @@ def _standardize_expense_type(expense_type: str) -> str:
     standardized = standardized[: len(standardized) - 1]  # to remove leading space
     return standardized
 
+def validate_expense_type(expense_type: str) -> str:
+    """
+    Args:
+        expense_type (str): The expense type sent by the user
+
+    Returns:
+        str: The standardized expense type
+
+    Raises:
+        ValueError: if the expense type is empty, contains invalid
+        whitespace, or contains too many spaces
+    """
+    if expense_type == "" or "\t" in expense_type or "\n" in expense_type:
+        raise ValueError("Expense Type is invalid")
+    return _standardize_expense_type(expense_type)
+
 def create(
     expense_type: str,
     amount: Decimal,
@@ -36,8 +62,8 @@ def create(
         db (Session): The database session
 
     Returns:
-        The newly created BudgetExpense object if the user doesn't
-            have this expense in the database already; otherwise None
+        The newly created AccountingExpense object if the user doesn't
+            have this expense on this date already; otherwise None
 
     Raises:
         ValueError: if the expense type is empty, contains invalid
@@ -45,96 +71,202 @@ def create(
     """
     assert user.id is not None
 
-    if expense_type == "" or "\t" in expense_type or "\n" in expense_type:
-        raise ValueError("Expense Type is invalid")
-    standardized_expense_type: str = _standardize_expense_type(expense_type)
+    standardized_expense_type: str = validate_expense_type(expense_type)
 
-    existing_expense: AccountingExpense | None = db.exec(
-        select(AccountingExpense)
-        .where(AccountingExpense.user_id == user.id)
-        .where(AccountingExpense.date == date)
-        .where(AccountingExpense.expense_type == standardized_expense_type)
+    created: Row | None = db.exec(  # type: ignore[call-overload]
+        insert(AccountingExpense)
+        .values(
+            expense_type=standardized_expense_type,
+            amount=amount,
+            date=date,
+            user_id=user.id,
+            description=description,
+        )
+        .on_conflict_do_nothing()
+        .returning(*AccountingExpense.__table__.columns)  # type: ignore[attr-defined]
     ).first()
+    if created is None:
+        return None
 
-    existing_expense2: AccountingExpense | None = db.exec(
-        select(AccountingExpense)
-        .where(AccountingExpense.user_id == user.id)
-        .where(AccountingExpense.expense_type == standardized_expense_type)
-    ).first()
+    expense: AccountingExpense = AccountingExpense(**created._mapping)
+    accounting_summary_repo.record("expense", [(user.id, date, standardized_expense_type, amount)], db)
+    version_repo.bump("accountingexpense", [user.id], db)
+    db.commit()
 
-    if existing_expense2 is not None:
-        x = existing_expense2.date == date
+    return expense
 
-    if existing_expense is not None:
-        return None
+def create_many(expenses: Sequence[AccountingExpense], db: Session) -> list[bool]:
+    """
+    Inserts the expense rows in one transaction, skipping the ones that already exist
+
+    Args:
+        expenses: The new rows, with validated expense types
+        db: The database session
+
+    Returns:
+        Whether each row was created. False means the user already has that expense
+            on that date, either in the database or earlier in the batch
+    """
+    if len(expenses) == 0:
+        return []
 
-    expense: AccountingExpense = AccountingExpense(
-        expense_type=standardized_expense_type,
-        amount=amount,
-        date=date,
-        user_id=user.id,
-        description=description,
+    created_keys: set[tuple] = set(tuple(key) for key in db.exec(  # type: ignore[call-overload]
+        insert(AccountingExpense)
+        .on_conflict_do_nothing()
+        .returning(col(AccountingExpense.expense_type), col(AccountingExpense.date), col(AccountingExpense.user_id)),
+        params=[row.model_dump() for row in expenses],
+    ).all())
+
+    created: list[bool] = []
+    for row in expenses:
+        key: tuple = (row.expense_type, row.date, row.user_id)
+        created.append(key in created_keys)
+        created_keys.discard(key)
+
+    accounting_summary_repo.record(
+        "expense",
+        [(row.user_id, row.date, row.expense_type, row.amount) for row, was_created in zip(expenses, created) if was_created],
+        db,
     )
-    db.add(expense)
+    version_repo.bump("accountingexpense", [row.user_id for row, was_created in zip(expenses, created) if was_created], db)
     db.commit()
-    db.refresh(expense)
+    return created
 
-    return expense
-
-def get_all(user: User, db: Session) -> Iterable[AccountingExpense]:
+def get_all(
+    user: User,
+    db: Session,
+    page: Page | None = None,
+    start: datetime.date | None = None,
+    end: datetime.date | None = None,
+) -> Sequence[AccountingExpense]:
     """
-    Gets the user's expenses
+    Gets the user's expenses, ordered by sort_key
 
     Args:
         user: The user that has the expenses
         db: The database session
+        page: The page of expenses to get. None gets all of them
+        start: If given, only get expenses on or after this date
+        end: If given, only get expenses on or before this date
 
     Returns:
         The user's monthly budget expenses
     """
-    expenses: Iterable[AccountingExpense] = db.exec(
-        select(AccountingExpense).where(AccountingExpense.user_id == user.id)
+    assert user.id is not None
+    expenses: Sequence[AccountingExpense] = db.exec(
+        pagination.keyset(_select_by_user_id(user.id, start, end), AccountingExpense, sort_key, page)
     ).all()
     return expenses
 
 def get_by_user_id(
-    user_id: int, db: Session
-) -> Iterable[AccountingExpense]:
+    user_id: int,
+    db: Session,
+    page: Page | None = None,
+    start: datetime.date | None = None,
+    end: datetime.date | None = None,
+) -> Sequence[AccountingExpense]:
     """
-    Gets all expenses by user ID
+    Gets all expenses by user ID, ordered by sort_key
 
     Args:
         user_id: The user ID of the user that has the expenses
         db: The database session
+        page: The page of expenses to get. None gets all of them
+        start: If given, only get expenses on or after this date
+        end: If given, only get expenses on or before this date
 
     Returns:
         The user's monthly budget expenses
     """
-    expenses: Iterable[AccountingExpense] = db.exec(
-        select(AccountingExpense).where(AccountingExpense.user_id == user_id)
+    expenses: Sequence[AccountingExpense] = db.exec(
+        pagination.keyset(_select_by_user_id(user_id, start, end), AccountingExpense, sort_key, page)
     ).all()
     return expenses
 
+def stream_by_user_id(
+    user_id: int, start: datetime.date | None = None, end: datetime.date | None = None
+) -> SelectOfScalar[AccountingExpense]:
+    """
+    Returns:
+        The query for the user's expenses between the optional start and end dates, ordered
+            by sort_key, to pass to Database.stream()
+    """
+    return pagination.keyset(_select_by_user_id(user_id, start, end), AccountingExpense, sort_key, None)
+
+def _select_by_user_id(
+    user_id: int, start: datetime.date | None, end: datetime.date | None
+) -> SelectOfScalar[AccountingExpense]:
+    statement: SelectOfScalar[AccountingExpense] = select(AccountingExpense).where(AccountingExpense.user_id == user_id)
+    if start is not None:
+        statement = statement.where(AccountingExpense.date >= start)
+    if end is not None:
+        statement = statement.where(AccountingExpense.date <= end)
+    return statement
+
 def get_by_type(
-    expense_type: str, db: Session
-) -> Iterable[AccountingExpense]:
+    expense_type: str, db: Session, page: Page | None = None
+) -> Sequence[AccountingExpense]:
     """
-    Gets all expenses by expense type
+    Gets all expenses by expense type, ordered by all_users_sort_key
 
     Args:
         expense_type: The type of the expenses
         db: The database session
+        page: The page of expenses to get. None gets all of them
 
     Returns:
         The expenses across all users
     """
-    expenses: Iterable[AccountingExpense] = db.exec(
-        select(AccountingExpense).where(
-            AccountingExpense.expense_type.ilike(f"%{expense_type}%") # type: ignore[attr-defined]
-        )
+    expenses: Sequence[AccountingExpense] = db.exec(
+        pagination.keyset(_select_by_type(expense_type), AccountingExpense, all_users_sort_key, page)
+    ).all()
+    return expenses
+
+def stream_by_type(expense_type: str) -> SelectOfScalar[AccountingExpense]:
+    """
+    Returns:
+        The query for all expenses by expense type, ordered by all_users_sort_key, to pass to
+            Database.stream()
+    """
+    return pagination.keyset(_select_by_type(expense_type), AccountingExpense, all_users_sort_key, None)
+
+def _select_by_type(expense_type: str) -> SelectOfScalar[AccountingExpense]:
+    return select(AccountingExpense).where(
+        search.contains(AccountingExpense, "expense_type", expense_type)
+    )
+
+def get_by_description(
+    description: str, db: Session, page: Page | None = None
+) -> Sequence[AccountingExpense]:
+    """
+    Gets all expenses whose description contains the text, ordered by all_users_sort_key
+
+    Args:
+        description: The text to search for
+        db: The database session
+        page: The page of expenses to get. None gets all of them
+
+    Returns:
+        The expenses across all users
+    """
+    expenses: Sequence[AccountingExpense] = db.exec(
+        pagination.keyset(_select_by_description(description), AccountingExpense, all_users_sort_key, page)
     ).all()
     return expenses
 
+def stream_by_description(description: str) -> SelectOfScalar[AccountingExpense]:
+    """
+    Returns:
+        The query for all expenses whose description contains the text, ordered by
+            all_users_sort_key, to pass to Database.stream()
+    """
+    return pagination.keyset(_select_by_description(description), AccountingExpense, all_users_sort_key, None)
+
+def _select_by_description(description: str) -> SelectOfScalar[AccountingExpense]:
+    return select(AccountingExpense).where(
+        search.contains(AccountingExpense, "description", description)
+    )
+
 def delete(user: User, expense_type: str, date: datetime.date, db: Session) -> bool:
     """
     Deletes the user's expense
@@ -142,6 +274,7 @@ def delete(user: User, expense_type: str, date: datetime.date, db: Session) -> b
     Args:
         user (User): the user to delete the expense from
         expense_type (str): The type of the expense
+        date (datetime.date): The date of the expense
         db (Session): The database session
 
     Returns:
@@ -149,16 +282,41 @@ def delete(user: User, expense_type: str, date: datetime.date, db: Session) -> b
         and the expense was deleted; otherwise False
     """
     standardized_expense_type: str = _standardize_expense_type(expense_type)
-    expense: AccountingExpense | None = db.exec(
-        select(AccountingExpense)
-        .where(AccountingExpense.user_id == user.id)
-        .where(AccountingExpense.date == date)
-        .where(AccountingExpense.expense_type == standardized_expense_type)
-    ).first()
+    return _delete_where(
+        db,
+        col(AccountingExpense.user_id) == user.id,
+        col(AccountingExpense.date) == date,
+        col(AccountingExpense.expense_type) == standardized_expense_type,
+    ) > 0
 
-    if expense is None:
-        return False
+def delete_range(user: User, start: datetime.date, end: datetime.date, db: Session) -> int:
+    """
+    Deletes all of the user's expenses between the start and end dates, inclusive
 
-    db.delete(expense)
+    Args:
+        user (User): the user to delete the expenses from
+        start (datetime.date): The first date to delete
+        end (datetime.date): The last date to delete
+        db (Session): The database session
+
+    Returns:
+        int: The number of expenses deleted
+    """
+    return _delete_where(
+        db,
+        col(AccountingExpense.user_id) == user.id,
+        col(AccountingExpense.date) >= start,
+        col(AccountingExpense.date) <= end,
+    )
+
+def _delete_where(db: Session, *conditions: sa.ColumnElement[bool]) -> int:
+    # one statement, returning what the monthly totals need so they change in the same transaction
+    deleted: Sequence[Row] = db.exec(  # type: ignore[call-overload]
+        sa.delete(AccountingExpense)
+        .where(*conditions)
+        .returning(col(AccountingExpense.user_id), col(AccountingExpense.date), col(AccountingExpense.expense_type), col(AccountingExpense.amount))
+    ).all()
+    accounting_summary_repo.record("expense", [tuple(row) for row in deleted], db, removed=True)
+    version_repo.bump("accountingexpense", [row.user_id for row in deleted], db)
     db.commit()
-    return True
+    return len(deleted)
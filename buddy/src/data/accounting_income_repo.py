@@ -1,11 +1,21 @@
 import datetime
 from decimal import Decimal
-from typing import Iterable
+from typing import Sequence
 
-from sqlmodel import Session, select
+import sqlalchemy as sa
+from sqlalchemy import Row
+from sqlalchemy.dialects.sqlite import insert
+from sqlmodel import Session, col, select
+from sqlmodel.sql.expression import SelectOfScalar
 
+from buddy.src.data import accounting_summary_repo, pagination, search, version_repo
+from buddy.src.data.pagination import Page
 from buddy.src.models import AccountingIncome, User
 
+# the columns that order one user's income and the income of every user, for keyset pagination
+sort_key: tuple[str, ...] = ("date", "income_type")
+all_users_sort_key: tuple[str, ...] = ("date", "income_type", "user_id")
+
 
 def _standardize_income_type(income_type: str) -> str:
     standardized: str = ""
@@ -18,6 +28,22 @@ def _standardize_income_type(income_type: str) -> str:
     standardized = standardized[: len(standardized) - 1]  # to remove leading space
     return standardized
 
+def validate_income_type(income_type: str) -> str:
+    """
+    Args:
+        income_type (str): The income type sent by the user
+
+    Returns:
+        str: The standardized income type
+
+    Raises:
+        ValueError: if the income type is empty, contains invalid
+        whitespace, or contains too many spaces
+    """
+    if income_type == "" or "\t" in income_type or "\n" in income_type:
+        raise ValueError("Income Type is invalid")
+    return _standardize_income_type(income_type)
+
 def create(
     income_type: str,
     amount: Decimal,
@@ -26,80 +52,176 @@ def create(
     db: Session,
 ) -> AccountingIncome | None:
     assert user.id is not None
-    if income_type == "" or "\t" in income_type or "\n" in income_type:
-        raise ValueError("Income Type is invalid")
-    standardized_income_type: str = _standardize_income_type(income_type)
+    standardized_income_type: str = validate_income_type(income_type)
 
-    existing_income_source: AccountingIncome | None = db.exec(
-        select(AccountingIncome)
-        .where(AccountingIncome.user_id == user.id)
-        .where(AccountingIncome.date == date)
-        .where(AccountingIncome.income_type == standardized_income_type)
+    created: Row | None = db.exec(  # type: ignore[call-overload]
+        insert(AccountingIncome)
+        .values(income_type=standardized_income_type, amount=amount, date=date, user_id=user.id)
+        .on_conflict_do_nothing()
+        .returning(*AccountingIncome.__table__.columns)  # type: ignore[attr-defined]
     ).first()
-
-    if existing_income_source is not None:
+    if created is None:
         return None
 
-    income: AccountingIncome = AccountingIncome(
-        income_type=standardized_income_type,
-        amount=amount,
-        date=date,
-        user_id=user.id,
-    )
-    db.add(income)
+    income: AccountingIncome = AccountingIncome(**created._mapping)
+    accounting_summary_repo.record("income", [(user.id, date, standardized_income_type, amount)], db)
+    version_repo.bump("accountingincome", [user.id], db)
     db.commit()
-    db.refresh(income)
     return income
 
-def get_all(user: User, db: Session) -> Iterable[AccountingIncome]:
-    income: Iterable[AccountingIncome] = db.exec(
-        select(AccountingIncome).where(AccountingIncome.user_id == user.id)
+def create_many(income_sources: Sequence[AccountingIncome], db: Session) -> list[bool]:
+    """
+    Inserts the income rows in one transaction, skipping the ones that already exist
+
+    Args:
+        income_sources: The new rows, with validated income types
+        db: The database session
+
+    Returns:
+        Whether each row was created. False means the user already has that income
+            on that date, either in the database or earlier in the batch
+    """
+    if len(income_sources) == 0:
+        return []
+
+    created_keys: set[tuple] = set(tuple(key) for key in db.exec(  # type: ignore[call-overload]
+        insert(AccountingIncome)
+        .on_conflict_do_nothing()
+        .returning(col(AccountingIncome.income_type), col(AccountingIncome.date), col(AccountingIncome.user_id)),
+        params=[row.model_dump() for row in income_sources],
+    ).all())
+
+    created: list[bool] = []
+    for row in income_sources:
+        key: tuple = (row.income_type, row.date, row.user_id)
+        created.append(key in created_keys)
+        created_keys.discard(key)
+
+    accounting_summary_repo.record(
+        "income",
+        [(row.user_id, row.date, row.income_type, row.amount) for row, was_created in zip(income_sources, created) if was_created],
+        db,
+    )
+    version_repo.bump("accountingincome", [row.user_id for row, was_created in zip(income_sources, created) if was_created], db)
+    db.commit()
+    return created
+
+def get_all(
+    user: User,
+    db: Session,
+    page: Page | None = None,
+    start: datetime.date | None = None,
+    end: datetime.date | None = None,
+) -> Sequence[AccountingIncome]:
+    assert user.id is not None
+    income: Sequence[AccountingIncome] = db.exec(
+        pagination.keyset(_select_by_user_id(user.id, start, end), AccountingIncome, sort_key, page)
     ).all()
     return income
 
-def get_by_user_id(user_id: int, db: Session) -> Iterable[AccountingIncome]:
+def get_by_user_id(
+    user_id: int,
+    db: Session,
+    page: Page | None = None,
+    start: datetime.date | None = None,
+    end: datetime.date | None = None,
+) -> Sequence[AccountingIncome]:
     """ """
-    income: Iterable[AccountingIncome] = db.exec(
-        select(AccountingIncome).where(AccountingIncome.user_id == user_id)
+    income: Sequence[AccountingIncome] = db.exec(
+        pagination.keyset(_select_by_user_id(user_id, start, end), AccountingIncome, sort_key, page)
     ).all()
     return income
 
-def get_by_type(income_type: str, db: Session) -> Iterable[AccountingIncome]:
+def stream_by_user_id(
+    user_id: int, start: datetime.date | None = None, end: datetime.date | None = None
+) -> SelectOfScalar[AccountingIncome]:
+    """
+    Returns:
+        The query for the user's income between the optional start and end dates, ordered
+            by sort_key, to pass to Database.stream()
+    """
+    return pagination.keyset(_select_by_user_id(user_id, start, end), AccountingIncome, sort_key, None)
+
+def _select_by_user_id(
+    user_id: int, start: datetime.date | None, end: datetime.date | None
+) -> SelectOfScalar[AccountingIncome]:
+    statement: SelectOfScalar[AccountingIncome] = select(AccountingIncome).where(AccountingIncome.user_id == user_id)
+    if start is not None:
+        statement = statement.where(AccountingIncome.date >= start)
+    if end is not None:
+        statement = statement.where(AccountingIncome.date <= end)
+    return statement
+
+def get_by_type(income_type: str, db: Session, page: Page | None = None) -> Sequence[AccountingIncome]:
     """ """
-    income: Iterable[AccountingIncome] = db.exec(
-        select(AccountingIncome).filter(
-            AccountingIncome.income_type.ilike(f"%{income_type}%")  # type: ignore[attr-defined]
-        )
+    income: Sequence[AccountingIncome] = db.exec(
+        pagination.keyset(_select_by_type(income_type), AccountingIncome, all_users_sort_key, page)
     ).all()
     return income
 
-def delete(
-    user: User, income_type: str, date: datetime.date, db: Session
-) -> bool:
+def stream_by_type(income_type: str) -> SelectOfScalar[AccountingIncome]:
+    """
+    Returns:
+        The query for all income by income type, ordered by all_users_sort_key, to pass to
+            Database.stream()
+    """
+    return pagination.keyset(_select_by_type(income_type), AccountingIncome, all_users_sort_key, None)
+
+def _select_by_type(income_type: str) -> SelectOfScalar[AccountingIncome]:
+    return select(AccountingIncome).filter(
+        search.contains(AccountingIncome, "income_type", income_type)
+    )
+
+def delete(user: User, income_type: str, date: datetime.date, db: Session) -> bool:
     """
     Deletes the user's income
 
     Args:
-        user (User): the user to delete the expense from
-        expense_type (str): The type of the expense
+        user (User): the user to delete the income from
+        income_type (str): The type of the income
+        date (datetime.date): The date of the income
         db (Session): The database session
 
     Returns:
-        True if the user has the income source in the database
-        and it was deleted; otherwise False
+        True if the user has the income in the database
+        and the income was deleted; otherwise False
     """
     standardized_income_type: str = _standardize_income_type(income_type)
-    income: AccountingIncome | None = db.exec(
-        select(AccountingIncome)
-        .where(AccountingIncome.user_id == user.id)
-        .where(AccountingIncome.date == date)
-        .where(AccountingIncome.income_type == standardized_income_type)
-    ).first()
+    return _delete_where(
+        db,
+        col(AccountingIncome.user_id) == user.id,
+        col(AccountingIncome.date) == date,
+        col(AccountingIncome.income_type) == standardized_income_type,
+    ) > 0
+
+def delete_range(user: User, start: datetime.date, end: datetime.date, db: Session) -> int:
+    """
+    Deletes all of the user's income between the start and end dates, inclusive
 
-    if income is None:
-        return False
+    Args:
+        user (User): the user to delete the income from
+        start (datetime.date): The first date to delete
+        end (datetime.date): The last date to delete
+        db (Session): The database session
 
-    db.delete(income)
-    db.commit()
-    return True
+    Returns:
+        int: The number of income deleted
+    """
+    return _delete_where(
+        db,
+        col(AccountingIncome.user_id) == user.id,
+        col(AccountingIncome.date) >= start,
+        col(AccountingIncome.date) <= end,
+    )
 
+def _delete_where(db: Session, *conditions: sa.ColumnElement[bool]) -> int:
+    # one statement, returning what the monthly totals need so they change in the same transaction
+    deleted: Sequence[Row] = db.exec(  # type: ignore[call-overload]
+        sa.delete(AccountingIncome)
+        .where(*conditions)
+        .returning(col(AccountingIncome.user_id), col(AccountingIncome.date), col(AccountingIncome.income_type), col(AccountingIncome.amount))
+    ).all()
+    accounting_summary_repo.record("income", [tuple(row) for row in deleted], db, removed=True)
+    version_repo.bump("accountingincome", [row.user_id for row in deleted], db)
+    db.commit()
+    return len(deleted)
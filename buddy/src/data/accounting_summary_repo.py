@@ -0,0 +1,136 @@
+import datetime
+from decimal import Decimal
+from typing import Iterable, Literal, Sequence
+
+import sqlalchemy as sa
+from sqlalchemy.dialects.sqlite import insert
+from sqlmodel import Session, col, delete, select
+
+from buddy.src.models import AccountingExpense, AccountingIncome, AccountingSummary
+
+Kind = Literal["expense", "income"]
+
+
+def month_of(date: datetime.date) -> str:
+    return date.strftime("%Y-%m")
+
+
+def record(
+    kind: Kind,
+    rows: Iterable[tuple[int, datetime.date, str, Decimal]],
+    db: Session,
+    removed: bool = False,
+) -> None:
+    """
+    Adds accounting rows to the monthly totals, or subtracts them if they were removed.
+    Doesn't commit, so that the totals change in the same transaction as the rows.
+
+    Args:
+        kind: Whether the rows are expenses or income
+        rows: The user ID, date, standardized type and amount of each row
+        db: The database session
+        removed: Whether the rows were deleted instead of created
+    """
+    totals: dict[tuple[int, str, str], tuple[Decimal, int]] = {}
+    for user_id, date, category, amount in rows:
+        key: tuple[int, str, str] = (user_id, month_of(date), category)
+        total, entries = totals.get(key, (Decimal(0), 0))
+        totals[key] = (total + Decimal(amount), entries + 1)
+    if len(totals) == 0:
+        return
+
+    sign: int = -1 if removed else 1
+    statement = insert(AccountingSummary)
+    statement = statement.on_conflict_do_update(
+        index_elements=["user_id", "month", "kind", "category"],
+        set_={
+            "total": col(AccountingSummary.total) + statement.excluded.total,
+            "entries": col(AccountingSummary.entries) + statement.excluded.entries,
+        },
+    )
+    db.exec(statement, params=[  # type: ignore[call-overload]
+        {"user_id": user_id, "month": month, "kind": kind, "category": category,
+         "total": sign * total, "entries": sign * entries}
+        for (user_id, month, category), (total, entries) in totals.items()
+    ])
+
+    if removed:
+        db.exec(delete(AccountingSummary).where(  # type: ignore[call-overload]
+            col(AccountingSummary.user_id).in_({user_id for user_id, _, _ in totals}),
+            col(AccountingSummary.entries) <= 0,
+        ))
+
+
+def get_monthly_totals(
+    user_id: int, start: str | None, end: str | None, db: Session
+) -> Sequence[tuple[str, Decimal, Decimal]]:
+    """
+    Args:
+        user_id: The user to get the totals of
+        start: If given, the first month (YYYY-MM) to get
+        end: If given, the last month (YYYY-MM) to get
+        db: The database session
+
+    Returns:
+        The month, total income and total expenses of each month with accounting records
+    """
+    def total_of(kind: Kind) -> sa.ColumnElement[Decimal]:
+        return sa.type_coerce(
+            sa.func.coalesce(sa.func.sum(col(AccountingSummary.total)).filter(col(AccountingSummary.kind) == kind), 0),
+            AccountingSummary.total.type,  # type: ignore[attr-defined]
+        )
+
+    return db.exec(
+        select(col(AccountingSummary.month), total_of("income"), total_of("expense"))
+        .where(*_in_months(user_id, start, end))
+        .group_by(col(AccountingSummary.month))
+        .order_by(col(AccountingSummary.month))
+    ).all()
+
+
+def get_categories(
+    user_id: int, start: str | None, end: str | None, db: Session
+) -> Sequence[AccountingSummary]:
+    """
+    Args:
+        user_id: The user to get the totals of
+        start: If given, the first month (YYYY-MM) to get
+        end: If given, the last month (YYYY-MM) to get
+        db: The database session
+
+    Returns:
+        The total of each expense and income type per month
+    """
+    return db.exec(
+        select(AccountingSummary)
+        .where(*_in_months(user_id, start, end))
+        .order_by(col(AccountingSummary.month), col(AccountingSummary.kind), col(AccountingSummary.category))
+    ).all()
+
+
+def rebuild(db: Session) -> None:
+    """
+    Recomputes every monthly total from the accounting tables and commits
+    """
+    db.exec(delete(AccountingSummary))  # type: ignore[call-overload]
+    sources: list[tuple[Kind, sa.Table, str]] = [
+        ("expense", AccountingExpense.__table__, "expense_type"),  # type: ignore[attr-defined]
+        ("income", AccountingIncome.__table__, "income_type"),  # type: ignore[attr-defined]
+    ]
+    for kind, table, category in sources:
+        month = sa.func.strftime("%Y-%m", table.c.date)
+        db.exec(sa.insert(AccountingSummary).from_select(  # type: ignore[call-overload]
+            ["user_id", "month", "kind", "category", "total", "entries"],
+            sa.select(table.c.user_id, month, sa.literal(kind), table.c[category], sa.func.sum(table.c.amount), sa.func.count())
+            .group_by(table.c.user_id, month, table.c[category]),
+        ))
+    db.commit()
+
+
+def _in_months(user_id: int, start: str | None, end: str | None) -> list[sa.ColumnElement[bool]]:
+    conditions: list[sa.ColumnElement[bool]] = [col(AccountingSummary.user_id) == user_id]
+    if start is not None:
+        conditions.append(col(AccountingSummary.month) >= start)
+    if end is not None:
+        conditions.append(col(AccountingSummary.month) <= end)
+    return conditions
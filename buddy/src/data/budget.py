@@ -1,12 +1,22 @@
 from decimal import Decimal
-from typing import Iterable
+from typing import Sequence
 
-from sqlmodel import Session, select
+import sqlalchemy as sa
+from sqlalchemy import Row
+from sqlalchemy.dialects.sqlite import insert
+from sqlmodel import Session, col, select
+from sqlmodel.sql.expression import SelectOfScalar
 
+from buddy.src.data import pagination, search, version_repo
+from buddy.src.data.pagination import Page
 from buddy.src.models import BudgetExpense, MonthlyIncome, User
 
 
 class BudgetExpenseRepository:
+    # the columns that order one user's expenses and the expenses of every user, for keyset pagination
+    sort_key: tuple[str, ...] = ("expense_type",)
+    all_users_sort_key: tuple[str, ...] = ("expense_type", "user_id")
+
     @staticmethod
     def _standardize_expense_type(expense_type: str) -> str:
         standardized: str = ""
@@ -52,84 +62,116 @@ class BudgetExpenseRepository:
             raise ValueError("Expense Type is invalid")
         standardized_expense_type: str = cls._standardize_expense_type(expense_type)
 
-        existing_expense: BudgetExpense | None = db.exec(
-            select(BudgetExpense)
-            .where(BudgetExpense.user_id == user.id)
-            .where(BudgetExpense.expense_type == standardized_expense_type)
+        created: Row | None = db.exec(  # type: ignore[call-overload]
+            insert(BudgetExpense)
+            .values(
+                expense_type=standardized_expense_type,
+                amount=amount,
+                user_id=user.id,
+                description=description,
+            )
+            .on_conflict_do_nothing()
+            .returning(*BudgetExpense.__table__.columns)  # type: ignore[attr-defined]
         ).first()
-
-        if existing_expense is not None:
+        if created is None:
             return None
 
-        expense: BudgetExpense = BudgetExpense(
-            expense_type=standardized_expense_type,
-            amount=amount,
-            user_id=user.id,
-            description=description,
-        )
-        db.add(expense)
+        version_repo.bump("budgetexpense", [user.id], db)
         db.commit()
-        db.refresh(expense)
+        expense: BudgetExpense = BudgetExpense(**created._mapping)
 
         return expense
 
     @classmethod
-    def get_expenses(cls, user: User, db: Session) -> Iterable[BudgetExpense]:
+    def get_expenses(cls, user: User, db: Session, page: Page | None = None) -> Sequence[BudgetExpense]:
         """
-        Gets the user's expenses
+        Gets the user's expenses, ordered by sort_key
 
         Args:
             user: The user that has the expenses
             db: The database session
+            page: The page of expenses to get. None gets all of them
 
         Returns:
             The user's monthly budget expenses
         """
-        expenses: Iterable[BudgetExpense] = db.exec(
-            select(BudgetExpense).where(BudgetExpense.user_id == user.id)
+        expenses: Sequence[BudgetExpense] = db.exec(
+            pagination.keyset(
+                select(BudgetExpense).where(BudgetExpense.user_id == user.id),
+                BudgetExpense,
+                cls.sort_key,
+                page,
+            )
         ).all()
         return expenses
 
     @classmethod
     def get_expenses_by_user_id(
-        cls, user_id: int, db: Session
-    ) -> Iterable[BudgetExpense]:
+        cls, user_id: int, db: Session, page: Page | None = None
+    ) -> Sequence[BudgetExpense]:
         """
-        Gets all expenses by user ID
+        Gets all expenses by user ID, ordered by sort_key
 
         Args:
             user_id: The user ID of the user that has the expenses
             db: The database session
+            page: The page of expenses to get. None gets all of them
 
         Returns:
             The user's monthly budget expenses
         """
-        expenses: Iterable[BudgetExpense] = db.exec(
-            select(BudgetExpense).where(BudgetExpense.user_id == user_id)
+        expenses: Sequence[BudgetExpense] = db.exec(
+            pagination.keyset(cls._select_by_user_id(user_id), BudgetExpense, cls.sort_key, page)
         ).all()
         return expenses
 
+    @classmethod
+    def stream_expenses_by_user_id(cls, user_id: int) -> SelectOfScalar[BudgetExpense]:
+        """
+        Returns:
+            The query for all of the user's expenses, ordered by sort_key, to pass to Database.stream()
+        """
+        return pagination.keyset(cls._select_by_user_id(user_id), BudgetExpense, cls.sort_key, None)
+
+    @staticmethod
+    def _select_by_user_id(user_id: int) -> SelectOfScalar[BudgetExpense]:
+        return select(BudgetExpense).where(BudgetExpense.user_id == user_id)
+
     @classmethod
     def get_expenses_by_type(
-        cls, expense_type: str, db: Session
-    ) -> Iterable[BudgetExpense]:
+        cls, expense_type: str, db: Session, page: Page | None = None
+    ) -> Sequence[BudgetExpense]:
         """
-        Gets all expenses by expense type
+        Gets all expenses by expense type, ordered by all_users_sort_key
 
         Args:
             expense_type: The type of the expenses
             db: The database session
+            page: The page of expenses to get. None gets all of them
 
         Returns:
             The expenses across all users
         """
-        expenses: Iterable[BudgetExpense] = db.exec(
-            select(BudgetExpense).where(
-                BudgetExpense.expense_type.ilike(f"%{expense_type}%") # type: ignore[attr-defined]
-            )
+        expenses: Sequence[BudgetExpense] = db.exec(
+            pagination.keyset(cls._select_by_type(expense_type), BudgetExpense, cls.all_users_sort_key, page)
         ).all()
         return expenses
 
+    @classmethod
+    def stream_expenses_by_type(cls, expense_type: str) -> SelectOfScalar[BudgetExpense]:
+        """
+        Returns:
+            The query for all expenses by expense type, ordered by all_users_sort_key, to pass
+                to Database.stream()
+        """
+        return pagination.keyset(cls._select_by_type(expense_type), BudgetExpense, cls.all_users_sort_key, None)
+
+    @staticmethod
+    def _select_by_type(expense_type: str) -> SelectOfScalar[BudgetExpense]:
+        return select(BudgetExpense).where(
+            search.contains(BudgetExpense, "expense_type", expense_type)
+        )
+
     @classmethod
     def delete_expense(cls, user: User, expense_type: str, db: Session) -> bool:
         """
@@ -145,21 +187,23 @@ class BudgetExpenseRepository:
             and the expense was deleted; otherwise False
         """
         standardized_expense_type: str = cls._standardize_expense_type(expense_type)
-        expense: BudgetExpense | None = db.exec(
-            select(BudgetExpense)
-            .where(BudgetExpense.user_id == user.id)
-            .where(BudgetExpense.expense_type == standardized_expense_type)
-        ).first()
-
-        if expense is None:
-            return False
-
-        db.delete(expense)
+        deleted: int = db.exec(  # type: ignore[call-overload]
+            sa.delete(BudgetExpense)
+            .where(col(BudgetExpense.user_id) == user.id)
+            .where(col(BudgetExpense.expense_type) == standardized_expense_type)
+        ).rowcount
+        if deleted > 0:
+            assert user.id is not None
+            version_repo.bump("budgetexpense", [user.id], db)
         db.commit()
-        return True
+        return deleted > 0
 
 
 class MonthlyIncomeRepository:
+    # the columns that order one user's income and the income of every user, for keyset pagination
+    sort_key: tuple[str, ...] = ("income_type",)
+    all_users_sort_key: tuple[str, ...] = ("income_type", "user_id")
+
     @staticmethod
     def _standardize_income_type(income_type: str) -> str:
         standardized: str = ""
@@ -182,50 +226,75 @@ class MonthlyIncomeRepository:
             raise ValueError("Income Type is invalid")
         standardized_income_type: str = cls._standardize_income_type(income_type)
 
-        existing_income_source: MonthlyIncome | None = db.exec(
-            select(MonthlyIncome)
-            .where(MonthlyIncome.user_id == user.id)
-            .where(MonthlyIncome.income_type == standardized_income_type)
+        created: Row | None = db.exec(  # type: ignore[call-overload]
+            insert(MonthlyIncome)
+            .values(income_type=standardized_income_type, amount=amount, user_id=user.id)
+            .on_conflict_do_nothing()
+            .returning(*MonthlyIncome.__table__.columns)  # type: ignore[attr-defined]
         ).first()
-
-        if existing_income_source is not None:
+        if created is None:
             return None
 
-        income: MonthlyIncome = MonthlyIncome(
-            income_type=standardized_income_type,
-            amount=amount,
-            user_id=user.id,
-        )
-        db.add(income)
+        version_repo.bump("monthlyincome", [user.id], db)
         db.commit()
-        db.refresh(income)
+        income: MonthlyIncome = MonthlyIncome(**created._mapping)
         return income
 
     @classmethod
-    def get_all(cls, user: User, db: Session) -> Iterable[MonthlyIncome]:
-        income: Iterable[MonthlyIncome] = db.exec(
-            select(MonthlyIncome).where(MonthlyIncome.user_id == user.id)
+    def get_all(cls, user: User, db: Session, page: Page | None = None) -> Sequence[MonthlyIncome]:
+        income: Sequence[MonthlyIncome] = db.exec(
+            pagination.keyset(
+                select(MonthlyIncome).where(MonthlyIncome.user_id == user.id),
+                MonthlyIncome,
+                cls.sort_key,
+                page,
+            )
         ).all()
         return income
 
     @classmethod
-    def get_by_user_id(cls, user_id: int, db: Session) -> Iterable[MonthlyIncome]:
+    def get_by_user_id(cls, user_id: int, db: Session, page: Page | None = None) -> Sequence[MonthlyIncome]:
         """ """
-        income: Iterable[MonthlyIncome] = db.exec(
-            select(MonthlyIncome).where(MonthlyIncome.user_id == user_id)
+        income: Sequence[MonthlyIncome] = db.exec(
+            pagination.keyset(cls._select_by_user_id(user_id), MonthlyIncome, cls.sort_key, page)
         ).all()
         return income
 
     @classmethod
-    def get_by_type(cls, income_type: str, db: Session) -> Iterable[MonthlyIncome]:
+    def stream_by_user_id(cls, user_id: int) -> SelectOfScalar[MonthlyIncome]:
+        """
+        Returns:
+            The query for all of the user's income, ordered by sort_key, to pass to Database.stream()
+        """
+        return pagination.keyset(cls._select_by_user_id(user_id), MonthlyIncome, cls.sort_key, None)
+
+    @staticmethod
+    def _select_by_user_id(user_id: int) -> SelectOfScalar[MonthlyIncome]:
+        return select(MonthlyIncome).where(MonthlyIncome.user_id == user_id)
+
+    @classmethod
+    def get_by_type(cls, income_type: str, db: Session, page: Page | None = None) -> Sequence[MonthlyIncome]:
         """ """
-        income: Iterable[MonthlyIncome] = db.exec(
-            select(MonthlyIncome).filter(
-                MonthlyIncome.income_type.ilike(f"%{income_type}%") # type: ignore[attr-defined]
-            )
+        income: Sequence[MonthlyIncome] = db.exec(
+            pagination.keyset(cls._select_by_type(income_type), MonthlyIncome, cls.all_users_sort_key, page)
         ).all()
         return income
 
+    @classmethod
+    def stream_by_type(cls, income_type: str) -> SelectOfScalar[MonthlyIncome]:
+        """
+        Returns:
+            The query for all income by income type, ordered by all_users_sort_key, to pass to
+                Database.stream()
+        """
+        return pagination.keyset(cls._select_by_type(income_type), MonthlyIncome, cls.all_users_sort_key, None)
+
+    @staticmethod
+    def _select_by_type(income_type: str) -> SelectOfScalar[MonthlyIncome]:
+        return select(MonthlyIncome).filter(
+            search.contains(MonthlyIncome, "income_type", income_type)
+        )
+
     @classmethod
     def delete(cls, user: User, income_type: str, db: Session) -> bool:
         """
@@ -241,15 +310,13 @@ class MonthlyIncomeRepository:
             and it was deleted; otherwise False
         """
         standardized_income_type: str = cls._standardize_income_type(income_type)
-        income: MonthlyIncome | None = db.exec(
-            select(MonthlyIncome)
-            .where(MonthlyIncome.user_id == user.id)
-            .where(MonthlyIncome.income_type == standardized_income_type)
-        ).first()
-
-        if income is None:
-            return False
-
-        db.delete(income)
+        deleted: int = db.exec(  # type: ignore[call-overload]
+            sa.delete(MonthlyIncome)
+            .where(col(MonthlyIncome.user_id) == user.id)
+            .where(col(MonthlyIncome.income_type) == standardized_income_type)
+        ).rowcount
+        if deleted > 0:
+            assert user.id is not None
+            version_repo.bump("monthlyincome", [user.id], db)
         db.commit()
-        return True
+        return deleted > 0
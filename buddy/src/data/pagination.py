@@ -0,0 +1,120 @@
+import base64
+import datetime
+import json
+from dataclasses import dataclass
+from typing import Any, Sequence, TypeVar
+
+import sqlalchemy as sa
+from sqlmodel import SQLModel
+from sqlmodel.sql.expression import SelectOfScalar
+from starlette.datastructures import MutableHeaders
+
+T = TypeVar("T")
+M = TypeVar("M", bound=SQLModel)
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+@dataclass
+class Page:
+    """
+    A keyset page request: up to `limit` rows that sort after the `after` key
+    """
+    limit: int | None = None
+    after: list[Any] | None = None
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """
+    Args:
+        values: The sort key of the last row on the page
+
+    Returns:
+        str: An opaque cursor that can be passed back to get the next page
+    """
+    plain: list[Any] = [
+        value.isoformat() if isinstance(value, datetime.date) else value for value in values
+    ]
+    return base64.urlsafe_b64encode(json.dumps(plain).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> list[Any]:
+    """
+    Raises:
+        InvalidCursorError: if the cursor wasn't created by encode_cursor()
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError:
+        raise InvalidCursorError("Invalid cursor")
+    if not isinstance(values, list):
+        raise InvalidCursorError("Invalid cursor")
+    return values
+
+
+def keyset(
+    statement: SelectOfScalar[M], model: type[M], key: Sequence[str], page: Page | None
+) -> SelectOfScalar[M]:
+    """
+    Orders the statement by the sort key and limits it to the requested page. One extra row
+    is fetched so that next_page() can tell whether there is another page.
+
+    Args:
+        statement: The query for the rows
+        model: The model being queried
+        key: The names of the columns that uniquely order the rows
+        page: The page to get. None gets every row
+
+    Returns:
+        The query for the page
+
+    Raises:
+        InvalidCursorError: if the cursor values don't match the sort key
+    """
+    columns: list[Any] = [getattr(model, name) for name in key]
+    statement = statement.order_by(*columns)
+    if page is None:
+        return statement
+
+    if page.after is not None:
+        if len(page.after) != len(columns):
+            raise InvalidCursorError("Invalid cursor")
+        after: list[Any] = [_from_cursor_value(column, value) for column, value in zip(columns, page.after)]
+        statement = statement.where(sa.tuple_(*columns) > sa.tuple_(*after))
+    if page.limit is not None:
+        statement = statement.limit(page.limit + 1)
+    return statement
+
+
+def next_page(
+    rows: Sequence[T], page: Page | None, key: Sequence[str], headers: MutableHeaders
+) -> Sequence[T]:
+    """
+    Trims the extra row fetched by keyset() and, if there is one, sets the
+    X-Next-Cursor header to the cursor for the next page
+
+    Returns:
+        The rows on this page
+    """
+    if page is None or page.limit is None or len(rows) <= page.limit:
+        return rows
+
+    rows = rows[: page.limit]
+    headers["X-Next-Cursor"] = encode_cursor([getattr(rows[-1], name) for name in key])
+    return rows
+
+
+def _from_cursor_value(column: Any, value: Any) -> Any:
+    try:
+        if isinstance(column.type, sa.Date):
+            return datetime.date.fromisoformat(value)
+        if isinstance(column.type, sa.Integer):
+            return int(value)
+    except (TypeError, ValueError):
+        raise InvalidCursorError("Invalid cursor")
+
+    if not isinstance(value, str):
+        raise InvalidCursorError("Invalid cursor")
+    return value
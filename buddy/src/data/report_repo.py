@@ -0,0 +1,50 @@
+from decimal import Decimal
+from typing import Any, Sequence
+
+import sqlalchemy as sa
+from sqlmodel import Session, col, select
+
+from buddy.src.data.accounting_summary_repo import Kind
+from buddy.src.models import AccountingSummary, BudgetExpense, MonthlyIncome
+
+
+def get_variance(user_id: int, month: str, db: Session) -> Sequence[tuple[Kind, str, Decimal, Decimal]]:
+    """
+    Compares the user's budget with the month's accounting totals in one query. The actual
+    amounts come from the monthly summary table, so the query doesn't read any transactions.
+
+    Args:
+        user_id: The user to compare
+        month: The month (YYYY-MM) to compare
+        db: The database session
+
+    Returns:
+        The kind ("expense" or "income"), type, planned amount and actual amount of each type
+            that is budgeted or has accounting records in the month
+    """
+    amount_type = AccountingSummary.total.type  # type: ignore[attr-defined]
+    zero = sa.literal(0, amount_type)
+    budget_expenses: sa.Select[Any] = sa.select(
+        sa.literal("expense").label("kind"),
+        col(BudgetExpense.expense_type).label("category"),
+        col(BudgetExpense.amount).label("planned"),
+        zero.label("actual"),
+    ).where(col(BudgetExpense.user_id) == user_id)
+    budget_income: sa.Select[Any] = sa.select(
+        sa.literal("income"), col(MonthlyIncome.income_type), col(MonthlyIncome.amount), zero
+    ).where(col(MonthlyIncome.user_id) == user_id)
+    actuals: sa.Select[Any] = sa.select(
+        col(AccountingSummary.kind), col(AccountingSummary.category), zero, col(AccountingSummary.total)
+    ).where(col(AccountingSummary.user_id) == user_id, col(AccountingSummary.month) == month)
+
+    amounts = sa.union_all(budget_expenses, budget_income, actuals).subquery()
+    return db.exec(
+        select(
+            amounts.c.kind,
+            amounts.c.category,
+            sa.type_coerce(sa.func.sum(amounts.c.planned), amount_type),
+            sa.type_coerce(sa.func.sum(amounts.c.actual), amount_type),
+        )
+        .group_by(amounts.c.kind, amounts.c.category)
+        .order_by(amounts.c.kind, amounts.c.category)
+    ).all()
@@ -0,0 +1,96 @@
+import sqlalchemy as sa
+from sqlalchemy import Connection
+from sqlmodel import SQLModel
+
+_searchable_columns: dict[str, tuple[str, ...]] = {
+    "budgetexpense": ("expense_type",),
+    "monthlyincome": ("income_type",),
+    "accountingexpense": ("expense_type", "description"),
+    "accountingincome": ("income_type",),
+}
+
+# the trigram tokenizer can't match anything shorter than one trigram
+_min_term_length: int = 3
+
+
+def create_search_indexes(connection: Connection) -> None:
+    """
+    Creates an external content FTS5 trigram table named `<table>_search` for each
+    searchable table, along with the triggers that keep it in sync. New FTS tables are
+    filled from the rows that already exist.
+
+    The FTS tables refer to rows by rowid, and VACUUM may renumber the rowids of these
+    tables, so vacuum with 'run.py vacuum', which rebuilds them afterwards.
+
+    Args:
+        connection (Connection): A connection to the SQLite database
+    """
+    for table, columns in _searchable_columns.items():
+        search_table: str = f"{table}_search"
+        exists: bool = connection.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (search_table,)
+        ).first() is not None
+
+        column_list: str = ", ".join(columns)
+        new_values: str = ", ".join(f"new.{column}" for column in columns)
+        old_values: str = ", ".join(f"old.{column}" for column in columns)
+        connection.exec_driver_sql(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {search_table} USING fts5("
+            f"{column_list}, content='{table}', content_rowid='rowid', tokenize='trigram')"
+        )
+        connection.exec_driver_sql(
+            f"CREATE TRIGGER IF NOT EXISTS {search_table}_insert AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO {search_table}(rowid, {column_list}) VALUES (new.rowid, {new_values}); "
+            f"END"
+        )
+        connection.exec_driver_sql(
+            f"CREATE TRIGGER IF NOT EXISTS {search_table}_delete AFTER DELETE ON {table} BEGIN "
+            f"INSERT INTO {search_table}({search_table}, rowid, {column_list}) VALUES ('delete', old.rowid, {old_values}); "
+            f"END"
+        )
+        connection.exec_driver_sql(
+            f"CREATE TRIGGER IF NOT EXISTS {search_table}_update AFTER UPDATE ON {table} BEGIN "
+            f"INSERT INTO {search_table}({search_table}, rowid, {column_list}) VALUES ('delete', old.rowid, {old_values}); "
+            f"INSERT INTO {search_table}(rowid, {column_list}) VALUES (new.rowid, {new_values}); "
+            f"END"
+        )
+
+        if not exists:
+            connection.exec_driver_sql(f"INSERT INTO {search_table}({search_table}) VALUES ('rebuild')")
+
+
+def rebuild_search_indexes(connection: Connection) -> None:
+    """
+    Refills every FTS table from its content table
+
+    Args:
+        connection (Connection): A connection to the SQLite database
+    """
+    for table in _searchable_columns:
+        connection.exec_driver_sql(f"INSERT INTO {table}_search({table}_search) VALUES ('rebuild')")
+
+
+def contains(model: type[SQLModel], column: str, term: str) -> sa.ColumnElement[bool]:
+    """
+    Builds a case insensitive "column contains term" filter that uses the table's FTS index
+
+    Args:
+        model (type[SQLModel]): The searchable model
+        column (str): The name of the searchable column
+        term (str): The text to search for
+
+    Returns:
+        ColumnElement[bool]: A clause to pass to .where()
+    """
+    table: str = model.__tablename__  # type: ignore[assignment]
+    assert column in _searchable_columns[table]
+
+    if len(term) < _min_term_length:
+        return getattr(model, column).ilike(f"%{term}%")
+
+    search_table = sa.table(f"{table}_search", sa.column("rowid"), sa.column(column))
+    phrase: str = '"' + term.replace('"', '""') + '"'
+    matching_rows = sa.select(search_table.c.rowid).where(
+        search_table.c[column].op("MATCH")(phrase)
+    )
+    return sa.literal_column(f"{table}.rowid").in_(matching_rows)
@@ -1,6 +1,10 @@
+from typing import TYPE_CHECKING
 from sqlmodel import Session, select
-from buddy.src.models import User
-from buddy.src.security import PasswordSecurity
+from buddy.src.models import User, UserRoles
+from buddy.src.security import IdentitySecurity, PasswordSecurity
+
+if TYPE_CHECKING:
+    from buddy.src.db import Database
 
 class UserRepository:
     @classmethod
@@ -16,13 +20,37 @@ class UserRepository:
         if new_password == "":
             return False
 
-        user.password = PasswordSecurity.hash(new_password)
+        cls._set_password(user, PasswordSecurity.hash(new_password), db)
+        return True
+
+    @classmethod
+    async def change_password_async(cls, user: User, new_password: str, db: "Database") -> bool:
+        if new_password == "":
+            return False
+
+        hashed_password: str = await PasswordSecurity.hash_async(new_password)
+        await db.run(cls._set_password, user, hashed_password)
+        return True
+
+    @classmethod
+    def _set_password(cls, user: User, hashed_password: str, db: Session) -> None:
+        user.password = hashed_password
         db.add(user)
+        IdentitySecurity.announce_change(user, db)
         db.commit()
-        return True
+        IdentitySecurity.forget_user(user)
 
+    @classmethod
+    def change_role(cls, user: User, role: UserRoles, db: Session) -> None:
+        user.role = role
+        db.add(user)
+        IdentitySecurity.revoke_tokens(user, db)
+        db.commit()
+        IdentitySecurity.forget_user(user)
 
     @classmethod
     def delete_user(cls, user: User, db: Session) -> None:
         db.delete(user)
+        IdentitySecurity.revoke_tokens(user, db, deleted=True)
         db.commit()
+        IdentitySecurity.forget_user(user)
@@ -0,0 +1,46 @@
+from typing import Iterable, Literal
+
+from sqlalchemy.dialects.sqlite import insert
+from sqlmodel import Session, select
+
+from buddy.src.models import CollectionVersion
+
+Collection = Literal["budgetexpense", "monthlyincome", "accountingexpense", "accountingincome"]
+
+
+def bump(collection: Collection, user_ids: Iterable[int], db: Session) -> None:
+    """
+    Increments the users' version of the collection. Doesn't commit, so that the version
+    changes in the same transaction as the rows.
+
+    Args:
+        collection: The collection that was written to
+        user_ids: The users whose rows changed
+        db: The database session
+    """
+    users: set[int] = set(user_ids)
+    if len(users) == 0:
+        return
+
+    statement = insert(CollectionVersion)
+    statement = statement.on_conflict_do_update(
+        index_elements=["user_id", "collection"],
+        set_={"version": CollectionVersion.version + 1},
+    )
+    db.exec(  # type: ignore[call-overload]
+        statement,
+        params=[{"user_id": user_id, "collection": collection, "version": 1} for user_id in users],
+    )
+
+
+def get(user_id: int, collection: Collection, db: Session) -> int:
+    """
+    Returns:
+        int: The user's version of the collection. 0 if it was never written to
+    """
+    version: int | None = db.exec(
+        select(CollectionVersion.version)
+        .where(CollectionVersion.user_id == user_id)
+        .where(CollectionVersion.collection == collection)
+    ).first()
+    return version if version is not None else 0
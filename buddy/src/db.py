@@ -1,21 +1,250 @@
+import asyncio
 import os
-from typing import Callable, Generator
+import re
+from typing import Any, AsyncGenerator, AsyncIterator, Callable, Generator, Iterator, Sequence, TypeVar
+
+from sqlalchemy import Connection, Engine, event, inspect
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import Session as OrmSession
 from sqlmodel import create_engine, Session, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel.pool import StaticPool
-from buddy.src.models import User, UserRoles
+from sqlmodel.sql.expression import SelectOfScalar
+from starlette.concurrency import run_in_threadpool
+
+from buddy.src.data import accounting_summary_repo
+from buddy.src.data.search import create_search_indexes, rebuild_search_indexes
+from buddy.src.models import AccountingSummary, User, UserRoles
 from buddy.src.security import PasswordSecurity
 
+T = TypeVar("T")
+
+
+class Database:
+    """
+    Runs repository functions against either a sync or an async session.
+
+    Every repository function takes the session as its `db` keyword argument. With a sync
+    session the function runs on the threadpool like a sync endpoint would. With an async
+    session the same function runs through AsyncSession.run_sync(), so the database IO is
+    awaited on the event loop and no thread is held while waiting on it.
+    """
+
+    def __init__(self, session: Session | AsyncSession) -> None:
+        self.session: Session | AsyncSession = session
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Args:
+            func: The repository function to call
+            *args: Positional arguments for the function
+            **kwargs: Keyword arguments for the function, excluding `db`
+
+        Returns:
+            The return value of the function
+        """
+        if isinstance(self.session, AsyncSession):
+            return await self.session.run_sync(lambda session: func(*args, db=session, **kwargs))
+        return await run_in_threadpool(func, *args, db=self.session, **kwargs)
+
+    async def stream(self, statement: SelectOfScalar[T], batch_size: int = 1000) -> AsyncIterator[Sequence[T]]:
+        """
+        Runs the query with a server side cursor and yields the rows in batches, so that only
+        one batch is held in memory at a time.
+
+        The rows are read on a new session from the same engine, because the request's session
+        is closed as soon as the endpoint returns, before a streaming response is sent.
+
+        Args:
+            statement: The query to run
+            batch_size: The number of rows to fetch at a time
+
+        Yields:
+            Sequence: The next batch of rows
+        """
+        statement = statement.execution_options(yield_per=batch_size)
+        if isinstance(self.session, AsyncSession):
+            async with AsyncSession(self.session.bind, expire_on_commit=False) as async_session:
+                result = await async_session.stream_scalars(statement)
+                async for batch in result.partitions():
+                    yield batch
+            return
+
+        sync_session: Session = Session(self.session.bind)
+        try:
+            batches: Iterator[Sequence[T]] = (await run_in_threadpool(sync_session.exec, statement)).partitions()
+            while (rows := await run_in_threadpool(next, batches, None)) is not None:
+                yield rows
+        finally:
+            await run_in_threadpool(sync_session.close)
+
+
+class _SqliteSettings:
+    pragma_names: tuple[str, ...] = (
+        "journal_mode",
+        "synchronous",
+        "cache_size",
+        "mmap_size",
+        "temp_store",
+        "busy_timeout",
+    )
+    profiles: dict[str, dict[str, str]] = {
+        "default": {},
+        "production": {
+            "journal_mode": "WAL",  # readers don't block behind writers
+            "synchronous": "NORMAL",  # durable in WAL mode except on power loss
+            "cache_size": "-65536",  # 64 MiB page cache per connection
+            "mmap_size": "268435456",  # 256 MiB memory mapped reads
+            "temp_store": "MEMORY",
+            "busy_timeout": "5000",  # wait for the write lock instead of failing immediately
+        },
+    }
+    pool_defaults: dict[str, dict[str, int]] = {
+        "default": {},
+        "production": {"pool_size": 20, "max_overflow": 10, "pool_timeout": 30},
+    }
+
+
+def _sqlite_profile() -> tuple[dict[str, str], dict[str, int]]:
+    """
+    Reads the connection profile from the environment. SQLITE_PROFILE picks the base
+    profile, and SQLITE_<PRAGMA> and DB_POOL_SIZE/DB_MAX_OVERFLOW/DB_POOL_TIMEOUT
+    override individual settings.
+
+    Returns:
+        tuple[dict[str, str], dict[str, int]]: The pragmas to set on every connection
+            and the keyword arguments for sizing the connection pool
+    """
+    profile: str = os.getenv("SQLITE_PROFILE", "default")
+    if profile not in _SqliteSettings.profiles:
+        raise RuntimeError(f"SQLITE_PROFILE must be one of {list(_SqliteSettings.profiles)}")
+
+    pragmas: dict[str, str] = dict(_SqliteSettings.profiles[profile])
+    for name in _SqliteSettings.pragma_names:
+        value: str | None = os.getenv(f"SQLITE_{name.upper()}")
+        if value is not None:
+            pragmas[name] = value
+    for name, value in pragmas.items():
+        if re.fullmatch(r"-?[A-Za-z0-9]+", value) is None:
+            raise RuntimeError(f"Invalid value for SQLite pragma '{name}': '{value}'")
+
+    pool: dict[str, int] = dict(_SqliteSettings.pool_defaults[profile])
+    for name in ["pool_size", "max_overflow", "pool_timeout"]:
+        value = os.getenv(f"DB_{name.upper()}")
+        if value is not None:
+            pool[name] = int(value)
+
+    return pragmas, pool
+
+
+def _set_pragmas_on_connect(engine: Engine, pragmas: dict[str, str]) -> None:
+    if len(pragmas) == 0:
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection: Any, _: Any) -> None:
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def create_schema(connection: Connection) -> None:
+    """
+    Creates missing tables, then any indexes that are declared on the models but missing
+    from existing tables. create_all() alone only creates indexes along with new tables, so
+    this is how databases created by older versions pick up new indexes. Also sets up the
+    full-text search indexes, and fills the monthly summary table when it's first created.
+
+    Args:
+        connection (Connection): The connection to create the schema with
+    """
+    summary_exists: bool = inspect(connection).has_table(AccountingSummary.__tablename__)  # type: ignore[arg-type]
+    SQLModel.metadata.create_all(connection)
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+    create_search_indexes(connection)
+
+    if not summary_exists:
+        with Session(connection, join_transaction_mode="create_savepoint") as session:
+            accounting_summary_repo.rebuild(session)
+
+
+def create_database() -> None:
+    """
+    Creates the schema of the database at DB_URI
+    """
+    DB_URI: str|None = os.getenv("DB_URI")
+    if DB_URI is None:
+        raise RuntimeError("DB_URI is not an environment variable")
+
+    engine = create_engine(DB_URI)
+    with engine.begin() as connection:
+        create_schema(connection)
+    engine.dispose()
+
+
+def rebuild_accounting_summary() -> None:
+    """
+    Recomputes the monthly summary table of the database at DB_URI from its accounting rows
+    """
+    DB_URI: str|None = os.getenv("DB_URI")
+    if DB_URI is None:
+        raise RuntimeError("DB_URI is not an environment variable")
+
+    engine = create_engine(DB_URI)
+    with engine.begin() as connection:
+        create_schema(connection)
+    with Session(engine) as session:
+        accounting_summary_repo.rebuild(session)
+
+
+def vacuum_database() -> None:
+    """
+    Runs VACUUM on the database at DB_URI, then rebuilds the full-text search indexes, which
+    refer to rows by rowid. VACUUM may renumber the rowids of tables without an INTEGER
+    PRIMARY KEY, which is every searchable table
+    """
+    DB_URI: str|None = os.getenv("DB_URI")
+    if DB_URI is None:
+        raise RuntimeError("DB_URI is not an environment variable")
+
+    engine = create_engine(DB_URI)
+    with engine.begin() as connection:
+        create_schema(connection)
+    # VACUUM can't run inside a transaction
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.exec_driver_sql("VACUUM")
+    with engine.begin() as connection:
+        rebuild_search_indexes(connection)
+    engine.dispose()
+
+
+def _seed_users(db: OrmSession) -> None:
+    # AsyncSession.run_sync() passes a plain SQLAlchemy session
+    db.add(User(username="admin", password=PasswordSecurity.hash("admin"), role=UserRoles.admin))
+    db.add(User(username="user1", password=PasswordSecurity.hash("password"), role=UserRoles.user))
+    db.add(User(username="user2", password=PasswordSecurity.hash("password"), role=UserRoles.user))
+    db.add(User(username="user3", password=PasswordSecurity.hash("password"), role=UserRoles.user))
+    db.add(User(username="inactiveuser", password=PasswordSecurity.hash("password"), role=UserRoles.inactive))
+    db.commit()
+
+
 def start_sqlite_session() -> Callable[[], Generator[Session, None, None]]:
     DB_URI: str|None = os.getenv("DB_URI")
     if DB_URI is None:
         raise RuntimeError("DB_URI is not an environment variable")
 
-    engine = create_engine(DB_URI, connect_args={"check_same_thread": False})
-    SQLModel.metadata.create_all(engine)
+    pragmas, pool = _sqlite_profile()
+    engine = create_engine(DB_URI, connect_args={"check_same_thread": False}, **pool)
+    _set_pragmas_on_connect(engine, pragmas)
+    with engine.begin() as connection:
+        create_schema(connection)
 
     def get_session() -> Generator[Session, None, None]:
         with Session(engine) as session:
-            yield session 
+            yield session
 
     return get_session
 
@@ -24,18 +253,64 @@ def start_inmemory_session() -> Callable[[], Generator[Session, None, None]]:
     db_uri = "sqlite://"
 
     engine = create_engine(db_uri, connect_args={"check_same_thread": False}, poolclass=StaticPool)
-    SQLModel.metadata.create_all(engine)
+    with engine.begin() as connection:
+        create_schema(connection)
 
     with Session(engine) as session:
-        session.add(User(username="admin", password=PasswordSecurity.hash("admin"), role=UserRoles.admin))
-        session.add(User(username="user1", password=PasswordSecurity.hash("password"), role=UserRoles.user))
-        session.add(User(username="user2", password=PasswordSecurity.hash("password"), role=UserRoles.user))
-        session.add(User(username="user3", password=PasswordSecurity.hash("password"), role=UserRoles.user))
-        session.add(User(username="inactiveuser", password=PasswordSecurity.hash("password"), role=UserRoles.inactive))
-        session.commit()
+        _seed_users(session)
 
     def get_session() -> Generator[Session, None, None]:
         with Session(engine) as session:
             yield session
 
     return get_session
+
+
+def start_async_sqlite_session() -> Callable[[], AsyncGenerator[AsyncSession, None]]:
+    DB_URI: str|None = os.getenv("DB_URI")
+    if DB_URI is None:
+        raise RuntimeError("DB_URI is not an environment variable")
+
+    pragmas, pool = _sqlite_profile()
+    engine = create_async_engine(DB_URI.replace("sqlite://", "sqlite+aiosqlite://", 1), **pool)
+    _set_pragmas_on_connect(engine.sync_engine, pragmas)
+    initialized = asyncio.Event()
+    lock = asyncio.Lock()
+
+    async def get_session() -> AsyncGenerator[AsyncSession, None]:
+        # the engine can only be used once an event loop is running, so the
+        # tables are created on the first request instead of at import time
+        if not initialized.is_set():
+            async with lock:
+                if not initialized.is_set():
+                    async with engine.begin() as connection:
+                        await connection.run_sync(create_schema)
+                    initialized.set()
+
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            yield session
+
+    return get_session
+
+
+def start_async_inmemory_session() -> Callable[[], AsyncGenerator[AsyncSession, None]]:
+    db_uri = "sqlite+aiosqlite://"
+
+    engine = create_async_engine(db_uri, poolclass=StaticPool)
+    initialized = asyncio.Event()
+    lock = asyncio.Lock()
+
+    async def get_session() -> AsyncGenerator[AsyncSession, None]:
+        if not initialized.is_set():
+            async with lock:
+                if not initialized.is_set():
+                    async with engine.begin() as connection:
+                        await connection.run_sync(create_schema)
+                    async with AsyncSession(engine) as session:
+                        await session.run_sync(_seed_users)
+                    initialized.set()
+
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            yield session
+
+    return get_session
@@ -1,33 +1,91 @@
 import os as _os
-from typing import Callable, Generator
+from contextlib import asynccontextmanager as _asynccontextmanager, contextmanager as _contextmanager
+from typing import AsyncGenerator, AsyncIterator, Callable, Generator
 
-from fastapi import Depends as _Depends, HTTPException as _HTTPException, status as _status
+from fastapi import Depends as _Depends, Header as _Header, HTTPException as _HTTPException, Query as _Query, status as _status
 from fastapi.security import OAuth2PasswordBearer as _OAuth2PasswordBearer
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from buddy.src import db as _db
+from buddy.src import db as _db, ndjson as _ndjson
+from buddy.src.data import pagination as _pagination
 from buddy.src.models import User as _User, UserRoles as _UserRoles
 from buddy.src.security import IdentitySecurity as _IdentitySecurity
 
-session: Callable[[], Generator[Session, None, None]]
+_db_mode: str = _os.getenv("DB_MODE", "sync")
+if _db_mode != "sync" and _db_mode != "async":
+    raise RuntimeError("DB_MODE must be 'sync' or 'async'")
+_async_db: bool = _db_mode == "async"
+
+session: Callable[[], Generator[Session, None, None]] | Callable[[], AsyncGenerator[AsyncSession, None]]
 if _os.getenv("APPLICATION_ENV") == "dev":
-    session = _db.start_inmemory_session()
+    session = _db.start_async_inmemory_session() if _async_db else _db.start_inmemory_session()
 elif _os.getenv("APPLICATION_ENV") == "prod":
-    session = _db.start_sqlite_session()
+    session = _db.start_async_sqlite_session() if _async_db else _db.start_sqlite_session()
 else:
     raise RuntimeError("APPLICATION_ENV must be 'dev' or 'prod'")
 
 oath2_scheme = _OAuth2PasswordBearer(tokenUrl="token")
 
 
-def get_current_user(
-    token: str = _Depends(oath2_scheme), db: Session = _Depends(session)
+async def database(db: Session | AsyncSession = _Depends(session)) -> _db.Database:
+    """
+    Returns:
+        Database: the request's database session, usable from async endpoints
+    """
+    return _db.Database(db)
+
+
+@_asynccontextmanager
+async def open_database() -> AsyncIterator[_db.Database]:
+    """
+    Returns:
+        Database: a session like database() returns, for background tasks that run outside of a request
+    """
+    if _async_db:
+        async with _asynccontextmanager(session)() as async_db:  # type: ignore[arg-type]
+            yield _db.Database(async_db)
+    else:
+        with _contextmanager(session)() as sync_db:  # type: ignore[arg-type]
+            yield _db.Database(sync_db)
+
+
+async def page(
+    limit: int | None = _Query(default=None, ge=1, le=1000),
+    cursor: str | None = _Query(default=None),
+) -> _pagination.Page:
+    """
+    Returns:
+        Page: the page requested by the 'limit' and 'cursor' query parameters. The cursor
+            for the next page is returned in the X-Next-Cursor header
+    """
+    try:
+        after: list | None = _pagination.decode_cursor(cursor) if cursor is not None else None
+    except _pagination.InvalidCursorError as error:
+        raise _HTTPException(
+            status_code=_status.HTTP_400_BAD_REQUEST,
+            detail=str(error),
+        )
+    return _pagination.Page(limit=limit, after=after)
+
+
+async def wants_ndjson(accept: str | None = _Header(default=None)) -> bool:
+    """
+    Returns:
+        bool: whether the client asked for every row as an NDJSON stream with
+            'Accept: application/x-ndjson'. Streams aren't paginated
+    """
+    return accept is not None and _ndjson.media_type in accept
+
+
+async def get_current_user(
+    token: str = _Depends(oath2_scheme), db: _db.Database = _Depends(database)
 ) -> _User:
     """
     Returns:
         User: the current user from the 'Authorization: Bearer ...' header
     """
-    user: _User | None = _IdentitySecurity.get_user_from_jwt(token, db)
+    user: _User | None = await db.run(_IdentitySecurity.get_user_from_jwt, token)
 
     if user is None:
         raise _HTTPException(
@@ -39,7 +97,7 @@ def get_current_user(
     return user
 
 
-def get_admin(user: _User = _Depends(get_current_user)) -> _User:
+async def get_admin(user: _User = _Depends(get_current_user)) -> _User:
     """
     Returns:
         User: the user if the JWT token comes from an admin
@@ -52,7 +110,7 @@ def get_admin(user: _User = _Depends(get_current_user)) -> _User:
     return user
 
 
-def get_user_or_admin(user: _User = _Depends(get_current_user)) -> _User:
+async def get_user_or_admin(user: _User = _Depends(get_current_user)) -> _User:
     """
     Returns:
         User: the user if the JWT token comes from an admin or user (i.e. not an inactive user)
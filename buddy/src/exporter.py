@@ -0,0 +1,80 @@
+import csv
+import io
+import json
+import zlib
+from typing import Any, AsyncIterator, Literal, Sequence
+
+from sqlmodel import SQLModel
+from sqlmodel.sql.expression import SelectOfScalar
+
+from buddy.src import ndjson
+from buddy.src.data import BudgetExpenseRepository, MonthlyIncomeRepository, accounting_expense_repo, accounting_income_repo
+from buddy.src.db import Database
+
+Format = Literal["csv", "ndjson"]
+
+media_types: dict[str, str] = {"csv": "text/csv", "ndjson": ndjson.media_type}
+csv_columns: tuple[str, ...] = ("record", "type", "date", "amount", "description")
+
+
+async def _ledger(db: Database, user_id: int) -> AsyncIterator[tuple[str, Sequence[SQLModel]]]:
+    queries: list[tuple[str, SelectOfScalar[Any]]] = [
+        ("accounting_expense", accounting_expense_repo.stream_by_user_id(user_id)),
+        ("accounting_income", accounting_income_repo.stream_by_user_id(user_id)),
+        ("budget_expense", BudgetExpenseRepository.stream_expenses_by_user_id(user_id)),
+        ("monthly_income", MonthlyIncomeRepository.stream_by_user_id(user_id)),
+    ]
+    for record, statement in queries:
+        async for batch in db.stream(statement):
+            yield record, batch
+
+
+def _csv_row(record: str, row: dict[str, Any]) -> list[Any]:
+    row_type: str = row["expense_type"] if "expense_type" in row else row["income_type"]
+    return [record, row_type, row.get("date", ""), row["amount"], row.get("description") or ""]
+
+
+async def _csv(db: Database, user_id: int) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(csv_columns)
+    yield buffer.getvalue()
+
+    async for record, batch in _ledger(db, user_id):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(_csv_row(record, row.model_dump(mode="json")) for row in batch)
+        yield buffer.getvalue()
+
+
+async def _ndjson(db: Database, user_id: int) -> AsyncIterator[str]:
+    async for record, batch in _ledger(db, user_id):
+        yield "".join(json.dumps({"record": record, **row.model_dump(mode="json")}) + "\n" for row in batch)
+
+
+async def ledger(db: Database, user_id: int, format: Format, gzip: bool) -> AsyncIterator[bytes]:
+    """
+    Streams all of the user's accounting expenses, accounting income, budget expenses and
+    monthly income, reading one batch of rows from the database at a time
+
+    Args:
+        db: The database
+        user_id: The user to export
+        format: 'csv' for one row per record with the columns in csv_columns, or
+            'ndjson' for one JSON object per record
+        gzip: Whether to gzip the stream
+
+    Yields:
+        bytes: The next part of the file
+    """
+    chunks: AsyncIterator[str] = _csv(db, user_id) if format == "csv" else _ndjson(db, user_id)
+    if not gzip:
+        async for chunk in chunks:
+            yield chunk.encode()
+        return
+
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)  # gzip container
+    async for chunk in chunks:
+        # flush every batch so the client receives it instead of waiting for the compressor's buffer to fill
+        yield compressor.compress(chunk.encode()) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
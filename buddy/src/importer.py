@@ -0,0 +1,163 @@
+import codecs
+import csv
+import json
+from typing import Any, AsyncIterator, Callable, Sequence, TypeVar
+
+from pydantic import ValidationError
+
+from buddy.dtos import ImportReport, ImportRowReport
+from buddy.src import ndjson
+from buddy.src.db import Database
+
+T = TypeVar("T")
+
+csv_media_type: str = "text/csv"
+media_types: tuple[str, ...] = (csv_media_type, ndjson.media_type)
+
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    partial_line: bytes = b""
+    started: bool = False
+    async for chunk in chunks:
+        partial_line += chunk
+        if not started:
+            # spreadsheet programs start their UTF-8 exports with a byte order mark
+            if len(partial_line) < len(codecs.BOM_UTF8) and codecs.BOM_UTF8.startswith(partial_line):
+                continue
+            partial_line = partial_line.removeprefix(codecs.BOM_UTF8)
+            started = True
+        *lines, partial_line = partial_line.split(b"\n")
+        for line in lines:
+            yield line.decode(errors="replace").rstrip("\r")
+    if partial_line != b"":
+        yield partial_line.decode(errors="replace").rstrip("\r")
+
+
+async def _csv_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, dict[str, Any] | str]]:
+    header: list[str] | None = None
+    row: int = 0
+    record_lines: list[str] = []
+    quotes: int = 0
+    async for line in _lines(chunks):
+        # a quoted field can contain newlines, so a record only ends once its quotes are balanced
+        record_lines.append(line)
+        quotes += line.count('"')
+        if quotes % 2 == 1:
+            continue
+        record: str = "\n".join(record_lines)
+        record_lines, quotes = [], 0
+        if record.strip() == "":
+            continue
+
+        values: list[str] = next(csv.reader([record]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+
+        row += 1
+        if len(values) != len(header):
+            yield row, f"Expected {len(header)} columns but found {len(values)}"
+        else:
+            yield row, dict(zip(header, values))
+
+    if len(record_lines) > 0:
+        yield row + 1, "Unterminated quoted field"
+
+
+async def _ndjson_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, dict[str, Any] | str]]:
+    row: int = 0
+    async for line in _lines(chunks):
+        if line.strip() == "":
+            continue
+
+        row += 1
+        try:
+            record: Any = json.loads(line)
+        except ValueError:
+            yield row, "Invalid JSON"
+            continue
+        if not isinstance(record, dict):
+            yield row, "Expected a JSON object"
+        else:
+            yield row, record
+
+
+def records(chunks: AsyncIterator[bytes], media_type: str) -> AsyncIterator[tuple[int, dict[str, Any] | str]]:
+    """
+    Parses the rows of a CSV file with a header row, or of an NDJSON file, as the bytes arrive
+
+    Args:
+        chunks: The request body
+        media_type: Either 'text/csv' or 'application/x-ndjson'
+
+    Returns:
+        The row number and either the row's fields or a description of why it couldn't be parsed
+    """
+    if media_type == csv_media_type:
+        return _csv_records(chunks)
+    if media_type == ndjson.media_type:
+        return _ndjson_records(chunks)
+    raise ValueError(f"Can't import '{media_type}'")
+
+
+async def import_rows(
+    rows: AsyncIterator[tuple[int, dict[str, Any] | str]],
+    parse: Callable[[dict[str, Any]], T],
+    create_many: Callable[..., Sequence[bool]],
+    db: Database,
+    batch_size: int = 500,
+) -> ImportReport:
+    """
+    Validates the rows and inserts them in batches, each in its own transaction
+
+    Args:
+        rows: The parsed rows, from records()
+        parse: Converts a row's fields to a new model. Raises ValueError if they're invalid
+        create_many: The repository function that inserts a batch of models
+        db: The database
+        batch_size: The number of rows to insert per transaction
+
+    Returns:
+        ImportReport: The number of rows created, and the rows that were duplicates or errors
+    """
+    report = ImportReport(created=0, duplicates=0, errors=0, rows=[])
+    batch: list[T] = []
+    batch_rows: list[int] = []
+
+    async def flush() -> None:
+        created: Sequence[bool] = await db.run(create_many, batch)
+        for row, was_created in zip(batch_rows, created):
+            if was_created:
+                report.created += 1
+            else:
+                report.duplicates += 1
+                report.rows.append(ImportRowReport(row=row, status="duplicate", detail=None))
+        batch.clear()
+        batch_rows.clear()
+
+    async for row, fields in rows:
+        if isinstance(fields, str):
+            report.errors += 1
+            report.rows.append(ImportRowReport(row=row, status="error", detail=fields))
+            continue
+
+        try:
+            batch.append(parse(fields))
+        except ValidationError as error:
+            report.errors += 1
+            invalid_fields: str = ", ".join(dict.fromkeys(str(detail["loc"][0]) for detail in error.errors()))
+            report.rows.append(ImportRowReport(row=row, status="error", detail=f"Missing or invalid {invalid_fields}"))
+            continue
+        except ValueError as error:
+            report.errors += 1
+            report.rows.append(ImportRowReport(row=row, status="error", detail=str(error)))
+            continue
+
+        batch_rows.append(row)
+        if len(batch) >= batch_size:
+            await flush()
+
+    if len(batch) > 0:
+        await flush()
+    report.rows.sort(key=lambda row_report: row_report.row)
+    return report
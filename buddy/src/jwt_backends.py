@@ -0,0 +1,108 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import time
+from datetime import datetime
+from typing import Any, Protocol
+
+from jose import JWTError, jwt
+
+
+class InvalidTokenError(ValueError):
+    pass
+
+
+class JwtBackend(Protocol):
+    def encode(self, claims: dict[str, Any], key: str) -> str:
+        ...
+
+    def decode(self, token: str, key: str) -> dict[str, Any]:
+        """
+        Verifies the HS256 signature and the 'exp' claim
+
+        Raises:
+            InvalidTokenError: if the token is malformed, the signature doesn't match or the token has expired
+        """
+        ...
+
+
+class JoseBackend:
+    """
+    HS256 through python-jose
+    """
+
+    def encode(self, claims: dict[str, Any], key: str) -> str:
+        return jwt.encode(claims, key, algorithm="HS256")
+
+    def decode(self, token: str, key: str) -> dict[str, Any]:
+        try:
+            return jwt.decode(token, key, algorithms=["HS256"])
+        except JWTError as error:
+            raise InvalidTokenError(str(error))
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+class StdlibBackend:
+    """
+    HS256 with hmac and hashlib only. Only supports what IdentitySecurity needs: HS256
+    signatures and the 'exp' claim, with no leeway
+    """
+
+    _header: str = _b64encode(json.dumps({"alg": "HS256", "typ": "JWT"}, separators=(",", ":")).encode())
+
+    def encode(self, claims: dict[str, Any], key: str) -> str:
+        payload: dict[str, Any] = {
+            name: int(value.timestamp()) if isinstance(value, datetime) else value
+            for name, value in claims.items()
+        }
+        signing_input: str = self._header + "." + _b64encode(json.dumps(payload, separators=(",", ":")).encode())
+        signature: bytes = hmac.new(key.encode(), signing_input.encode(), hashlib.sha256).digest()
+        return signing_input + "." + _b64encode(signature)
+
+    def decode(self, token: str, key: str) -> dict[str, Any]:
+        try:
+            signing_input, _, signature = token.rpartition(".")
+            encoded_header, _, encoded_payload = signing_input.partition(".")
+            expected: bytes = hmac.new(key.encode(), signing_input.encode("ascii"), hashlib.sha256).digest()
+            if not hmac.compare_digest(expected, _b64decode(signature)):
+                raise InvalidTokenError("Signature verification failed")
+
+            header: Any = json.loads(_b64decode(encoded_header))
+            payload: Any = json.loads(_b64decode(encoded_payload))
+        except InvalidTokenError:
+            raise
+        except ValueError:  # also covers base64, JSON and non-ASCII errors
+            raise InvalidTokenError("Malformed token")
+
+        if not isinstance(header, dict) or header.get("alg") != "HS256" or not isinstance(payload, dict):
+            raise InvalidTokenError("Malformed token")
+        exp: Any = payload.get("exp")
+        if exp is not None:
+            if not isinstance(exp, (int, float)):
+                raise InvalidTokenError("Expiration Time claim (exp) must be an integer.")
+            if exp < time.time():
+                raise InvalidTokenError("Signature has expired.")
+        return payload
+
+
+backends: dict[str, type[JwtBackend]] = {"jose": JoseBackend, "stdlib": StdlibBackend}
+
+
+def from_env() -> JwtBackend:
+    """
+    Returns:
+        JwtBackend: the backend named by JWT_BACKEND, python-jose by default
+    """
+    name: str = os.getenv("JWT_BACKEND", "jose")
+    if name not in backends:
+        raise RuntimeError(f"JWT_BACKEND must be one of {', '.join(repr(backend) for backend in backends)}")
+    return backends[name]()
@@ -0,0 +1,84 @@
+import logging
+import os
+from typing import Any
+
+import uvicorn
+
+_loops: tuple[str, ...] = ("uvloop", "asyncio")
+_http_protocols: tuple[str, ...] = ("httptools", "h11")
+# rate limit backends that hold across workers. The 'local' buckets are per process
+_multi_worker_rate_limits: tuple[str, ...] = ("manager", "none")
+
+
+def _int(variable: str, default: int | None) -> int | None:
+    value: str | None = os.getenv(variable)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise RuntimeError(f"{variable} must be an integer")
+
+
+def _choice(variable: str, choices: tuple[str, ...]) -> str:
+    value: str = os.getenv(variable, choices[0])
+    if value not in choices:
+        raise RuntimeError(f"{variable} must be one of {', '.join(repr(choice) for choice in choices)}")
+    return value
+
+
+def _workers() -> int:
+    shared: bool = os.getenv("RATE_LIMIT_BACKEND", "local") in _multi_worker_rate_limits
+    if not shared and os.getenv("SERVER_WORKERS") is None:
+        logging.getLogger(__name__).warning(
+            "Starting 1 worker, since RATE_LIMIT_BACKEND='local' counts logins per process. "
+            "Set RATE_LIMIT_BACKEND='manager' to start one per CPU"
+        )
+    workers: int | None = _int("SERVER_WORKERS", (os.cpu_count() or 1) if shared else 1)
+    assert workers is not None
+    if workers > 1 and not shared:
+        raise RuntimeError(
+            "SERVER_WORKERS above 1 needs RATE_LIMIT_BACKEND='manager', since every worker "
+            "would count logins in its own buckets"
+        )
+    return workers
+
+
+def server_options() -> dict[str, Any]:
+    """
+    Reads the production server settings from the environment
+
+    Returns:
+        dict[str, Any]: Keyword arguments for uvicorn.run()
+    """
+    options: dict[str, Any] = {
+        "workers": _workers(),
+        "loop": _choice("SERVER_LOOP", _loops),
+        "http": _choice("SERVER_HTTP", _http_protocols),
+        "limit_concurrency": _int("SERVER_LIMIT_CONCURRENCY", None),
+        "backlog": _int("SERVER_BACKLOG", 2048),
+        "timeout_keep_alive": _int("SERVER_KEEP_ALIVE_SECONDS", 5),
+        "log_level": os.getenv("SERVER_LOG_LEVEL", "info"),
+    }
+    uds: str | None = os.getenv("SERVER_UDS")
+    if uds is not None:
+        options["uds"] = uds
+        # connections over the socket have no client address, so uvicorn only reads
+        # X-Forwarded-For from them when every peer is trusted. Only the proxy can reach the socket
+        options["forwarded_allow_ips"] = os.getenv("FORWARDED_ALLOW_IPS", "*")
+    else:
+        options["host"] = os.getenv("SERVER_HOST", "127.0.0.1")
+        options["port"] = _int("SERVER_PORT", 8000)
+    return options
+
+
+def run() -> None:
+    """
+    Creates the database schema, then serves the app with the options from server_options().
+    The schema is created once up front so that workers don't race to create it
+    """
+    options: dict[str, Any] = server_options()
+    if os.getenv("APPLICATION_ENV") == "prod":
+        from buddy.src.db import create_database
+        create_database()
+    uvicorn.run("buddy.src.main:app", reload=False, **options)
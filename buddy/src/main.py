@@ -3,15 +3,35 @@ import logging
 logging.getLogger("passlib").setLevel(logging.ERROR)
 
 import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
 
-from fastapi import Depends, FastAPI, Request
+from fastapi import Depends, FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
 
 from buddy.src import dependencies
+from buddy.src.responses import ORJSONResponse
+from buddy.src.data.pagination import InvalidCursorError
+from buddy.src.middleware import ContentSecurityPolicyMiddleware
 from buddy.src.models import User
-from buddy.src.routers import auth, users, budgeting, accounting
+from buddy.src.routers import auth, users, budgeting, accounting, metrics, reports
+from buddy.src.security import IdentitySecurity, PasswordSecurity
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    PasswordSecurity.start_executor()
+    # revocations are loaded before the sweeper starts, since the in-memory database
+    # shares one connection between sessions
+    await IdentitySecurity.start_revocation_refresh(dependencies.open_database)
+    IdentitySecurity.start_sweeper(dependencies.open_database)
+    yield
+    await IdentitySecurity.stop_revocation_refresh()
+    await IdentitySecurity.stop_sweeper()
+    PasswordSecurity.shutdown_executor()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 _allow_origins: str | None = os.getenv("ALLOW_ORIGINS")
 app.add_middleware(
@@ -24,29 +44,23 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
+app.add_middleware(ContentSecurityPolicyMiddleware)
 
 
-@app.middleware("http")
-async def add_csp_header(request: Request, call_next):
-    response = await call_next(request)
-
-    inline_docs_script_hash = "sha256-QOOQu4W1oxGqd2nbXbxiA1Di6OHQOLQD+o+G9oWL8YY="  # for the inline script at /docs
-    default_src = "default-src 'self';"
-    script_src = f"script-src 'self' https://cdn.jsdelivr.net/npm/swagger-ui-dist@5/swagger-ui-bundle.js '{inline_docs_script_hash}';"
-    style_src = "style-src 'self' https://cdn.jsdelivr.net/npm/swagger-ui-dist@5/swagger-ui.css;"
-    img_src = "img-src 'self' https://fastapi.tiangolo.com/img/favicon.png;"
-
-    response.headers["Content-Security-Policy"] = (
-        f"{default_src}{script_src}{style_src}{img_src}"
-    )
-    return response
+@app.exception_handler(InvalidCursorError)
+async def invalid_cursor(request: Request, error: InvalidCursorError) -> ORJSONResponse:
+    # cursors that decode but don't fit the endpoint's sort key are only caught by the repository
+    return ORJSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content={"detail": str(error)})
 
 
 app.include_router(auth.router)
 app.include_router(users.router)
 app.include_router(budgeting.router)
 app.include_router(accounting.router)
+app.include_router(metrics.router)
+app.include_router(reports.router)
 
 
 @app.get("/")
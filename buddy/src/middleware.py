@@ -0,0 +1,39 @@
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+_inline_docs_script_hash: str = "sha256-QOOQu4W1oxGqd2nbXbxiA1Di6OHQOLQD+o+G9oWL8YY="  # for the inline script at /docs
+
+content_security_policy: str = (
+    "default-src 'self';"
+    f"script-src 'self' https://cdn.jsdelivr.net/npm/swagger-ui-dist@5/swagger-ui-bundle.js '{_inline_docs_script_hash}';"
+    "style-src 'self' https://cdn.jsdelivr.net/npm/swagger-ui-dist@5/swagger-ui.css;"
+    "img-src 'self' https://fastapi.tiangolo.com/img/favicon.png;"
+)
+
+
+class ContentSecurityPolicyMiddleware:
+    """
+    Sets the Content-Security-Policy header on every HTTP response. The header is encoded once,
+    and is added to the response start message as it's sent, so streaming responses get it too.
+    """
+
+    _name: bytes = b"content-security-policy"
+
+    def __init__(self, app: ASGIApp, policy: str = content_security_policy) -> None:
+        self.app: ASGIApp = app
+        self._header: tuple[bytes, bytes] = (self._name, policy.encode("latin-1"))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_header(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers: list[tuple[bytes, bytes]] = [
+                    header for header in message.get("headers", []) if header[0].lower() != self._name
+                ]
+                headers.append(self._header)
+                message["headers"] = headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_header)
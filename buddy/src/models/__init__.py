@@ -1,6 +1,8 @@
 from buddy.src.models.user import User, UserRoles
-from buddy.src.models.tokens import RefreshToken, convert_expiry_to_utc
+from buddy.src.models.tokens import RefreshToken, TokenRevocation, convert_expiry_to_utc
 from buddy.src.models.budget_expense import BudgetExpense
 from buddy.src.models.monthly_income import MonthlyIncome
 from buddy.src.models.accounting_expense import AccountingExpense
 from buddy.src.models.accounting_income import AccountingIncome
+from buddy.src.models.accounting_summary import AccountingSummary
+from buddy.src.models.collection_version import CollectionVersion
@@ -1,11 +1,14 @@
 import datetime
 from decimal import Decimal
+import sqlalchemy as sa
 from sqlmodel import SQLModel, Field
 
 class AccountingExpense(SQLModel, table=True): # type: ignore[call-arg]
     """
     Actual expense for a month
     """
+    __table_args__ = (sa.Index("ix_accountingexpense_user_id_date", "user_id", "date"),)
+
     expense_type: str = Field(primary_key=True)
     amount: Decimal = Field(default=0, decimal_places=2)
     description: str|None
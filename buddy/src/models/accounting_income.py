@@ -1,5 +1,6 @@
 import datetime
 from decimal import Decimal
+import sqlalchemy as sa
 from sqlmodel import SQLModel, Field
 
 
@@ -7,6 +8,8 @@ class AccountingIncome(SQLModel, table=True): # type: ignore[call-arg]
     """
     Actual income for a month
     """
+    __table_args__ = (sa.Index("ix_accountingincome_user_id_date", "user_id", "date"),)
+
     income_type: str = Field(primary_key=True)
     date: datetime.date = Field(primary_key=True, default_factory=lambda : datetime.date.today())
     user_id: int = Field(primary_key=True, foreign_key="user.id")
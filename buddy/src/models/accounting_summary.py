@@ -0,0 +1,16 @@
+from decimal import Decimal
+from typing import Literal
+
+from sqlmodel import AutoString, SQLModel, Field
+
+
+class AccountingSummary(SQLModel, table=True): # type: ignore[call-arg]
+    """
+    Running totals of a user's accounting expenses or income, per month and type
+    """
+    user_id: int = Field(primary_key=True, foreign_key="user.id")
+    month: str = Field(primary_key=True)  # YYYY-MM
+    kind: Literal["expense", "income"] = Field(primary_key=True, sa_type=AutoString)
+    category: str = Field(primary_key=True)  # the expense or income type
+    total: Decimal = Field(default=0, decimal_places=2)
+    entries: int = 0
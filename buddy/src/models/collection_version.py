@@ -0,0 +1,11 @@
+from sqlmodel import SQLModel, Field
+
+
+class CollectionVersion(SQLModel, table=True): # type: ignore[call-arg]
+    """
+    A counter per user and collection that every write to the collection increments, so that
+    list endpoints can tell whether anything changed without reading the rows
+    """
+    user_id: int = Field(primary_key=True, foreign_key="user.id")
+    collection: str = Field(primary_key=True)  # the table name
+    version: int = 0
@@ -14,12 +14,22 @@ def _create_timestamp() -> datetime:
 
 
 class RefreshToken(SQLModel, table=True):  # type: ignore[call-arg]
-    token: str = Field(primary_key=True)
+    # the SHA-256 hex digest of the token. The token itself is only ever sent to the client
+    token: str = Field(primary_key=True, max_length=64)
     expiry: datetime = Field(
-        sa_column=sa.Column(sa.DateTime(timezone=True), nullable=False),
+        sa_column=sa.Column(sa.DateTime(timezone=True), nullable=False, index=True),
         default_factory=_create_timestamp,
     )
-    user_id: int = Field(foreign_key="user.id")
+    user_id: int = Field(foreign_key="user.id", index=True)
+
+
+class TokenRevocation(SQLModel, table=True):  # type: ignore[call-arg]
+    # rows are only ever added, so that servers can catch up by reading the rows after the last ID they saw
+    id: int | None = Field(primary_key=True, default=None)
+    user_id: int = Field(index=True)  # not a foreign key, since deleted users are revoked too
+    # access tokens issued before this time, in milliseconds, are invalid. 0 only tells servers that the user changed
+    min_epoch: int
+    deleted: bool = False
 
 
 def convert_expiry_to_utc(refresh_token: RefreshToken) -> datetime:
@@ -11,6 +11,6 @@ class UserRoles(Enum):
 
 class User(SQLModel, table=True):  # type: ignore[call-arg]
     id: int | None = Field(primary_key=True, default=None)
-    username: str
+    username: str = Field(index=True, unique=True)
     password: str
     role: UserRoles
@@ -0,0 +1,27 @@
+from typing import AsyncIterator, Callable, Sequence, TypeVar
+
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+T = TypeVar("T")
+
+media_type: str = "application/x-ndjson"
+
+
+def response(batches: AsyncIterator[Sequence[T]], to_dto: Callable[[T], BaseModel]) -> StreamingResponse:
+    """
+    Streams rows as newline delimited JSON, one DTO per line. Each batch of rows is
+    serialized and sent before the next one is read.
+
+    Args:
+        batches: The rows, usually from Database.stream()
+        to_dto: Converts a row to the DTO that is sent
+
+    Returns:
+        StreamingResponse: The NDJSON response
+    """
+    async def lines() -> AsyncIterator[bytes]:
+        async for batch in batches:
+            yield b"".join(to_dto(row).model_dump_json().encode() + b"\n" for row in batch)
+
+    return StreamingResponse(lines(), media_type=media_type)
@@ -0,0 +1,268 @@
+import math
+import os
+import threading
+import time
+from typing import NamedTuple, Protocol
+
+from fastapi import HTTPException, Request, status
+
+from buddy.src import shared_state
+
+
+class Limit(NamedTuple):
+    """
+    A token bucket: it holds up to 'burst' tokens, one is taken per request, and it refills
+    completely over 'seconds'
+    """
+    burst: int
+    seconds: float
+
+
+# (bucket key, limit)
+Bucket = tuple[str, Limit]
+
+
+class TokenBuckets:
+    """
+    Thread-safe token buckets. A bucket is stored as the single time.monotonic() timestamp at
+    which it will be full again, and full buckets are dropped, so idle keys take no memory.
+    Sweeps run inline, every 'sweep_seconds' or once there are more than 'max_keys' buckets
+    """
+
+    def __init__(self, sweep_seconds: float, max_keys: int) -> None:
+        self.sweep_seconds: float = sweep_seconds
+        self.max_keys: int = max_keys
+        self.allowed: int = 0
+        self.rejected: int = 0
+        self.swept: int = 0
+        self.dropped: int = 0
+        self._full_at: dict[str, float] = {}
+        self._last_sweep: float = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self, buckets: list[Bucket]) -> float:
+        """
+        Takes a token from every bucket, or from none of them if any bucket is empty
+
+        Returns:
+            float: 0 if the tokens were taken; otherwise the number of seconds until they can be
+        """
+        now: float = time.monotonic()
+        with self._lock:
+            if now - self._last_sweep >= self.sweep_seconds or len(self._full_at) > self.max_keys:
+                self._sweep(now)
+
+            updates: dict[str, float] = {}
+            retry_after: float = 0
+            for key, limit in buckets:
+                interval: float = limit.seconds / limit.burst
+                full_at: float = max(self._full_at.get(key, now), now) + interval
+                # the bucket is empty once refilling it would take longer than refilling all of it
+                retry_after = max(retry_after, full_at - now - limit.seconds)
+                updates[key] = full_at
+
+            if retry_after > 0:
+                self.rejected += 1
+                return retry_after
+            self._full_at.update(updates)
+            self.allowed += 1
+            return 0
+
+    def give_back(self, buckets: list[Bucket]) -> None:
+        """
+        Returns the tokens that take() took, for requests that shouldn't count against the limits
+        """
+        now: float = time.monotonic()
+        with self._lock:
+            for key, limit in buckets:
+                full_at: float | None = self._full_at.get(key)
+                if full_at is None:
+                    continue
+                full_at -= limit.seconds / limit.burst
+                if full_at <= now:
+                    del self._full_at[key]
+                else:
+                    self._full_at[key] = full_at
+
+    def stats(self) -> dict[str, int]:
+        """
+        Returns:
+            dict[str, int]: The number of buckets that aren't full, and the request, sweep and drop counters
+        """
+        with self._lock:
+            return {
+                "buckets": len(self._full_at),
+                "allowed": self.allowed,
+                "rejected": self.rejected,
+                "swept": self.swept,
+                "dropped": self.dropped,
+            }
+
+    def _sweep(self, now: float) -> None:
+        # callers hold the lock
+        size: int = len(self._full_at)
+        self._full_at = {key: full_at for key, full_at in self._full_at.items() if full_at > now}
+        self.swept += size - len(self._full_at)
+        # still too many: drop the oldest buckets, which resets them
+        while len(self._full_at) > self.max_keys:
+            del self._full_at[next(iter(self._full_at))]
+            self.dropped += 1
+        self._last_sweep = now
+
+
+class RateLimitBackend(Protocol):
+    def take(self, buckets: list[Bucket]) -> float:
+        ...
+
+    def give_back(self, buckets: list[Bucket]) -> None:
+        ...
+
+    def stats(self) -> dict[str, int]:
+        ...
+
+
+def _sweep_seconds() -> float:
+    return float(os.getenv("RATE_LIMIT_SWEEP_SECONDS", "60"))
+
+
+def _max_keys() -> int:
+    return int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+
+
+class LocalBackend(TokenBuckets):
+    """
+    In-process buckets. Every worker process counts separately, so the effective limits are
+    multiplied by the number of workers
+    """
+
+    def __init__(self) -> None:
+        super().__init__(_sweep_seconds(), _max_keys())
+
+
+class ManagerBackend:
+    """
+    Buckets kept in the shared state process, so that the limits hold across workers. If the
+    process can't be reached, requests are let through
+    """
+
+    def __init__(self) -> None:
+        self._buckets: shared_state.SharedObject = shared_state.SharedObject("rate_limit")
+
+    def take(self, buckets: list[Bucket]) -> float:
+        return self._buckets.call("take", buckets) or 0
+
+    def give_back(self, buckets: list[Bucket]) -> None:
+        self._buckets.call("give_back", buckets)
+
+    def stats(self) -> dict[str, int]:
+        return {**(self._buckets.call("stats") or {}), "errors": self._buckets.errors}
+
+
+class DisabledBackend:
+    def take(self, buckets: list[Bucket]) -> float:
+        return 0
+
+    def give_back(self, buckets: list[Bucket]) -> None:
+        pass
+
+    def stats(self) -> dict[str, int]:
+        return {}
+
+
+backends: dict[str, type[RateLimitBackend]] = {"local": LocalBackend, "manager": ManagerBackend, "none": DisabledBackend}
+
+
+def from_env() -> RateLimitBackend:
+    """
+    Returns:
+        RateLimitBackend: the backend named by RATE_LIMIT_BACKEND, in-process buckets by default
+    """
+    name: str = os.getenv("RATE_LIMIT_BACKEND", "local")
+    if name not in backends:
+        raise RuntimeError(f"RATE_LIMIT_BACKEND must be one of {', '.join(repr(backend) for backend in backends)}")
+    return backends[name]()
+
+
+def _limit(variable: str, default: int) -> Limit | None:
+    burst: int = int(os.getenv(variable, str(default)))
+    return Limit(burst, float(os.getenv("RATE_LIMIT_WINDOW_SECONDS", "60"))) if burst > 0 else None
+
+
+_backend: RateLimitBackend = from_env()
+_login_per_ip: Limit | None = _limit("LOGIN_LIMIT_PER_IP", 20)
+_login_per_username: Limit | None = _limit("LOGIN_LIMIT_PER_USERNAME", 20)
+_login_per_client_username: Limit | None = _limit("LOGIN_LIMIT_PER_CLIENT_USERNAME", 5)
+_signup_per_ip: Limit | None = _limit("SIGNUP_LIMIT_PER_IP", 20)
+
+
+def shared_buckets() -> TokenBuckets:
+    """
+    Returns:
+        The buckets that the shared state process serves to ManagerBackend
+    """
+    return TokenBuckets(_sweep_seconds(), _max_keys())
+
+
+def _client(request: Request) -> str:
+    # behind a proxy, this is the forwarded address when uvicorn runs with --forwarded-allow-ips
+    return request.client.host if request.client is not None else "unknown"
+
+
+def _take(buckets: list[Bucket]) -> list[Bucket]:
+    if len(buckets) == 0:
+        return buckets
+    retry_after: float = _backend.take(buckets)
+    if retry_after > 0:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many attempts. Try again later",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+    return buckets
+
+
+def take_login(request: Request, username: str) -> list[Bucket]:
+    """
+    Counts a login attempt against the client's limit, the username's limit and the limit of
+    the username from that client. Called before the password is verified, so rejected attempts
+    cost no hashing. The per client bucket of the username is the smaller one, so that one client
+    runs out long before it can lock the user out everywhere else, while guesses spread across
+    many clients still run into the username's bucket
+
+    Returns:
+        list[Bucket]: The buckets to pass to give_back() if the login succeeds
+
+    Raises:
+        HTTPException: 429 if any of the limits is used up
+    """
+    buckets: list[Bucket] = []
+    if _login_per_ip is not None:
+        buckets.append((f"login:ip:{_client(request)}", _login_per_ip))
+    if _login_per_username is not None:
+        buckets.append((f"login:username:{username.lower()}", _login_per_username))
+    if _login_per_client_username is not None:
+        buckets.append((f"login:client-username:{_client(request)}:{username.lower()}", _login_per_client_username))
+    return _take(buckets)
+
+
+def take_signup(request: Request) -> None:
+    """
+    Counts a signup against the client's limit
+
+    Raises:
+        HTTPException: 429 if the limit is used up
+    """
+    if _signup_per_ip is not None:
+        _take([(f"signup:ip:{_client(request)}", _signup_per_ip)])
+
+
+def give_back(buckets: list[Bucket]) -> None:
+    """
+    Returns the tokens of a successful login, so that only failed attempts count against the limits
+    """
+    if len(buckets) > 0:
+        _backend.give_back(buckets)
+
+
+def stats() -> dict[str, int]:
+    return _backend.stats()
@@ -1,19 +1,49 @@
 from datetime import date, datetime
 from decimal import Decimal
-from typing import Iterable
+from typing import Any, Iterable
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 
 from buddy.dtos import (AccountingExpenseDto, AccountingIncomeDto,
-                        DeleteAccountingExpense, DeleteAccountingIncome,
-                        NewAccountingExpense, NewAccountingIncome)
-from buddy.src import dependencies
-from buddy.src.data import accounting_expense_repo, accounting_income_repo
+                        CategorySummaryDto, DeleteAccountingExpense,
+                        DeleteAccountingIncome, DeleteReport, ImportReport,
+                        MonthlySummaryDto, NewAccountingExpense,
+                        NewAccountingIncome)
+from buddy.src import dependencies, exporter, importer, ndjson, responses
+from buddy.src.data import (UserRepository, accounting_expense_repo,
+                            accounting_income_repo, accounting_summary_repo,
+                            pagination, version_repo)
+from buddy.src.db import Database
 from buddy.src.models import AccountingExpense, AccountingIncome, User
 
 router = APIRouter(prefix="/accounting", tags=["accounting"])
 
+_month_pattern: str = r"^\d{4}-(0[1-9]|1[0-2])$"  # YYYY-MM
+
+
+def _income_dto(income: AccountingIncome) -> AccountingIncomeDto:
+    return AccountingIncomeDto(
+        income_type=income.income_type,
+        amount=income.amount,
+        user_id=income.user_id,
+        date=income.date,
+    )
+
+
+def _expense_dto(expense: AccountingExpense) -> AccountingExpenseDto:
+    return AccountingExpenseDto(
+        expense_type=expense.expense_type,
+        amount=expense.amount,
+        description=expense.description,
+        user_id=expense.user_id,
+        date=expense.date,
+    )
+
+
+_income_list: responses.JSONList = responses.JSONList(AccountingIncomeDto)
+_expense_list: responses.JSONList = responses.JSONList(AccountingExpenseDto)
+
 
 def _convert_str_to_date(date_str: date | str) -> date:
     try:
@@ -22,20 +52,84 @@ def _convert_str_to_date(date_str: date | str) -> date:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error)
 
 
+def _parse_date(date_str: date | str) -> date:
+    try:
+        return datetime.strptime(str(date_str), "%Y-%m-%d").date()
+    except ValueError:
+        raise ValueError(f"Invalid date '{date_str}'. Expected YYYY-MM-DD")
+
+
+def _date_range(month: str | None, start: date | None, end: date | None) -> tuple[date, date]:
+    if month is not None and (start is not None or end is not None):
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "Pass either a month or a start and end date, not both")
+    if month is not None:
+        year, month_number = (int(part) for part in month.split("-"))
+        next_month: date = date(year + month_number // 12, month_number % 12 + 1, 1)
+        return date(year, month_number, 1), date.fromordinal(next_month.toordinal() - 1)
+    if start is None or end is None:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "Pass either a month or a start and end date")
+    return start, end
+
+
+def _export_response(db: Database, user_id: int, format: exporter.Format, gzip: bool) -> StreamingResponse:
+    filename: str = f"ledger.{format}.gz" if gzip else f"ledger.{format}"
+    return StreamingResponse(
+        exporter.ledger(db, user_id, format, gzip),
+        media_type="application/gzip" if gzip else exporter.media_types[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+async def _monthly_summary(
+    db: Database, user_id: int, start: str | None, end: str | None
+) -> list[MonthlySummaryDto]:
+    months = await db.run(accounting_summary_repo.get_monthly_totals, user_id, start, end)
+    return [
+        MonthlySummaryDto(month=month, income=income, expenses=expenses, net=income - expenses)
+        for month, income, expenses in months
+    ]
+
+
+async def _category_summary(
+    db: Database, user_id: int, start: str | None, end: str | None
+) -> list[CategorySummaryDto]:
+    categories = await db.run(accounting_summary_repo.get_categories, user_id, start, end)
+    return [
+        CategorySummaryDto(
+            month=category.month,
+            kind=category.kind,
+            category=category.category,
+            total=category.total,
+            entries=category.entries,
+        )
+        for category in categories
+    ]
+
+
+def _import_media_type(request: Request) -> str:
+    media_type: str = request.headers.get("Content-Type", "").split(";")[0].strip()
+    if media_type not in importer.media_types:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Content-Type must be one of {list(importer.media_types)}",
+        )
+    return media_type
+
+
 @router.post("/income/me", status_code=status.HTTP_201_CREATED)
-def add_income_source(
+async def add_income_source(
     accounting_income: NewAccountingIncome,
     user: User = Depends(dependencies.get_user_or_admin),
-    db: Session = Depends(dependencies.session),
+    db: Database = Depends(dependencies.database),
 ) -> AccountingIncomeDto:
     accounting_income.date = _convert_str_to_date(accounting_income.date)
     try:
-        income: AccountingIncome | None = accounting_income_repo.create(
+        income: AccountingIncome | None = await db.run(
+            accounting_income_repo.create,
             income_type=accounting_income.income_type,
             amount=Decimal(accounting_income.amount),
             date=accounting_income.date,
             user=user,
-            db=db,
         )
     except ValueError as error:
         raise HTTPException(
@@ -48,40 +142,73 @@ def add_income_source(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"You already have income source '{accounting_income.income_type}'",
         )
-    return AccountingIncomeDto(
-        income_type=income.income_type,
-        amount=income.amount,
-        user_id=income.user_id,
-        date=income.date,
+    return _income_dto(income)
+
+
+@router.post("/income/me/import", status_code=status.HTTP_200_OK)
+async def import_income(
+    request: Request,
+    user: User = Depends(dependencies.get_user_or_admin),
+    db: Database = Depends(dependencies.database),
+) -> ImportReport:
+    """
+    Imports a CSV file (Content-Type: text/csv) with an income_type, amount and date
+    column, or one JSON income per line (Content-Type: application/x-ndjson)
+    """
+    def parse(fields: dict[str, Any]) -> AccountingIncome:
+        income = NewAccountingIncome.model_validate(fields)
+        return AccountingIncome(
+            income_type=accounting_income_repo.validate_income_type(income.income_type),
+            amount=Decimal(income.amount),
+            date=_parse_date(income.date),
+            user_id=user.id,
+        )
+
+    media_type: str = _import_media_type(request)
+    return await importer.import_rows(
+        importer.records(request.stream(), media_type), parse, accounting_income_repo.create_many, db
     )
 
 
-@router.get("/income/me", status_code=status.HTTP_200_OK)
-def get_income(
+@router.get("/income/me", status_code=status.HTTP_200_OK, response_model=list[AccountingIncomeDto])
+async def get_income(
+    request: Request,
+    response: Response,
+    start: date | None = Query(default=None),
+    end: date | None = Query(default=None),
     user: User = Depends(dependencies.get_user_or_admin),
-    db: Session = Depends(dependencies.session),
-) -> Iterable[AccountingIncomeDto]:
-    income_sources: Iterable[AccountingIncome] = accounting_income_repo.get_all(
-        user, db
+    db: Database = Depends(dependencies.database),
+    page: pagination.Page = Depends(dependencies.page),
+) -> Response:
+    assert user.id is not None
+    version: int = await db.run(version_repo.get, user.id, "accountingincome")
+    tag: str = responses.etag("accountingincome", user.id, version, request)
+    cached: Response | None = responses.not_modified(request, tag)
+    if cached is not None:
+        return cached
+    response.headers["ETag"] = tag
+
+    income_sources: Iterable[AccountingIncome] = pagination.next_page(
+        await db.run(accounting_income_repo.get_all, user, page=page, start=start, end=end),
+        page,
+        accounting_income_repo.sort_key,
+        response.headers,
     )
-    for income in income_sources:
-        yield AccountingIncomeDto(
-            income_type=income.income_type,
-            amount=income.amount,
-            user_id=income.user_id,
-            date=income.date,
-        )
+    return _income_list.response(income_sources, response)
 
 
 @router.delete("/income/me", status_code=status.HTTP_204_NO_CONTENT)
-def delete_income(
+async def delete_income(
     delete_income_request: DeleteAccountingIncome,
     user: User = Depends(dependencies.get_user_or_admin),
-    db: Session = Depends(dependencies.session),
+    db: Database = Depends(dependencies.database),
 ) -> None:
     delete_income_request.date = _convert_str_to_date(delete_income_request.date)
-    found_and_deleted: bool = accounting_income_repo.delete(
-        user, delete_income_request.income_type, delete_income_request.date, db
+    found_and_deleted: bool = await db.run(
+        accounting_income_repo.delete,
+        user,
+        delete_income_request.income_type,
+        delete_income_request.date,
     )
     if not found_and_deleted:
         raise HTTPException(
@@ -90,56 +217,79 @@ def delete_income(
         )
 
 
-@router.get("/income/user/{user_id}", status_code=status.HTTP_200_OK)
-def get_user_income(
+@router.delete("/income/me/range", status_code=status.HTTP_200_OK)
+async def delete_income_range(
+    month: str | None = Query(default=None, pattern=_month_pattern),
+    start: date | None = Query(default=None),
+    end: date | None = Query(default=None),
+    user: User = Depends(dependencies.get_user_or_admin),
+    db: Database = Depends(dependencies.database),
+) -> DeleteReport:
+    """
+    Deletes all of the user's income in the month (YYYY-MM), or between the start and end dates inclusive
+    """
+    first, last = _date_range(month, start, end)
+    return DeleteReport(deleted=await db.run(accounting_income_repo.delete_range, user, first, last))
+
+
+@router.get("/income/user/{user_id}", status_code=status.HTTP_200_OK, response_model=list[AccountingIncomeDto])
+async def get_user_income(
     user_id: int,
-    db: Session = Depends(dependencies.session),
+    response: Response,
+    start: date | None = Query(default=None),
+    end: date | None = Query(default=None),
+    db: Database = Depends(dependencies.database),
     _: User = Depends(dependencies.get_admin),
-) -> Iterable[AccountingIncomeDto]:
-    income_sources: Iterable[AccountingIncome] = accounting_income_repo.get_by_user_id(
-        user_id, db
+    page: pagination.Page = Depends(dependencies.page),
+    stream: bool = Depends(dependencies.wants_ndjson),
+) -> Response:
+    if stream:
+        return ndjson.response(db.stream(accounting_income_repo.stream_by_user_id(user_id, start, end)), _income_dto)
+
+    income_sources: Iterable[AccountingIncome] = pagination.next_page(
+        await db.run(accounting_income_repo.get_by_user_id, user_id, page=page, start=start, end=end),
+        page,
+        accounting_income_repo.sort_key,
+        response.headers,
     )
-    for income in income_sources:
-        yield AccountingIncomeDto(
-            income_type=income.income_type,
-            amount=income.amount,
-            user_id=income.user_id,
-            date=income.date,
-        )
+    return _income_list.response(income_sources, response)
 
 
-@router.get("/income/type/{income_type}", status_code=status.HTTP_200_OK)
-def get_income_by_type(
+@router.get("/income/type/{income_type}", status_code=status.HTTP_200_OK, response_model=list[AccountingIncomeDto])
+async def get_income_by_type(
     income_type: str,
-    db: Session = Depends(dependencies.session),
+    response: Response,
+    db: Database = Depends(dependencies.database),
     _: User = Depends(dependencies.get_admin),
-):
-    income_sources: Iterable[AccountingIncome] = accounting_income_repo.get_by_type(
-        income_type, db
+    page: pagination.Page = Depends(dependencies.page),
+    stream: bool = Depends(dependencies.wants_ndjson),
+) -> Response:
+    if stream:
+        return ndjson.response(db.stream(accounting_income_repo.stream_by_type(income_type)), _income_dto)
+
+    income_sources: Iterable[AccountingIncome] = pagination.next_page(
+        await db.run(accounting_income_repo.get_by_type, income_type, page=page),
+        page,
+        accounting_income_repo.all_users_sort_key,
+        response.headers,
     )
-    for income in income_sources:
-        yield AccountingIncomeDto(
-            income_type=income.income_type,
-            amount=income.amount,
-            user_id=income.user_id,
-            date=income.date,
-        )
+    return _income_list.response(income_sources, response)
 
 
 @router.post("/expenses/me", status_code=status.HTTP_201_CREATED)
-def add_expense(
+async def add_expense(
     monthly_expense: NewAccountingExpense,
-    db: Session = Depends(dependencies.session),
+    db: Database = Depends(dependencies.database),
     user: User = Depends(dependencies.get_user_or_admin),
 ) -> AccountingExpenseDto:
     try:
-        expense: AccountingExpense | None = accounting_expense_repo.create(
+        expense: AccountingExpense | None = await db.run(
+            accounting_expense_repo.create,
             monthly_expense.expense_type,
             Decimal(monthly_expense.amount),
             _convert_str_to_date(monthly_expense.date),
             monthly_expense.description,
             user,
-            db,
         )
     except ValueError as error:
         raise HTTPException(
@@ -153,43 +303,74 @@ def add_expense(
             detail=f"You already have '{monthly_expense.expense_type}' as an expense",
         )
 
-    return AccountingExpenseDto(
-        expense_type=expense.expense_type,
-        amount=expense.amount,
-        description=expense.description,
-        user_id=expense.user_id,
-        date=expense.date,
-    )
+    return _expense_dto(expense)
 
 
-@router.get("/expenses/me", status_code=status.HTTP_200_OK)
-def get_expenses(
+@router.post("/expenses/me/import", status_code=status.HTTP_200_OK)
+async def import_expenses(
+    request: Request,
     user: User = Depends(dependencies.get_user_or_admin),
-    db: Session = Depends(dependencies.session),
-) -> Iterable[AccountingExpenseDto]:
-    expenses: Iterable[AccountingExpense] = accounting_expense_repo.get_all(user, db)
-
-    for expense in expenses:
-        yield AccountingExpenseDto(
-            expense_type=expense.expense_type,
-            amount=expense.amount,
-            description=expense.description,
-            user_id=expense.user_id,
-            date=expense.date,
+    db: Database = Depends(dependencies.database),
+) -> ImportReport:
+    """
+    Imports a CSV file (Content-Type: text/csv) with an expense_type, amount, date and
+    optional description column, or one JSON expense per line (Content-Type: application/x-ndjson)
+    """
+    def parse(fields: dict[str, Any]) -> AccountingExpense:
+        expense = NewAccountingExpense.model_validate({"description": None, **fields})
+        return AccountingExpense(
+            expense_type=accounting_expense_repo.validate_expense_type(expense.expense_type),
+            amount=Decimal(expense.amount),
+            date=_parse_date(expense.date),
+            description=expense.description or None,
+            user_id=user.id,
         )
 
+    media_type: str = _import_media_type(request)
+    return await importer.import_rows(
+        importer.records(request.stream(), media_type), parse, accounting_expense_repo.create_many, db
+    )
+
+
+@router.get("/expenses/me", status_code=status.HTTP_200_OK, response_model=list[AccountingExpenseDto])
+async def get_expenses(
+    request: Request,
+    response: Response,
+    start: date | None = Query(default=None),
+    end: date | None = Query(default=None),
+    user: User = Depends(dependencies.get_user_or_admin),
+    db: Database = Depends(dependencies.database),
+    page: pagination.Page = Depends(dependencies.page),
+) -> Response:
+    assert user.id is not None
+    version: int = await db.run(version_repo.get, user.id, "accountingexpense")
+    tag: str = responses.etag("accountingexpense", user.id, version, request)
+    cached: Response | None = responses.not_modified(request, tag)
+    if cached is not None:
+        return cached
+    response.headers["ETag"] = tag
+
+    expenses: Iterable[AccountingExpense] = pagination.next_page(
+        await db.run(accounting_expense_repo.get_all, user, page=page, start=start, end=end),
+        page,
+        accounting_expense_repo.sort_key,
+        response.headers,
+    )
+
+    return _expense_list.response(expenses, response)
+
 
 @router.delete("/expenses/me/", status_code=status.HTTP_204_NO_CONTENT)
-def delete_expense(
+async def delete_expense(
     delete_accounting_income: DeleteAccountingExpense,
     user: User = Depends(dependencies.get_user_or_admin),
-    db: Session = Depends(dependencies.session),
+    db: Database = Depends(dependencies.database),
 ) -> None:
-    found_and_deleted: bool = accounting_expense_repo.delete(
+    found_and_deleted: bool = await db.run(
+        accounting_expense_repo.delete,
         user,
         delete_accounting_income.expense_type,
         _convert_str_to_date(delete_accounting_income.date),
-        db,
     )
     if not found_and_deleted:
         raise HTTPException(
@@ -198,41 +379,168 @@ def delete_expense(
         )
 
 
-@router.get("/expenses/user/{user_id}", status_code=status.HTTP_200_OK)
-def get_expenses_by_user_id(
+@router.delete("/expenses/me/range", status_code=status.HTTP_200_OK)
+async def delete_expense_range(
+    month: str | None = Query(default=None, pattern=_month_pattern),
+    start: date | None = Query(default=None),
+    end: date | None = Query(default=None),
+    user: User = Depends(dependencies.get_user_or_admin),
+    db: Database = Depends(dependencies.database),
+) -> DeleteReport:
+    """
+    Deletes all of the user's expenses in the month (YYYY-MM), or between the start and end dates inclusive
+    """
+    first, last = _date_range(month, start, end)
+    return DeleteReport(deleted=await db.run(accounting_expense_repo.delete_range, user, first, last))
+
+
+@router.get("/expenses/user/{user_id}", status_code=status.HTTP_200_OK, response_model=list[AccountingExpenseDto])
+async def get_expenses_by_user_id(
     user_id: int,
+    response: Response,
+    start: date | None = Query(default=None),
+    end: date | None = Query(default=None),
     _: User = Depends(dependencies.get_admin),
-    db: Session = Depends(dependencies.session),
-) -> Iterable[AccountingExpenseDto]:
-    expenses: Iterable[AccountingExpense] = accounting_expense_repo.get_by_user_id(
-        user_id, db
+    db: Database = Depends(dependencies.database),
+    page: pagination.Page = Depends(dependencies.page),
+    stream: bool = Depends(dependencies.wants_ndjson),
+) -> Response:
+    if stream:
+        return ndjson.response(db.stream(accounting_expense_repo.stream_by_user_id(user_id, start, end)), _expense_dto)
+
+    expenses: Iterable[AccountingExpense] = pagination.next_page(
+        await db.run(accounting_expense_repo.get_by_user_id, user_id, page=page, start=start, end=end),
+        page,
+        accounting_expense_repo.sort_key,
+        response.headers,
     )
 
-    for expense in expenses:
-        yield AccountingExpenseDto(
-            expense_type=expense.expense_type,
-            amount=expense.amount,
-            description=expense.description,
-            user_id=expense.user_id,
-            date=expense.date,
-        )
+    return _expense_list.response(expenses, response)
 
 
-@router.get("/expenses/type/{expense_type}", status_code=status.HTTP_200_OK)
-def get_expenses_by_type(
+@router.get("/expenses/type/{expense_type}", status_code=status.HTTP_200_OK, response_model=list[AccountingExpenseDto])
+async def get_expenses_by_type(
     expense_type: str,
+    response: Response,
+    _: User = Depends(dependencies.get_admin),
+    db: Database = Depends(dependencies.database),
+    page: pagination.Page = Depends(dependencies.page),
+    stream: bool = Depends(dependencies.wants_ndjson),
+) -> Response:
+    if stream:
+        return ndjson.response(db.stream(accounting_expense_repo.stream_by_type(expense_type)), _expense_dto)
+
+    expenses: Iterable[AccountingExpense] = pagination.next_page(
+        await db.run(accounting_expense_repo.get_by_type, expense_type, page=page),
+        page,
+        accounting_expense_repo.all_users_sort_key,
+        response.headers,
+    )
+
+    return _expense_list.response(expenses, response)
+
+
+@router.get("/expenses/description/{description}", status_code=status.HTTP_200_OK, response_model=list[AccountingExpenseDto])
+async def get_expenses_by_description(
+    description: str,
+    response: Response,
     _: User = Depends(dependencies.get_admin),
-    db: Session = Depends(dependencies.session),
-) -> Iterable[AccountingExpenseDto]:
-    expenses: Iterable[AccountingExpense] = accounting_expense_repo.get_by_type(
-        expense_type, db
+    db: Database = Depends(dependencies.database),
+    page: pagination.Page = Depends(dependencies.page),
+    stream: bool = Depends(dependencies.wants_ndjson),
+) -> Response:
+    if stream:
+        return ndjson.response(db.stream(accounting_expense_repo.stream_by_description(description)), _expense_dto)
+
+    expenses: Iterable[AccountingExpense] = pagination.next_page(
+        await db.run(accounting_expense_repo.get_by_description, description, page=page),
+        page,
+        accounting_expense_repo.all_users_sort_key,
+        response.headers,
     )
 
-    for expense in expenses:
-        yield AccountingExpenseDto(
-            expense_type=expense.expense_type,
-            amount=expense.amount,
-            description=expense.description,
-            user_id=expense.user_id,
-            date=expense.date,
+    return _expense_list.response(expenses, response)
+
+
+@router.get("/export", status_code=status.HTTP_200_OK)
+async def export_ledger(
+    format: exporter.Format = Query(default="csv"),
+    gzip: bool = Query(default=False),
+    user: User = Depends(dependencies.get_user_or_admin),
+    db: Database = Depends(dependencies.database),
+) -> StreamingResponse:
+    """
+    Downloads all of your accounting and budgeting records as CSV or NDJSON
+    """
+    assert user.id is not None
+    return _export_response(db, user.id, format, gzip)
+
+
+@router.get("/export/user/{user_id}", status_code=status.HTTP_200_OK)
+async def export_user_ledger(
+    user_id: int,
+    format: exporter.Format = Query(default="csv"),
+    gzip: bool = Query(default=False),
+    _: User = Depends(dependencies.get_admin),
+    db: Database = Depends(dependencies.database),
+) -> StreamingResponse:
+    """
+    Downloads all of the user's accounting and budgeting records as CSV or NDJSON
+    """
+    searched_user: User | None = await db.run(UserRepository.get_by_id, user_id)
+    if searched_user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"User with ID '{user_id}' not found",
         )
+    return _export_response(db, user_id, format, gzip)
+
+
+@router.get("/summary/me", status_code=status.HTTP_200_OK)
+async def get_monthly_summary(
+    start: str | None = Query(default=None, pattern=_month_pattern),
+    end: str | None = Query(default=None, pattern=_month_pattern),
+    user: User = Depends(dependencies.get_user_or_admin),
+    db: Database = Depends(dependencies.database),
+) -> list[MonthlySummaryDto]:
+    """
+    Total income, total expenses and net cashflow per month, optionally between the start and end months (YYYY-MM)
+    """
+    assert user.id is not None
+    return await _monthly_summary(db, user.id, start, end)
+
+
+@router.get("/summary/me/categories", status_code=status.HTTP_200_OK)
+async def get_category_summary(
+    start: str | None = Query(default=None, pattern=_month_pattern),
+    end: str | None = Query(default=None, pattern=_month_pattern),
+    user: User = Depends(dependencies.get_user_or_admin),
+    db: Database = Depends(dependencies.database),
+) -> list[CategorySummaryDto]:
+    """
+    The total of each expense and income type per month, optionally between the start and end months (YYYY-MM)
+    """
+    assert user.id is not None
+    return await _category_summary(db, user.id, start, end)
+
+
+@router.get("/summary/user/{user_id}", status_code=status.HTTP_200_OK)
+async def get_user_monthly_summary(
+    user_id: int,
+    start: str | None = Query(default=None, pattern=_month_pattern),
+    end: str | None = Query(default=None, pattern=_month_pattern),
+    _: User = Depends(dependencies.get_admin),
+    db: Database = Depends(dependencies.database),
+) -> list[MonthlySummaryDto]:
+    return await _monthly_summary(db, user_id, start, end)
+
+
+@router.get("/summary/user/{user_id}/categories", status_code=status.HTTP_200_OK)
+async def get_user_category_summary(
+    user_id: int,
+    start: str | None = Query(default=None, pattern=_month_pattern),
+    end: str | None = Query(default=None, pattern=_month_pattern),
+    _: User = Depends(dependencies.get_admin),
+    db: Database = Depends(dependencies.database),
+) -> list[CategorySummaryDto]:
+    return await _category_summary(db, user_id, start, end)
@@ -1,12 +1,13 @@
 from datetime import datetime, timezone
 
-from fastapi import APIRouter, Cookie, Depends, HTTPException, Response, status
+from fastapi import APIRouter, Cookie, Depends, HTTPException, Request, Response, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlmodel import Session
+from starlette.concurrency import run_in_threadpool
 
 from buddy.dtos import AccessTokenDto, PasswordReset, Signup
-from buddy.src import dependencies
+from buddy.src import dependencies, rate_limit
 from buddy.src.data import UserRepository
+from buddy.src.db import Database
 from buddy.src.models import (RefreshToken, User, UserRoles,
                               convert_expiry_to_utc)
 from buddy.src.security import IdentitySecurity, PasswordSecurity
@@ -15,8 +16,10 @@ router = APIRouter(tags=["auth"])
 
 
 @router.post("/signup", status_code=status.HTTP_201_CREATED)
-def signup(credentials: Signup, db: Session = Depends(dependencies.session)) -> None:
-    ok: bool = PasswordSecurity.create_user(
+async def signup(request: Request, credentials: Signup, db: Database = Depends(dependencies.database)) -> None:
+    # the 'manager' backend makes a blocking round trip to the shared state process
+    await run_in_threadpool(rate_limit.take_signup, request)
+    ok: bool = await PasswordSecurity.create_user_async(
         credentials.username, credentials.password, db
     )
 
@@ -28,12 +31,14 @@ def signup(credentials: Signup, db: Session = Depends(dependencies.session)) ->
 
 
 @router.post("/token", status_code=status.HTTP_201_CREATED)
-def login(
+async def login(
+    request: Request,
     response: Response,
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(dependencies.session),
+    db: Database = Depends(dependencies.database),
 ) -> AccessTokenDto:
-    user: User | None = PasswordSecurity.authenticate(
+    buckets: list[rate_limit.Bucket] = await run_in_threadpool(rate_limit.take_login, request, form_data.username)
+    user: User | None = await PasswordSecurity.authenticate_async(
         form_data.username, form_data.password, db
     )
 
@@ -42,45 +47,46 @@ def login(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=f"Incorrect username or password",
         )
+    await run_in_threadpool(rate_limit.give_back, buckets)
 
-    refresh_token: RefreshToken = IdentitySecurity.create_refresh_token(user, db)
+    jwt: str = IdentitySecurity.create_access_token(user)
+    token, refresh_token = await db.run(IdentitySecurity.create_refresh_token, user)
     corrected_expiry: datetime = convert_expiry_to_utc(refresh_token)
     max_age: float = (corrected_expiry - datetime.now(tz=timezone.utc)).total_seconds()
 
     response.set_cookie(
         key="refresh_token",
-        value=refresh_token.token,
+        value=token,
         max_age=int(max_age),
         httponly=True,
         samesite="lax",
     )
-    jwt: str = IdentitySecurity.create_access_token(user)
 
     return AccessTokenDto(access_token=jwt, token_type="bearer")
 
 
 @router.post("/refresh", status_code=status.HTTP_201_CREATED)
-def generate_access_token(
+async def generate_access_token(
     response: Response,
     refresh_token: str | None = Cookie(),
-    db: Session = Depends(dependencies.session),
+    db: Database = Depends(dependencies.database),
 ) -> AccessTokenDto:
-    token: RefreshToken | None = IdentitySecurity.validate_refresh_token(
-        refresh_token, db
+    rotated: tuple[str, RefreshToken, str] | None = await db.run(
+        IdentitySecurity.rotate_refresh_token, refresh_token
     )
-    if token is None:
+    if rotated is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Please sign in."
         )
 
-    new_refresh_token, jwt = IdentitySecurity.rotate_refresh_token(token, db)
+    new_token, new_refresh_token, jwt = rotated
 
     corrected_expiry: datetime = convert_expiry_to_utc(new_refresh_token)
     max_age: float = (corrected_expiry - datetime.now(tz=timezone.utc)).total_seconds()
 
     response.set_cookie(
         key="refresh_token",
-        value=new_refresh_token.token,
+        value=new_token,
         max_age=int(max_age),
         httponly=True,
         samesite="strict",
@@ -89,9 +95,9 @@ def generate_access_token(
 
 
 @router.patch("/passwd", status_code=status.HTTP_204_NO_CONTENT)
-def change_password(
+async def change_password(
     new_password: PasswordReset,
     user: User = Depends(dependencies.get_user_or_admin),
-    db: Session = Depends(dependencies.session),
+    db: Database = Depends(dependencies.database),
 ) -> None:
-    UserRepository.change_password(user=user, new_password=new_password.password, db=db)
+    await UserRepository.change_password_async(user=user, new_password=new_password.password, db=db)
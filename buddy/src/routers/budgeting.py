@@ -1,26 +1,44 @@
 from decimal import Decimal
 from typing import Iterable
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from starlette.concurrency import run_in_threadpool
 
 from buddy.dtos import BudgetExpenseDto, MonthlyIncomeDto, NewBudgetExpense, NewMonthlyIncome
-from buddy.src import dependencies
-from buddy.src.data import BudgetExpenseRepository, MonthlyIncomeRepository
+from buddy.src import budget_cache, dependencies, ndjson, responses
+from buddy.src.data import BudgetExpenseRepository, MonthlyIncomeRepository, pagination, version_repo
+from buddy.src.db import Database
 from buddy.src.models import BudgetExpense, MonthlyIncome, User
 
 router = APIRouter(prefix="/budgeting", tags=["budgeting"])
 
 
+def _income_dto(income: MonthlyIncome) -> MonthlyIncomeDto:
+    return MonthlyIncomeDto(income_type=income.income_type, amount=income.amount, user_id=income.user_id)
+
+
+def _expense_dto(expense: BudgetExpense) -> BudgetExpenseDto:
+    return BudgetExpenseDto(
+        expense_type=expense.expense_type,
+        amount=expense.amount,
+        description=expense.description,
+        user_id=expense.user_id
+    )
+
+
+_income_list: responses.JSONList = responses.JSONList(MonthlyIncomeDto)
+_expense_list: responses.JSONList = responses.JSONList(BudgetExpenseDto)
+
+
 @router.post("/income/me", status_code=status.HTTP_201_CREATED)
-def add_income_source(
+async def add_income_source(
     monthly_income: NewMonthlyIncome,
     user: User = Depends(dependencies.get_user_or_admin),
-    db: Session = Depends(dependencies.session),
+    db: Database = Depends(dependencies.database),
 ) -> MonthlyIncomeDto:
     try:
-        income: MonthlyIncome | None = MonthlyIncomeRepository.create(
-            user, monthly_income.income_type, Decimal(monthly_income.amount), db
+        income: MonthlyIncome | None = await db.run(
+            MonthlyIncomeRepository.create, user, monthly_income.income_type, Decimal(monthly_income.amount)
         )
     except ValueError as error:
         raise HTTPException(
@@ -34,26 +52,47 @@ def add_income_source(
             detail=f"You already have income source '{monthly_income.income_type}'",
         )
 
-    return MonthlyIncomeDto(income_type=income.income_type, amount=income.amount, user_id=income.user_id)
+    return _income_dto(income)
 
 
-@router.get("/income/me", status_code=status.HTTP_200_OK)
-def get_income(
+@router.get("/income/me", status_code=status.HTTP_200_OK, response_model=list[MonthlyIncomeDto])
+async def get_income(
+    request: Request,
+    response: Response,
     user: User = Depends(dependencies.get_user_or_admin),
-    db: Session = Depends(dependencies.session),
-) -> Iterable[MonthlyIncomeDto]:
-    income_sources: Iterable[MonthlyIncome] = MonthlyIncomeRepository.get_all(user, db)
-    for income in income_sources:
-        yield MonthlyIncomeDto(income_type=income.income_type, amount=income.amount, user_id=income.user_id)
+    db: Database = Depends(dependencies.database),
+    page: pagination.Page = Depends(dependencies.page),
+) -> Response:
+    assert user.id is not None
+    version: int = await db.run(version_repo.get, user.id, "monthlyincome")
+    tag: str = responses.etag("monthlyincome", user.id, version, request)
+    cached: Response | None = responses.not_modified(request, tag)
+    if cached is not None:
+        return cached
+    response.headers["ETag"] = tag
+    # the 'manager' backend makes a blocking round trip to the shared state process
+    rendered: Response | None = await run_in_threadpool(budget_cache.get, user.id, "monthlyincome", request.url.query, version)
+    if rendered is not None:
+        return rendered
+
+    income_sources: Iterable[MonthlyIncome] = pagination.next_page(
+        await db.run(MonthlyIncomeRepository.get_all, user, page=page),
+        page,
+        MonthlyIncomeRepository.sort_key,
+        response.headers,
+    )
+    rendered = _income_list.response(income_sources, response)
+    await run_in_threadpool(budget_cache.put, user.id, "monthlyincome", request.url.query, version, rendered)
+    return rendered
 
 
 @router.delete("/income/me/{income_type}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_income(
+async def delete_income(
     income_type: str,
     user: User = Depends(dependencies.get_user_or_admin),
-    db: Session = Depends(dependencies.session),
+    db: Database = Depends(dependencies.database),
 ) -> None:
-    found_and_deleted: bool = MonthlyIncomeRepository.delete(user, income_type, db)
+    found_and_deleted: bool = await db.run(MonthlyIncomeRepository.delete, user, income_type)
     if not found_and_deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -61,45 +100,61 @@ def delete_income(
         )
 
 
-@router.get("/income/user/{user_id}", status_code=status.HTTP_200_OK)
-def get_user_income(
+@router.get("/income/user/{user_id}", status_code=status.HTTP_200_OK, response_model=list[MonthlyIncomeDto])
+async def get_user_income(
     user_id: int,
-    db: Session = Depends(dependencies.session),
+    response: Response,
+    db: Database = Depends(dependencies.database),
     _: User = Depends(dependencies.get_admin),
-) -> Iterable[MonthlyIncomeDto]:
-    income_sources: Iterable[MonthlyIncome] = MonthlyIncomeRepository.get_by_user_id(
-        user_id, db
+    page: pagination.Page = Depends(dependencies.page),
+    stream: bool = Depends(dependencies.wants_ndjson),
+) -> Response:
+    if stream:
+        return ndjson.response(db.stream(MonthlyIncomeRepository.stream_by_user_id(user_id)), _income_dto)
+
+    income_sources: Iterable[MonthlyIncome] = pagination.next_page(
+        await db.run(MonthlyIncomeRepository.get_by_user_id, user_id, page=page),
+        page,
+        MonthlyIncomeRepository.sort_key,
+        response.headers,
     )
-    for income in income_sources:
-        yield MonthlyIncomeDto(income_type=income.income_type, amount=income.amount, user_id=income.user_id)
+    return _income_list.response(income_sources, response)
 
 
-@router.get("/income/type/{income_type}", status_code=status.HTTP_200_OK)
-def get_income_by_type(
+@router.get("/income/type/{income_type}", status_code=status.HTTP_200_OK, response_model=list[MonthlyIncomeDto])
+async def get_income_by_type(
     income_type: str,
-    db: Session = Depends(dependencies.session),
+    response: Response,
+    db: Database = Depends(dependencies.database),
     _: User = Depends(dependencies.get_admin),
-):
-    income_sources: Iterable[MonthlyIncome] = MonthlyIncomeRepository.get_by_type(
-        income_type, db
+    page: pagination.Page = Depends(dependencies.page),
+    stream: bool = Depends(dependencies.wants_ndjson),
+) -> Response:
+    if stream:
+        return ndjson.response(db.stream(MonthlyIncomeRepository.stream_by_type(income_type)), _income_dto)
+
+    income_sources: Iterable[MonthlyIncome] = pagination.next_page(
+        await db.run(MonthlyIncomeRepository.get_by_type, income_type, page=page),
+        page,
+        MonthlyIncomeRepository.all_users_sort_key,
+        response.headers,
     )
-    for income in income_sources:
-        yield MonthlyIncomeDto(income_type=income.income_type, amount=income.amount, user_id=income.user_id)
+    return _income_list.response(income_sources, response)
 
 
 @router.post("/expenses/me", status_code=status.HTTP_201_CREATED)
-def add_expense(
+async def add_expense(
     monthly_expense: NewBudgetExpense,
-    db: Session = Depends(dependencies.session),
+    db: Database = Depends(dependencies.database),
     user: User = Depends(dependencies.get_user_or_admin),
 ) -> BudgetExpenseDto:
     try:
-        expense: BudgetExpense | None = BudgetExpenseRepository.create(
+        expense: BudgetExpense | None = await db.run(
+            BudgetExpenseRepository.create,
             monthly_expense.expense_type,
             Decimal(monthly_expense.amount),
             monthly_expense.description,
             user,
-            db,
         )
     except ValueError as error:
         raise HTTPException(
@@ -113,38 +168,48 @@ def add_expense(
             detail=f"You already have '{monthly_expense.expense_type}' as an expense",
         )
 
-    return BudgetExpenseDto(
-        expense_type=expense.expense_type,
-        amount=expense.amount,
-        description=expense.description,
-        user_id=expense.user_id
-    )
+    return _expense_dto(expense)
 
 
-@router.get("/expenses/me", status_code=status.HTTP_200_OK)
-def get_expenses(
+@router.get("/expenses/me", status_code=status.HTTP_200_OK, response_model=list[BudgetExpenseDto])
+async def get_expenses(
+    request: Request,
+    response: Response,
     user: User = Depends(dependencies.get_user_or_admin),
-    db: Session = Depends(dependencies.session),
-) -> Iterable[BudgetExpenseDto]:
-    expenses: Iterable[BudgetExpense] = BudgetExpenseRepository.get_expenses(user, db)
-
-    for expense in expenses:
-        yield BudgetExpenseDto(
-            expense_type=expense.expense_type,
-            amount=expense.amount,
-            description=expense.description,
-            user_id=expense.user_id
-        )
+    db: Database = Depends(dependencies.database),
+    page: pagination.Page = Depends(dependencies.page),
+) -> Response:
+    assert user.id is not None
+    version: int = await db.run(version_repo.get, user.id, "budgetexpense")
+    tag: str = responses.etag("budgetexpense", user.id, version, request)
+    cached: Response | None = responses.not_modified(request, tag)
+    if cached is not None:
+        return cached
+    response.headers["ETag"] = tag
+    rendered: Response | None = await run_in_threadpool(budget_cache.get, user.id, "budgetexpense", request.url.query, version)
+    if rendered is not None:
+        return rendered
+
+    expenses: Iterable[BudgetExpense] = pagination.next_page(
+        await db.run(BudgetExpenseRepository.get_expenses, user, page=page),
+        page,
+        BudgetExpenseRepository.sort_key,
+        response.headers,
+    )
+
+    rendered = _expense_list.response(expenses, response)
+    await run_in_threadpool(budget_cache.put, user.id, "budgetexpense", request.url.query, version, rendered)
+    return rendered
 
 
 @router.delete("/expenses/me/{expense_type}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_expense(
+async def delete_expense(
     expense_type: str,
     user: User = Depends(dependencies.get_user_or_admin),
-    db: Session = Depends(dependencies.session),
+    db: Database = Depends(dependencies.database),
 ) -> None:
-    found_and_deleted: bool = BudgetExpenseRepository.delete_expense(
-        user, expense_type, db
+    found_and_deleted: bool = await db.run(
+        BudgetExpenseRepository.delete_expense, user, expense_type
     )
     if not found_and_deleted:
         raise HTTPException(
@@ -152,39 +217,45 @@ def delete_expense(
         )
 
 
-@router.get("/expenses/user/{user_id}", status_code=status.HTTP_200_OK)
-def get_expenses_by_user_id(
+@router.get("/expenses/user/{user_id}", status_code=status.HTTP_200_OK, response_model=list[BudgetExpenseDto])
+async def get_expenses_by_user_id(
     user_id: int,
+    response: Response,
     _: User = Depends(dependencies.get_admin),
-    db: Session = Depends(dependencies.session),
-) -> Iterable[BudgetExpenseDto]:
-    expenses: Iterable[BudgetExpense] = BudgetExpenseRepository.get_expenses_by_user_id(
-        user_id, db
+    db: Database = Depends(dependencies.database),
+    page: pagination.Page = Depends(dependencies.page),
+    stream: bool = Depends(dependencies.wants_ndjson),
+) -> Response:
+    if stream:
+        return ndjson.response(db.stream(BudgetExpenseRepository.stream_expenses_by_user_id(user_id)), _expense_dto)
+
+    expenses: Iterable[BudgetExpense] = pagination.next_page(
+        await db.run(BudgetExpenseRepository.get_expenses_by_user_id, user_id, page=page),
+        page,
+        BudgetExpenseRepository.sort_key,
+        response.headers,
     )
 
-    for expense in expenses:
-        yield BudgetExpenseDto(
-            expense_type=expense.expense_type,
-            amount=expense.amount,
-            description=expense.description,
-            user_id=expense.user_id
-        )
+    return _expense_list.response(expenses, response)
 
 
-@router.get("/expenses/type/{expense_type}", status_code=status.HTTP_200_OK)
-def get_expenses_by_type(
+@router.get("/expenses/type/{expense_type}", status_code=status.HTTP_200_OK, response_model=list[BudgetExpenseDto])
+async def get_expenses_by_type(
     expense_type: str,
+    response: Response,
     _: User = Depends(dependencies.get_admin),
-    db: Session = Depends(dependencies.session),
-) -> Iterable[BudgetExpenseDto]:
-    expenses: Iterable[BudgetExpense] = BudgetExpenseRepository.get_expenses_by_type(
-        expense_type, db
+    db: Database = Depends(dependencies.database),
+    page: pagination.Page = Depends(dependencies.page),
+    stream: bool = Depends(dependencies.wants_ndjson),
+) -> Response:
+    if stream:
+        return ndjson.response(db.stream(BudgetExpenseRepository.stream_expenses_by_type(expense_type)), _expense_dto)
+
+    expenses: Iterable[BudgetExpense] = pagination.next_page(
+        await db.run(BudgetExpenseRepository.get_expenses_by_type, expense_type, page=page),
+        page,
+        BudgetExpenseRepository.all_users_sort_key,
+        response.headers,
     )
 
-    for expense in expenses:
-        yield BudgetExpenseDto(
-            expense_type=expense.expense_type,
-            amount=expense.amount,
-            description=expense.description,
-            user_id=expense.user_id
-        )
+    return _expense_list.response(expenses, response)
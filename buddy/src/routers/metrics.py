@@ -0,0 +1,22 @@
+from typing import Mapping
+
+from fastapi import APIRouter, Depends, status
+
+from buddy.src import budget_cache, dependencies, rate_limit
+from buddy.src.models import User
+from buddy.src.security import IdentitySecurity, PasswordSecurity
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("", status_code=status.HTTP_200_OK)
+def get_metrics(_: User = Depends(dependencies.get_admin)) -> dict[str, Mapping[str, int | float]]:
+    return {
+        "user_cache": IdentitySecurity.user_cache_stats(),
+        "jwt_cache": IdentitySecurity.jwt_cache_stats(),
+        "password_hashing": PasswordSecurity.executor_stats(),
+        "refresh_token_sweeper": IdentitySecurity.sweeper_stats(),
+        "access_tokens": IdentitySecurity.access_token_stats(),
+        "budget_cache": budget_cache.stats(),
+        "rate_limit": rate_limit.stats(),
+    }
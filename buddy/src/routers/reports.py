@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends, Query, status
+
+from buddy.dtos import CategoryVarianceDto, VarianceReportDto
+from buddy.src import dependencies
+from buddy.src.data import report_repo
+from buddy.src.db import Database
+from buddy.src.models import User
+
+router = APIRouter(prefix="/reports", tags=["reports"])
+
+
+@router.get("/variance", status_code=status.HTTP_200_OK)
+async def get_variance(
+    month: str = Query(pattern=r"^\d{4}-(0[1-9]|1[0-2])$"),
+    user: User = Depends(dependencies.get_user_or_admin),
+    db: Database = Depends(dependencies.database),
+) -> VarianceReportDto:
+    """
+    Budget vs actual for each expense and income type in the month (YYYY-MM). A positive
+    delta means more was spent or earned than planned
+    """
+    assert user.id is not None
+    categories = await db.run(report_repo.get_variance, user.id, month)
+    return VarianceReportDto(
+        month=month,
+        categories=[
+            CategoryVarianceDto(kind=kind, category=category, planned=planned, actual=actual, delta=actual - planned)
+            for kind, category, planned, actual in categories
+        ],
+    )
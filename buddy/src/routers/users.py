@@ -1,9 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session
 
 from buddy.dtos import UserDto
 from buddy.src import dependencies
 from buddy.src.data import UserRepository
+from buddy.src.db import Database
 from buddy.src.models import User
 
 router = APIRouter(
@@ -13,12 +13,12 @@ router = APIRouter(
 
 
 @router.get("/id/{user_id}", status_code=status.HTTP_200_OK)
-def get_user_by_id(
+async def get_user_by_id(
     user_id: int,
-    db: Session = Depends(dependencies.session),
+    db: Database = Depends(dependencies.database),
     _: User = Depends(dependencies.get_admin),
 ) -> UserDto:
-    searched_user: User | None = UserRepository.get_by_id(user_id, db)
+    searched_user: User | None = await db.run(UserRepository.get_by_id, user_id)
     if searched_user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -34,12 +34,12 @@ def get_user_by_id(
 
 
 @router.get("/username/{username}", status_code=status.HTTP_200_OK)
-def get_user_by_username(
+async def get_user_by_username(
     username: str,
-    db: Session = Depends(dependencies.session),
+    db: Database = Depends(dependencies.database),
     _: User = Depends(dependencies.get_admin),
 ) -> UserDto:
-    searched_user: User | None = UserRepository.get_by_username(username, db)
+    searched_user: User | None = await db.run(UserRepository.get_by_username, username)
     if searched_user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -55,29 +55,29 @@ def get_user_by_username(
 
 
 @router.get("/me", status_code=status.HTTP_200_OK)
-def get_user_profile(user: User = Depends(dependencies.get_user_or_admin)) -> UserDto:
+async def get_user_profile(user: User = Depends(dependencies.get_user_or_admin)) -> UserDto:
     assert user.id is not None
     return UserDto(id=user.id, username=user.username, role=user.role.value)
 
 
 @router.delete("/delete/me", status_code=status.HTTP_204_NO_CONTENT)
-def delete_user(
-    db: Session = Depends(dependencies.session),
+async def delete_user(
+    db: Database = Depends(dependencies.database),
     user: User = Depends(dependencies.get_user_or_admin),
 ) -> None:
-    UserRepository.delete_user(user, db)
+    await db.run(UserRepository.delete_user, user)
 
 
 @router.delete("/delete/id/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_user_by_id(
+async def delete_user_by_id(
     user_id: int,
-    db: Session = Depends(dependencies.session),
+    db: Database = Depends(dependencies.database),
     _: User = Depends(dependencies.get_admin),
 ) -> None:
-    user_to_delete: User | None = UserRepository.get_by_id(user_id, db)
+    user_to_delete: User | None = await db.run(UserRepository.get_by_id, user_id)
     if user_to_delete is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"User with ID '{user_id}' not found",
         )
-    UserRepository.delete_user(user_to_delete, db)
+    await db.run(UserRepository.delete_user, user_to_delete)
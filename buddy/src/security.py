@@ -1,18 +1,102 @@
+import asyncio
+import contextlib
+import hashlib
+import logging
+import multiprocessing
 import os
 import secrets
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Any, AsyncContextManager, Callable, Iterable, Sequence, TypeVar
 
-from jose import JWTError, jwt
 from passlib.context import CryptContext
 from pydantic import BaseModel
+import sqlalchemy as sa
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import make_transient_to_detached
 from sqlmodel import Session, col, func, select
+from starlette.concurrency import run_in_threadpool
 
-from buddy.src.models import (RefreshToken, User, UserRoles,
-                              convert_expiry_to_utc)
+from buddy.src import jwt_backends
+from buddy.src.cache import BloomFilter, TTLCache
+from buddy.src.models import RefreshToken, TokenRevocation, User, UserRoles
+
+if TYPE_CHECKING:
+    from buddy.src.db import Database
+
+T = TypeVar("T")
+
+_password_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+_access_token_mode: str = os.getenv("ACCESS_TOKEN_MODE", "cached")
+if _access_token_mode != "cached" and _access_token_mode != "stateless":
+    raise RuntimeError("ACCESS_TOKEN_MODE must be 'cached' or 'stateless'")
+
+
+def _init_password_worker() -> None:
+    logging.getLogger("passlib").setLevel(logging.ERROR)
+
+
+def _hash_password(password: str) -> str:
+    return _password_context.hash(password)
+
+
+def _verify_password(password: str, hashed_password: str) -> bool:
+    return _password_context.verify(password, hashed_password)
 
 
 class PasswordSecurity:
-    _context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    _context = _password_context
+    _workers: int = int(os.getenv("PASSWORD_HASH_WORKERS", "0"))
+    _executor: ProcessPoolExecutor | None = None
+    _in_flight: int = 0
+
+    @classmethod
+    def start_executor(cls) -> None:
+        """
+        Starts the process pool used by the async password functions if
+        PASSWORD_HASH_WORKERS is greater than 0. Otherwise password work
+        runs on the shared threadpool.
+        """
+        if cls._workers > 0 and cls._executor is None:
+            cls._executor = ProcessPoolExecutor(
+                max_workers=cls._workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_password_worker,
+            )
+
+    @classmethod
+    def shutdown_executor(cls) -> None:
+        if cls._executor is not None:
+            cls._executor.shutdown(cancel_futures=True)
+            cls._executor = None
+
+    @classmethod
+    def executor_stats(cls) -> dict[str, int]:
+        """
+        Returns:
+            dict[str, int]: The number of workers, the number of password jobs that haven't
+                finished and how many of those are waiting for a free worker
+        """
+        workers: int = cls._workers if cls._executor is not None else 0
+        return {
+            "workers": workers,
+            "in_flight": cls._in_flight,
+            "queue_depth": max(0, cls._in_flight - workers),
+        }
+
+    @classmethod
+    async def _run(cls, func: Callable[..., T], *args: Any) -> T:
+        if cls._executor is None:
+            return await run_in_threadpool(func, *args)
+
+        cls._in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(cls._executor, func, *args)
+        finally:
+            cls._in_flight -= 1
 
     @classmethod
     def hash(cls, password: str) -> str:
@@ -25,7 +109,26 @@ class PasswordSecurity:
         Returns:
             str: The salted and hashed password
         """
-        return cls._context.hash(password)
+        return _hash_password(password)
+
+    @classmethod
+    async def hash_async(cls, password: str) -> str:
+        """
+        Same as hash(), but runs on the password process pool if it is enabled
+        """
+        return await cls._run(_hash_password, password)
+
+    @classmethod
+    async def verify_async(cls, password: str, hashed_password: str) -> bool:
+        """
+        Args:
+            password (str): The cleartext password
+            hashed_password (str): The salted and hashed password
+
+        Returns:
+            bool: True if the password matches the hash; otherwise False
+        """
+        return await cls._run(_verify_password, password, hashed_password)
 
     @classmethod
     def create_user(cls, username: str, password: str, db: Session) -> bool:
@@ -40,28 +143,21 @@ class PasswordSecurity:
         Returns:
             bool: False if the username already exists in the database; otherwise True
         """
-        existing_user: User | None = db.exec(
-            select(User).where(User.username == username)
-        ).first()
-        if existing_user is not None:
+        if cls._get_user(username, db) is not None:
             return False
 
-        hashed_password = cls.hash(password)
+        return cls._add_user(username, cls.hash(password), db)
 
-        new_user: User
-        if db.exec(select(func.count(col(User.id)))).one() == 0:
-            new_user = User(
-                username=username, password=hashed_password, role=UserRoles.admin
-            )
-        else:
-            new_user = User(
-                username=username, password=hashed_password, role=UserRoles.user
-            )
+    @classmethod
+    async def create_user_async(cls, username: str, password: str, db: "Database") -> bool:
+        """
+        Same as create_user(), but awaits the password hash instead of blocking on it
+        """
+        if await db.run(cls._get_user, username) is not None:
+            return False
 
-        db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
-        return True
+        hashed_password: str = await cls.hash_async(password)
+        return await db.run(cls._add_user, username, hashed_password)
 
     @classmethod
     def authenticate(cls, username: str, password: str, db: Session) -> User | None:
@@ -76,105 +172,246 @@ class PasswordSecurity:
         Returns:
             User|None: The user if the username and password was found; otherwise None
         """
-        user: User | None = db.exec(
-            select(User).where(User.username == username)
-        ).first()
+        user: User | None = cls._get_user(username, db)
+
+        if user is None:
+            return None
+        elif not _verify_password(password, user.password):
+            return None
+        else:
+            return user
+
+    @classmethod
+    async def authenticate_async(cls, username: str, password: str, db: "Database") -> User | None:
+        """
+        Same as authenticate(), but awaits the password verification instead of blocking on it
+        """
+        user: User | None = await db.run(cls._get_user, username)
 
         if user is None:
             return None
-        elif not cls._context.verify(password, user.password):
+        elif not await cls.verify_async(password, user.password):
             return None
         else:
             return user
 
+    @staticmethod
+    def _get_user(username: str, db: Session) -> User | None:
+        return db.exec(select(User).where(User.username == username)).first()
+
+    @staticmethod
+    def _add_user(username: str, hashed_password: str, db: Session) -> bool:
+        new_user: User
+        if db.exec(select(func.count(col(User.id)))).one() == 0:
+            new_user = User(
+                username=username, password=hashed_password, role=UserRoles.admin
+            )
+        else:
+            new_user = User(
+                username=username, password=hashed_password, role=UserRoles.user
+            )
+
+        db.add(new_user)
+        try:
+            db.commit()
+        except IntegrityError:  # another request signed up with the same username first
+            db.rollback()
+            return False
+        db.refresh(new_user)
+        return True
+
+
+def _now_ms() -> int:
+    return time.time_ns() // 1_000_000
+
 
 class IdentitySecurity:
     class _JwtData(BaseModel):
         sub: str
         id: int
         exp: datetime
+        role: str
+        epoch: int  # the time the token was issued, in milliseconds
 
     _expiry_delta: timedelta = (
         timedelta(minutes=10)
         if os.getenv("APPLICATION_ENV") == "prod"
         else timedelta(hours=1)
     )
-    _algorithm: str = "HS256"
     _jwt_secret_key: str | None = os.getenv("JWT_SECRET_KEY")
+    _jwt_backend: jwt_backends.JwtBackend = jwt_backends.from_env()
+    # verified claims by token, so that a client sending the same token again skips verification
+    _jwt_cache: TTLCache[str, dict[str, Any]] = TTLCache(
+        maxsize=int(os.getenv("JWT_CACHE_SIZE", "4096")),
+        ttl=_expiry_delta.total_seconds(),
+    )
+    # (username, password, role) by user ID. The cache is per process: users that change in
+    # another process are dropped when the change is read from the revocation table
+    _user_cache: TTLCache[int, tuple[str, str, UserRoles]] = TTLCache(
+        maxsize=int(os.getenv("USER_CACHE_SIZE", "1024")),
+        ttl=float(os.getenv("USER_CACHE_TTL_SECONDS", "10")),
+    )
+    _sweep_interval: float = float(os.getenv("REFRESH_TOKEN_SWEEP_SECONDS", "3600"))
+    _sweep_batch_size: int = int(os.getenv("REFRESH_TOKEN_SWEEP_BATCH_SIZE", "1000"))
+    _sweeper: "asyncio.Task[None] | None" = None
+    _sweep_stats: dict[str, int] = {"sweeps": 0, "purged": 0, "last_purged": 0, "errors": 0}
+
+    # in stateless mode the user comes from the JWT's claims, unless the user's tokens were revoked
+    _stateless: bool = _access_token_mode == "stateless"
+    _revocation_refresh_interval: float = float(os.getenv("REVOCATION_REFRESH_SECONDS", "5"))
+    _min_epochs: dict[int, int] = {}
+    _deleted_users: BloomFilter = BloomFilter(
+        bits=int(os.getenv("DELETED_USER_FILTER_BITS", str(2**20))),
+        hashes=int(os.getenv("DELETED_USER_FILTER_HASHES", "7")),
+    )
+    _revocations_lock = threading.Lock()
+    _revocations_seen: int = 0
+    _revocation_refresher: "asyncio.Task[None] | None" = None
+    _access_token_stats: dict[str, int] = {"from_claims": 0, "fallbacks": 0, "revoked": 0, "refreshes": 0, "refresh_errors": 0}
+
+    @staticmethod
+    def _digest(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
 
     @classmethod
-    def create_refresh_token(cls, user: User, db: Session) -> RefreshToken:
+    def create_refresh_token(cls, user: User, db: Session) -> tuple[str, RefreshToken]:
         """
-        Creates a refresh token and adds it to the database.
+        Creates a refresh token and adds its digest to the database.
 
         Args:
             user (User): The user to add the token to
             db (Session): The database session
 
         Returns:
-            RefreshToken: The newly created refresh token
+            tuple[str, RefreshToken]: The token to send to the client and the newly created database row
         """
-        assert user.id is not None
-        token = RefreshToken(token=secrets.token_hex(32), user_id=user.id)
-        db.add(token)
+        token, refresh_token = cls._add_refresh_token(user, db)
         db.commit()
-        db.refresh(token)
-
-        return token
+        return token, refresh_token
 
     @classmethod
     def rotate_refresh_token(
-        cls, token: RefreshToken, db: Session
-    ) -> tuple[RefreshToken, str]:
+        cls, token: str | None, db: Session
+    ) -> tuple[str, RefreshToken, str] | None:
         """
-        Deletes the old refresh token and creates a new one. Also generates a new JWT string.
+        Replaces the refresh token with a new one and generates a new JWT string, in one
+        transaction. The old token is deleted with the same statement that checks it, so
+        concurrent requests can't both use it.
 
         Args:
-            token (RefreshToken): The validated refresh token
+            token (str|None): The refresh token sent by the client
             db (Session): The database session
 
         Returns:
-            tuple[RefreshToken, str]: The refresh token and the JWT string
+            tuple[str, RefreshToken, str]|None: The new refresh token, its database row and the
+                JWT string if the token exists and isn't expired; otherwise None
         """
-        user: User | None = db.get(User, token.user_id)
-        assert user is not None
+        if token is None:
+            return None
+
+        user_id: int | None = db.exec(  # type: ignore[call-overload]
+            sa.delete(RefreshToken)
+            .where(col(RefreshToken.token) == cls._digest(token))
+            .where(col(RefreshToken.expiry) > datetime.now(tz=timezone.utc))
+            .returning(col(RefreshToken.user_id))
+        ).scalar()
+        user: User | None = db.get(User, user_id) if user_id is not None else None
+        if user is None:
+            db.rollback()
+            return None
 
-        cls.remove_refresh_token(token, db)
-        new_refresh_token: RefreshToken = cls.create_refresh_token(user, db)
-        return (new_refresh_token, cls.create_access_token(user))
+        new_token, new_refresh_token = cls._add_refresh_token(user, db)
+        db.commit()
+        return new_token, new_refresh_token, cls.create_access_token(user)
 
     @classmethod
-    def remove_refresh_token(cls, token: RefreshToken, db: Session) -> None:
-        db.delete(token)
-        db.commit()
+    def _add_refresh_token(cls, user: User, db: Session) -> tuple[str, RefreshToken]:
+        assert user.id is not None
+        token: str = secrets.token_hex(32)
+        refresh_token = RefreshToken(token=cls._digest(token), user_id=user.id)
+        db.add(refresh_token)
+        db.flush()
+        return token, refresh_token
 
     @classmethod
-    def validate_refresh_token(
-        cls, token: str | None, db: Session
-    ) -> RefreshToken | None:
+    def start_sweeper(cls, open_database: Callable[[], AsyncContextManager["Database"]]) -> None:
         """
-        Finds the refresh token in the database
+        Starts a background task that deletes expired refresh tokens every
+        REFRESH_TOKEN_SWEEP_SECONDS, unless it is 0
 
         Args:
-            token (str|None): The refresh token in question
-            db (Session): The database session
+            open_database: Opens a database session outside of a request
+        """
+        if cls._sweep_interval > 0 and cls._sweeper is None:
+            cls._sweeper = asyncio.create_task(cls._sweep_forever(open_database))
 
-        Returns:
-            RefreshToken|None: The refresh token if it exists and isn't expired; otherwise None
+    @classmethod
+    async def stop_sweeper(cls) -> None:
+        if cls._sweeper is not None:
+            cls._sweeper.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await cls._sweeper
+            cls._sweeper = None
+
+    @classmethod
+    async def purge_expired_refresh_tokens(cls, db: "Database") -> int:
         """
-        if token is None:
-            return None
+        Deletes the expired refresh tokens, one batch per transaction so that
+        requests can use the database in between
 
-        refresh_token: RefreshToken | None = db.get(RefreshToken, token)
-        if refresh_token is None:
-            return None
+        Args:
+            db (Database): The database
 
-        expiry: datetime = convert_expiry_to_utc(refresh_token)
-        now: datetime = datetime.now(tz=timezone.utc)
-        if now > expiry:
-            return None
+        Returns:
+            int: The number of tokens deleted
+        """
+        purged: int = 0
+        while True:
+            deleted: int = await db.run(cls._purge_expired_batch, cls._sweep_batch_size)
+            purged += deleted
+            if deleted < cls._sweep_batch_size:
+                break
+
+        cls._sweep_stats["sweeps"] += 1
+        cls._sweep_stats["purged"] += purged
+        cls._sweep_stats["last_purged"] = purged
+        return purged
+
+    @classmethod
+    def sweeper_stats(cls) -> dict[str, int]:
+        """
+        Returns:
+            dict[str, int]: The number of sweeps, tokens purged in total and by the
+                last sweep, and sweeps that failed
+        """
+        return dict(cls._sweep_stats)
 
-        return refresh_token
+    @classmethod
+    async def _sweep_forever(cls, open_database: Callable[[], AsyncContextManager["Database"]]) -> None:
+        while True:
+            try:
+                async with open_database() as db:
+                    await cls.purge_expired_refresh_tokens(db)
+            except Exception:
+                cls._sweep_stats["errors"] += 1
+                logging.getLogger(__name__).exception("Could not purge expired refresh tokens")
+            await asyncio.sleep(cls._sweep_interval)
+
+    @staticmethod
+    def _purge_expired_batch(batch_size: int, db: Session) -> int:
+        # the subquery is a range scan on the expiry index
+        expired = (
+            select(col(RefreshToken.token))
+            .where(col(RefreshToken.expiry) <= datetime.now(tz=timezone.utc))
+            .limit(batch_size)
+        )
+        deleted: int = db.exec(  # type: ignore[call-overload]
+            sa.delete(RefreshToken)
+            .where(col(RefreshToken.token).in_(expired))
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        return deleted
 
     @classmethod
     def create_access_token(cls, user: User) -> str:
@@ -188,31 +425,253 @@ class IdentitySecurity:
                 sub=user.username,
                 id=user.id,
                 exp=datetime.now(tz=timezone.utc) + cls._expiry_delta,
+                role=user.role.value,
+                epoch=_now_ms(),
             )
         )
-        return jwt.encode(encode, cls._jwt_secret_key, algorithm=cls._algorithm)
+        return cls._jwt_backend.encode(encode, cls._jwt_secret_key)
 
     @classmethod
     def get_user_from_jwt(cls, token: str, db: Session) -> User | None:
-        """ """
+        """
+        Resolves the user that the JWT belongs to. Users are served from an in-process
+        cache when possible so that most requests don't need a database round trip.
+
+        In stateless mode (ACCESS_TOKEN_MODE=stateless) the user is built from the token's
+        claims without any cache or database lookup, unless the token was issued before the
+        user's tokens were revoked, or the user might have been deleted.
+
+        Args:
+            token (str): The JWT string
+            db (Session): The database session
+
+        Returns:
+            User|None: The user if the token is valid and the user exists; otherwise None
+        """
         if cls._jwt_secret_key is None:
             raise RuntimeError("Server does not have JWT secret key setting set")
         id: int
         username: str
+        exp: float
+        payload: dict[str, Any] | None = cls._verify(token, cls._jwt_secret_key)
+        if payload is None:
+            return None
         try:
-            payload: dict = jwt.decode(
-                token, cls._jwt_secret_key, algorithms=[cls._algorithm]
-            )
             id = int(payload["id"])
             username = payload["sub"]
-        except JWTError:
-            return None
+            exp = float(payload["exp"])
         except KeyError:
             return None
         except ValueError:
             return None
 
+        if cls._stateless and "epoch" in payload and "role" in payload:
+            try:
+                epoch: int = int(payload["epoch"])
+                claimed_role: UserRoles = UserRoles(payload["role"])
+            except ValueError:
+                return None
+            if epoch < cls._min_epochs.get(id, 0):
+                cls._access_token_stats["revoked"] += 1
+                return None
+            if id not in cls._deleted_users:
+                cls._access_token_stats["from_claims"] += 1
+                return cls._claimed_user(id, username, claimed_role)
+            cls._access_token_stats["fallbacks"] += 1
+
+        cached: tuple[str, str, UserRoles] | None = cls._user_cache.get(id)
+        if cached is not None and cached[0] == username:
+            _, password, role = cached
+            return cls._detached_user(id, username, password, role)
+
         user: User | None = db.exec(
             select(User).where(User.username == username).where(User.id == id)
         ).first()
+        if user is not None:
+            expires_at: float = time.monotonic() + (exp - time.time())
+            cls._user_cache.set(id, (user.username, user.password, user.role), expires_at)
+        return user
+
+    @classmethod
+    def _verify(cls, token: str, key: str) -> dict[str, Any] | None:
+        """
+        Returns:
+            dict|None: The token's claims if it's valid and hasn't expired; otherwise None. The
+                claims of valid tokens are cached until they expire, and must not be modified
+        """
+        cached: dict[str, Any] | None = cls._jwt_cache.get(token)
+        if cached is not None:
+            return cached
+
+        try:
+            payload: dict[str, Any] = cls._jwt_backend.decode(token, key)
+        except jwt_backends.InvalidTokenError:
+            return None
+        exp: Any = payload.get("exp")
+        if isinstance(exp, (int, float)):
+            cls._jwt_cache.set(token, payload, time.monotonic() + (exp - time.time()))
+        return payload
+
+    @classmethod
+    def jwt_cache_stats(cls) -> dict[str, int]:
+        return cls._jwt_cache.stats()
+
+    @classmethod
+    def forget_user(cls, user: User) -> None:
+        """
+        Removes the user from this process's user cache. Must be called whenever the user's
+        password or role changes or the user is deleted, after the change is committed. Other
+        processes are told through announce_change() or revoke_tokens().
+
+        Args:
+            user (User): The user to remove
+        """
+        assert user.id is not None
+        cls._user_cache.delete(user.id)
+
+    @classmethod
+    def user_cache_stats(cls) -> dict[str, int]:
+        return cls._user_cache.stats()
+
+    @classmethod
+    def revoke_tokens(cls, user: User, db: Session, deleted: bool = False) -> None:
+        """
+        Invalidates the access tokens that were issued to the user so far. Must be called
+        whenever the user's role changes or the user is deleted, since stateless mode trusts
+        the role in the token. Doesn't commit, so that the revocation is saved in the same
+        transaction as the change.
+
+        Args:
+            user (User): The user whose tokens to revoke
+            db (Session): The database session
+            deleted (bool): Whether the user is being deleted
+        """
+        assert user.id is not None
+        revocation = TokenRevocation(user_id=user.id, min_epoch=_now_ms(), deleted=deleted)
+        db.add(revocation)
+        db.flush()
+        # other servers pick this up on their next refresh_revocations()
+        cls._apply_revocations([revocation])
+
+    @classmethod
+    def announce_change(cls, user: User, db: Session) -> None:
+        """
+        Tells the other server processes to drop the user from their user caches, without
+        revoking the user's tokens. Must be called whenever the user's password changes.
+        Doesn't commit, so that the announcement is saved in the same transaction as the change.
+
+        Args:
+            user (User): The user that changed
+            db (Session): The database session
+        """
+        assert user.id is not None
+        db.add(TokenRevocation(user_id=user.id, min_epoch=0))
+        db.flush()
+
+    @classmethod
+    def refresh_revocations(cls, db: Session) -> int:
+        """
+        Reads the revocations that were added since the last refresh, by any server
+
+        Args:
+            db (Session): The database session
+
+        Returns:
+            int: The number of new revocations
+        """
+        revocations: Sequence[TokenRevocation] = db.exec(
+            select(TokenRevocation)
+            .where(col(TokenRevocation.id) > cls._revocations_seen)
+            .order_by(col(TokenRevocation.id))
+        ).all()
+        cls._apply_revocations(revocations)
+        if len(revocations) > 0:
+            assert revocations[-1].id is not None
+            cls._revocations_seen = revocations[-1].id
+        cls._access_token_stats["refreshes"] += 1
+        return len(revocations)
+
+    @classmethod
+    async def start_revocation_refresh(cls, open_database: Callable[[], AsyncContextManager["Database"]]) -> None:
+        """
+        Loads every revocation, then starts a background task that reads new ones every
+        REVOCATION_REFRESH_SECONDS. A revocation made by another server process takes up to
+        that long to apply here, both to stateless tokens and to the user cache.
+
+        Args:
+            open_database: Opens a database session outside of a request
+        """
+        if cls._revocation_refresher is not None:
+            return
+
+        async with open_database() as db:
+            await db.run(cls.refresh_revocations)
+        cls._revocation_refresher = asyncio.create_task(cls._refresh_revocations_forever(open_database))
+
+    @classmethod
+    async def stop_revocation_refresh(cls) -> None:
+        if cls._revocation_refresher is not None:
+            cls._revocation_refresher.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await cls._revocation_refresher
+            cls._revocation_refresher = None
+
+    @classmethod
+    def access_token_stats(cls) -> dict[str, int]:
+        """
+        Returns:
+            dict[str, int]: Whether stateless mode is on, how many tokens were resolved from
+                their claims, fell back to the user cache or database, or were revoked, the
+                number of users with revoked tokens, and the revocation refresh counters
+        """
+        return {
+            "stateless": int(cls._stateless),
+            **cls._access_token_stats,
+            "revoked_users": len(cls._min_epochs),
+            "deleted_users": cls._deleted_users.size,
+        }
+
+    @classmethod
+    async def _refresh_revocations_forever(cls, open_database: Callable[[], AsyncContextManager["Database"]]) -> None:
+        while True:
+            await asyncio.sleep(cls._revocation_refresh_interval)
+            try:
+                async with open_database() as db:
+                    await db.run(cls.refresh_revocations)
+            except Exception:
+                cls._access_token_stats["refresh_errors"] += 1
+                logging.getLogger(__name__).exception("Could not refresh token revocations")
+
+    @classmethod
+    def _apply_revocations(cls, revocations: Iterable[TokenRevocation]) -> None:
+        with cls._revocations_lock:
+            for revocation in revocations:
+                cls._user_cache.delete(revocation.user_id)
+                if revocation.deleted:
+                    # tokens of possibly deleted users are checked against the database instead,
+                    # so that the epochs of deleted users don't have to be kept
+                    cls._deleted_users.add(revocation.user_id)
+                    cls._min_epochs.pop(revocation.user_id, None)
+                elif revocation.min_epoch > 0:
+                    cls._min_epochs[revocation.user_id] = max(cls._min_epochs.get(revocation.user_id, 0), revocation.min_epoch)
+
+    @staticmethod
+    def _claimed_user(id: int, username: str, role: UserRoles) -> User:
+        """
+        Builds a detached user from the token's claims. The password isn't in the token, so
+        it's left unloaded and is only read from the database if the user is added to a session.
+        """
+        user = User(id=id, username=username, role=role)
+        make_transient_to_detached(user)
+        return user
+
+    @staticmethod
+    def _detached_user(id: int, username: str, password: str, role: UserRoles) -> User:
+        """
+        Builds a fresh User for each request so that cached data is never shared between
+        sessions. The user is marked as detached so that it can still be added to or
+        deleted from a session like a user that was loaded from the database.
+        """
+        user = User(id=id, username=username, password=password, role=role)
+        make_transient_to_detached(user)
         return user
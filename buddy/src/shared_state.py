@@ -0,0 +1,70 @@
+import os
+from multiprocessing import AuthenticationError
+from multiprocessing.managers import BaseManager, RemoteError
+from typing import Any
+
+
+class _Manager(BaseManager):
+    pass
+
+
+def _settings() -> tuple[str | tuple[str, int], bytes]:
+    authkey: str | None = os.getenv("SHARED_STATE_AUTHKEY")
+    if authkey is None:
+        raise RuntimeError("SHARED_STATE_AUTHKEY is not an environment variable")
+    # a Unix socket path, or host:port. Unix sockets are much faster here: over TCP, messages
+    # bigger than 16 KiB are sent in two writes and wait out the peer's delayed ACK
+    address: str = os.getenv("SHARED_STATE_ADDRESS", "/tmp/buddy-shared-state.sock")
+    if address.startswith("/"):
+        return address, authkey.encode()
+    host, _, port = address.rpartition(":")
+    return (host, int(port)), authkey.encode()
+
+
+class SharedObject:
+    """
+    A proxy to one of the objects kept in the shared state process, which is started with
+    'run.py shared-state' and listens on SHARED_STATE_ADDRESS. Every call is a round trip over a
+    socket. If the process can't be reached, rejects SHARED_STATE_AUTHKEY or raises in the call,
+    calls return None and are counted as errors, so that callers fall back
+    """
+
+    def __init__(self, name: str) -> None:
+        """
+        Args:
+            name (str): The name the object is served under
+        """
+        self.name: str = name
+        self.errors: int = 0
+        self._address, self._authkey = _settings()
+        self._proxy: Any = None
+
+    def call(self, method: str, *args: Any) -> Any:
+        try:
+            if self._proxy is None:
+                _Manager.register(self.name)
+                manager = _Manager(address=self._address, authkey=self._authkey)
+                manager.connect()
+                self._proxy = getattr(manager, self.name)()
+            return getattr(self._proxy, method)(*args)
+        except (OSError, EOFError, AuthenticationError, RemoteError):
+            self._proxy = None
+            self.errors += 1
+            return None
+
+
+def serve() -> None:
+    """
+    Runs the shared state process with the objects that the 'manager' backends of budget_cache
+    and rate_limit connect to. Blocks until the process is stopped
+    """
+    from buddy.src import budget_cache, rate_limit
+
+    objects: dict[str, Any] = {"budget_cache": budget_cache.shared_cache(), "rate_limit": rate_limit.shared_buckets()}
+    for name, obj in objects.items():
+        _Manager.register(name, callable=lambda obj=obj: obj)
+
+    address, authkey = _settings()
+    if isinstance(address, str) and os.path.exists(address):
+        os.unlink(address)  # left behind by a process that was killed
+    _Manager(address=address, authkey=authkey).get_server().serve_forever()
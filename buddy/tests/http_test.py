@@ -1,3 +1,4 @@
+import random
 import unittest
 import requests
 from buddy.tests._env import ServerSettings
@@ -102,6 +103,22 @@ class HttpTestCase(unittest.TestCase):
 
         return (access_token, refresh_token)
 
+    @classmethod
+    def signup_and_login(cls, prefix: str) -> AccessTokenDto:
+        """
+        Signs up a new user, for tests that need to start with no rows
+
+        Args:
+            prefix (str): The start of the username. A random number is added to it
+
+        Returns:
+            AccessTokenDto: The new user's access token
+        """
+        username: str = f"{prefix}{random.randint(1, 10**9)}"
+        cls.signup(Signup(username=username, password="password"))
+        access_token, _ = cls.login(Login(username=username, password="password"))
+        return access_token
+
 
 
 class RepoTestCase(HttpTestCase):
@@ -0,0 +1,362 @@
+import csv
+import gzip
+import io
+import json
+import random
+import requests
+from pydantic import BaseModel, ValidationError
+from requests import Response
+from buddy.dtos import AccessTokenDto, AccountingExpenseDto, AccountingIncomeDto, CategorySummaryDto, DeleteReport, ImportReport, MonthlySummaryDto, NewAccountingExpense, NewAccountingIncome, DeleteAccountingExpense, UserDto
+from buddy.tests._env import ServerSettings
+from buddy.tests.http_test import RepoTestCase
+
+
+class TestCreateAccountingExpense(RepoTestCase):
+    def test_create_new(self) -> None:
+        send_expense = NewAccountingExpense(expense_type="Groceries", amount=54.2, date="2024-03-02", description="Weekly groceries")
+        response = self.post(path="/accounting/expenses/me", body=send_expense, access_token=self.access1)
+
+        self.assertOk(response.status_code, msg=f"Server response: {response.json()}")
+        try:
+            recv_expense: AccountingExpenseDto = AccountingExpenseDto.model_validate(response.json())
+        except ValidationError:
+            self.fail(f"Did not recieve an expense after creating a new one. Server response: {response.json()}")
+
+        self.assertEqual(send_expense.expense_type, recv_expense.expense_type)
+
+
+    def test_user_cannot_create_same_expense_on_same_date(self) -> None:
+        expense = NewAccountingExpense(expense_type="Some Accounting Expense", amount=10, date="2024-03-03", description=None)
+        response1 = self.post(path="/accounting/expenses/me", body=expense, access_token=self.access1)
+        response2 = self.post(path="/accounting/expenses/me", body=expense, access_token=self.access1)
+
+        self.assertOk(response1.status_code)
+        self.assertClientError(response2.status_code)
+
+
+class TestReadAccounting(RepoTestCase):
+    suffix: str
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.suffix = str(random.randint(1, 10**9))
+        cls.post(path="/accounting/expenses/me", body=NewAccountingExpense(expense_type=f"Apartment Rent {cls.suffix}", amount=1500, date="2024-01-01", description="Rent for the apartment"),
+                 access_token=cls.access1)
+        cls.post(path="/accounting/expenses/me", body=NewAccountingExpense(expense_type=f"Car Payment {cls.suffix}", amount=300, date="2024-01-05", description=None),
+                 access_token=cls.access2)
+        cls.post(path="/accounting/income/me", body=NewAccountingIncome(income_type=f"Paycheck {cls.suffix}", amount=2000, date="2024-01-15"),
+                 access_token=cls.access1)
+
+
+    def test_user_read(self) -> None:
+        dtos: list[tuple[str, type[BaseModel]]] = [("/accounting/expenses/me", AccountingExpenseDto), ("/accounting/income/me", AccountingIncomeDto)]
+        for path, dto in dtos:
+            response: Response = self.get(path=path, access_token=self.access1)
+            self.assertOk(response.status_code)
+
+            objects: list = response.json()
+            self.assertIsInstance(objects, list, f"Did not receive a list. Server response: {response.json()}")
+            for obj in objects:
+                try:
+                    dto.model_validate(obj)
+                except ValidationError:
+                    self.fail(f"Did not receive list of {dto.__name__}s. Server response: {response.json()}")
+
+
+    def test_get_by_user_id(self) -> None:
+        user1_id: int = UserDto.model_validate(self.get(path="/users/me", access_token=self.access1).json()).id
+        response: Response = self.get(path=f"/accounting/expenses/user/{user1_id}", access_token=self.admin_access)
+        self.assertOk(response.status_code)
+
+        types: list[str] = [AccountingExpenseDto.model_validate(obj).expense_type for obj in response.json()]
+        self.assertIn(f"Apartment Rent {self.suffix}", types)
+
+
+    def test_get_by_type(self) -> None:
+        response: Response = self.get(path=f"/accounting/expenses/type/rent {self.suffix}", access_token=self.admin_access)
+        self.assertOk(response.status_code)
+
+        types: list[str] = [AccountingExpenseDto.model_validate(obj).expense_type for obj in response.json()]
+        self.assertEqual(types, [f"Apartment Rent {self.suffix}"])
+
+
+    def test_get_by_description(self) -> None:
+        response: Response = self.get(path="/accounting/expenses/description/FOR THE APART", access_token=self.admin_access)
+        self.assertOk(response.status_code)
+
+        types: list[str] = [AccountingExpenseDto.model_validate(obj).expense_type for obj in response.json()]
+        self.assertIn(f"Apartment Rent {self.suffix}", types)
+
+
+    def test_get_by_type_as_ndjson(self) -> None:
+        response: Response = requests.get(ServerSettings.BASE_URL + f"/accounting/expenses/type/rent {self.suffix}",
+                                          headers={"Authorization": "Bearer " + self.admin_access.access_token, "Accept": "application/x-ndjson"})
+        self.assertOk(response.status_code)
+        self.assertTrue(response.headers["Content-Type"].startswith("application/x-ndjson"))
+
+        types: list[str] = [AccountingExpenseDto.model_validate(json.loads(line)).expense_type for line in response.text.splitlines()]
+        self.assertEqual(types, [f"Apartment Rent {self.suffix}"])
+
+
+    def test_get_by_type_as_user(self) -> None:
+        response: Response = self.get(path="/accounting/expenses/type/rent", access_token=self.access1)
+        self.assertClientError(response.status_code)
+
+
+class TestDeleteAccountingExpense(RepoTestCase):
+    def test_delete(self) -> None:
+        self.post(path="/accounting/expenses/me", body=NewAccountingExpense(expense_type="deleteme", amount=12.9, date="2024-02-01", description=None),
+                  access_token=self.access1)
+
+        response: Response = self.delete(path="/accounting/expenses/me/", body=DeleteAccountingExpense(expense_type="deleteme", date="2024-02-01"), access_token=self.access1)
+        self.assertOk(response.status_code)
+
+
+    def test_delete_nonexistant_expense(self) -> None:
+        response: Response = self.delete(path="/accounting/expenses/me/", body=DeleteAccountingExpense(expense_type="doesnotexist", date="2024-02-01"), access_token=self.access1)
+        self.assertNotFound(response.status_code)
+
+
+class TestPaginateAccounting(RepoTestCase):
+    suffix: str
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.suffix = str(random.randint(1, 10**9))
+        for day in range(1, 6):
+            cls.post(path="/accounting/expenses/me", body=NewAccountingExpense(expense_type=f"Pages {cls.suffix}", amount=day, date=f"2024-04-0{day}", description=None),
+                     access_token=cls.access1 if day % 2 == 0 else cls.access2)
+
+
+    def test_pages_cover_every_row_once(self) -> None:
+        dates: list[str] = []
+        cursor: str | None = None
+        for _ in range(3):
+            path: str = f"/accounting/expenses/type/pages {self.suffix}?limit=2" + (f"&cursor={cursor}" if cursor is not None else "")
+            response: Response = self.get(path=path, access_token=self.admin_access)
+            self.assertOk(response.status_code)
+
+            dates += [str(AccountingExpenseDto.model_validate(obj).date) for obj in response.json()]
+            cursor = response.headers.get("X-Next-Cursor")
+
+        self.assertEqual(dates, [f"2024-04-0{day}" for day in range(1, 6)])
+        self.assertIsNone(cursor)
+
+
+    def test_without_limit_returns_everything(self) -> None:
+        response: Response = self.get(path=f"/accounting/expenses/type/pages {self.suffix}", access_token=self.admin_access)
+        self.assertOk(response.status_code)
+        self.assertEqual(len(response.json()), 5)
+        self.assertNotIn("X-Next-Cursor", response.headers)
+
+
+    def test_invalid_cursor(self) -> None:
+        for cursor in ["not-a-cursor", "WyIyMDI0LTA0LTAxIl0="]:  # the second is a valid cursor with too few values
+            response: Response = self.get(path=f"/accounting/expenses/me?limit=2&cursor={cursor}", access_token=self.access1)
+            self.assertClientError(response.status_code)
+
+
+class TestImportAccounting(RepoTestCase):
+    def _post_file(self, path: str, content_type: str, body: str) -> Response:
+        return requests.post(ServerSettings.BASE_URL + path, data=body.encode(),
+                             headers={"Authorization": "Bearer " + self.access1.access_token, "Content-Type": content_type})
+
+
+    def test_import_csv(self) -> None:
+        suffix: str = str(random.randint(1, 10**9))
+        body: str = (
+            "expense_type,amount,date,description\n"
+            f"imported {suffix},10.50,2024-05-01,\"Line one\nline two\"\n"
+            f"Imported {suffix},10.50,2024-05-01,\n"
+            f"imported {suffix},oops,2024-05-02,\n"
+            f"imported {suffix},12,2024-05-03,\n"
+        )
+        response: Response = self._post_file("/accounting/expenses/me/import", "text/csv", body)
+        self.assertOk(response.status_code, msg=f"Server response: {response.json()}")
+
+        report: ImportReport = ImportReport.model_validate(response.json())
+        self.assertEqual((report.created, report.duplicates, report.errors), (2, 1, 1))
+        self.assertEqual([(row.row, row.status) for row in report.rows], [(2, "duplicate"), (3, "error")])
+
+        response = self.get(path=f"/accounting/expenses/type/imported {suffix}", access_token=self.admin_access)
+        descriptions: list[str | None] = [AccountingExpenseDto.model_validate(obj).description for obj in response.json()]
+        self.assertEqual(descriptions, ["Line one\nline two", None])
+
+
+    def test_import_csv_with_byte_order_mark(self) -> None:
+        suffix: str = str(random.randint(1, 10**9))
+        body: str = f"\ufeffexpense_type,amount,date\r\nimported {suffix},3.20,2024-05-01\r\n"
+        response: Response = self._post_file("/accounting/expenses/me/import", "text/csv", body)
+        self.assertOk(response.status_code, msg=f"Server response: {response.json()}")
+
+        report: ImportReport = ImportReport.model_validate(response.json())
+        self.assertEqual((report.created, report.duplicates, report.errors), (1, 0, 0))
+
+
+    def test_import_ndjson(self) -> None:
+        suffix: str = str(random.randint(1, 10**9))
+        body: str = (
+            f'{{"income_type": "Imported {suffix}", "amount": 100, "date": "2024-05-01"}}\n'
+            f'{{"income_type": "Imported {suffix}", "amount": 100, "date": "2024-05-32"}}\n'
+            "not json\n"
+        )
+        response: Response = self._post_file("/accounting/income/me/import", "application/x-ndjson", body)
+        self.assertOk(response.status_code, msg=f"Server response: {response.json()}")
+
+        report: ImportReport = ImportReport.model_validate(response.json())
+        self.assertEqual((report.created, report.duplicates, report.errors), (1, 0, 2))
+
+
+    def test_import_unsupported_type(self) -> None:
+        response: Response = self._post_file("/accounting/expenses/me/import", "application/xml", "<expenses/>")
+        self.assertEqual(response.status_code, 415)
+
+
+class TestExportAccounting(RepoTestCase):
+    suffix: str
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.suffix = str(random.randint(1, 10**9))
+        cls.post(path="/accounting/expenses/me", body=NewAccountingExpense(expense_type=f"Exported {cls.suffix}", amount=20, date="2024-06-01", description='a, "quoted" description'),
+                 access_token=cls.access3)
+
+
+    def _export(self, path: str, access_token) -> Response:
+        return requests.get(ServerSettings.BASE_URL + path, headers={"Authorization": "Bearer " + access_token.access_token})
+
+
+    def test_export_csv(self) -> None:
+        response: Response = self._export("/accounting/export", self.access3)
+        self.assertOk(response.status_code)
+        self.assertTrue(response.headers["Content-Type"].startswith("text/csv"))
+
+        rows: list[list[str]] = list(csv.reader(io.StringIO(response.text)))
+        self.assertEqual(rows[0], ["record", "type", "date", "amount", "description"])
+        self.assertIn(["accounting_expense", f"Exported {self.suffix}", "2024-06-01", "20.00", 'a, "quoted" description'], rows)
+
+
+    def test_export_gzipped_ndjson_as_admin(self) -> None:
+        user3_id: int = UserDto.model_validate(self.get(path="/users/me", access_token=self.access3).json()).id
+        response: Response = self._export(f"/accounting/export/user/{user3_id}?format=ndjson&gzip=true", self.admin_access)
+        self.assertOk(response.status_code)
+
+        records: list[dict] = [json.loads(line) for line in gzip.decompress(response.content).decode().splitlines()]
+        self.assertIn(f"Exported {self.suffix}", [record.get("expense_type") for record in records])
+        self.assertTrue(all(record["user_id"] == user3_id for record in records))
+
+
+    def test_export_other_user_as_user(self) -> None:
+        response: Response = self._export("/accounting/export/user/1", self.access3)
+        self.assertClientError(response.status_code)
+
+    def test_export_nonexistent_user(self) -> None:
+        response: Response = self._export("/accounting/export/user/999999999", self.admin_access)
+        self.assertNotFound(response.status_code)
+
+
+class TestAccountingDateRange(RepoTestCase):
+    def test_start_and_end_are_inclusive(self) -> None:
+        suffix: str = str(random.randint(1, 10**9))
+        for date in ["2023-01-31", "2023-02-01", "2023-02-28", "2023-03-01"]:
+            self.post(path="/accounting/expenses/me", body=NewAccountingExpense(expense_type=f"Ranged {suffix}", amount=1, date=date, description=None),
+                      access_token=self.access2)
+
+        response: Response = self.get(path="/accounting/expenses/me?start=2023-02-01&end=2023-02-28", access_token=self.access2)
+        self.assertOk(response.status_code)
+
+        dates: list[str] = [str(AccountingExpenseDto.model_validate(obj).date) for obj in response.json()
+                            if obj["expense_type"] == f"Ranged {suffix}"]
+        self.assertEqual(dates, ["2023-02-01", "2023-02-28"])
+
+
+    def test_invalid_date(self) -> None:
+        response: Response = self.get(path="/accounting/income/me?start=2023-02-30", access_token=self.access2)
+        self.assertClientError(response.status_code)
+
+
+class TestAccountingSummary(RepoTestCase):
+    access: AccessTokenDto
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.access = cls.signup_and_login("summary")
+
+
+    def test_totals_follow_creates_imports_and_deletes(self) -> None:
+        self.post(path="/accounting/income/me", body=NewAccountingIncome(income_type="Salary", amount=3000, date="1999-01-15"), access_token=self.access)
+        self.post(path="/accounting/expenses/me", body=NewAccountingExpense(expense_type="Rent", amount=1000, date="1999-01-01", description=None), access_token=self.access)
+        self.post(path="/accounting/expenses/me", body=NewAccountingExpense(expense_type="Food", amount=100.25, date="1999-01-03", description=None), access_token=self.access)
+        self.post(path="/accounting/expenses/me", body=NewAccountingExpense(expense_type="Food", amount=50, date="1999-02-03", description=None), access_token=self.access)
+        requests.post(ServerSettings.BASE_URL + "/accounting/expenses/me/import", data=b"expense_type,amount,date\nfood,20,1999-01-04\nrent,1000,1999-01-01\n",
+                      headers={"Authorization": "Bearer " + self.access.access_token, "Content-Type": "text/csv"})
+        self.delete(path="/accounting/expenses/me/", body=DeleteAccountingExpense(expense_type="Food", date="1999-02-03"), access_token=self.access)
+
+        response: Response = self.get(path="/accounting/summary/me?start=1999-01&end=1999-12", access_token=self.access)
+        self.assertOk(response.status_code)
+        months: list[MonthlySummaryDto] = [MonthlySummaryDto.model_validate(obj) for obj in response.json()]
+        self.assertEqual([(month.month, float(month.income), float(month.expenses), float(month.net)) for month in months],
+                         [("1999-01", 3000, 1120.25, 1879.75)])
+
+        response = self.get(path="/accounting/summary/me/categories", access_token=self.access)
+        self.assertOk(response.status_code)
+        categories: list[CategorySummaryDto] = [CategorySummaryDto.model_validate(obj) for obj in response.json()]
+        self.assertEqual([(category.kind, category.category, float(category.total), category.entries) for category in categories],
+                         [("expense", "Food", 120.25, 2), ("expense", "Rent", 1000, 1), ("income", "Salary", 3000, 1)])
+
+
+    def test_invalid_month(self) -> None:
+        response: Response = self.get(path="/accounting/summary/me?start=1999-13", access_token=self.access)
+        self.assertClientError(response.status_code)
+
+
+    def test_other_user_as_user(self) -> None:
+        response: Response = self.get(path="/accounting/summary/user/1", access_token=self.access)
+        self.assertClientError(response.status_code)
+
+
+class TestDeleteAccountingRange(RepoTestCase):
+    access: AccessTokenDto
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.access = cls.signup_and_login("rangedelete")
+
+
+    def test_delete_month(self) -> None:
+        for day in ("1998-01-31", "1998-02-01", "1998-02-28", "1998-03-01"):
+            self.post(path="/accounting/expenses/me", body=NewAccountingExpense(expense_type="Food", amount=10, date=day, description=None), access_token=self.access)
+
+        response: Response = self.delete(path="/accounting/expenses/me/range?month=1998-02", access_token=self.access)
+        self.assertOk(response.status_code)
+        self.assertEqual(DeleteReport.model_validate(response.json()).deleted, 2)
+
+        response = self.get(path="/accounting/expenses/me?start=1998-01-01&end=1998-12-31", access_token=self.access)
+        self.assertEqual([expense["date"] for expense in response.json()], ["1998-01-31", "1998-03-01"])
+        response = self.get(path="/accounting/summary/me?start=1998-01&end=1998-12", access_token=self.access)
+        self.assertEqual([month["month"] for month in response.json()], ["1998-01", "1998-03"])
+
+
+    def test_delete_date_range(self) -> None:
+        for day in ("1997-05-01", "1997-05-02", "1997-05-03"):
+            self.post(path="/accounting/income/me", body=NewAccountingIncome(income_type="Salary", amount=10, date=day), access_token=self.access)
+
+        response: Response = self.delete(path="/accounting/income/me/range?start=1997-05-02&end=1997-05-10", access_token=self.access)
+        self.assertOk(response.status_code)
+        self.assertEqual(DeleteReport.model_validate(response.json()).deleted, 2)
+
+        response = self.get(path="/accounting/summary/me/categories?start=1997-05&end=1997-05", access_token=self.access)
+        self.assertEqual([(category["category"], float(category["total"]), category["entries"]) for category in response.json()],
+                         [("Salary", 10, 1)])
+
+
+    def test_range_required(self) -> None:
+        response: Response = self.delete(path="/accounting/expenses/me/range?start=1998-01-01", access_token=self.access)
+        self.assertClientError(response.status_code)
+        response = self.delete(path="/accounting/expenses/me/range?month=1998-01&start=1998-01-01&end=1998-01-02", access_token=self.access)
+        self.assertClientError(response.status_code)
@@ -1,7 +1,13 @@
+import asyncio
 import requests
 import random
+import unittest
+from unittest import mock
+from datetime import datetime, timedelta, timezone
 from pydantic import ValidationError
 from buddy.dtos import Signup, Login, AccessTokenDto, PasswordReset
+from buddy.src import jwt_backends
+from buddy.src.security import PasswordSecurity
 from buddy.tests.http_test import HttpTestCase
 from buddy.tests._env import ServerSettings
 
@@ -105,6 +111,15 @@ class TestRefresh(HttpTestCase):
         except ValidationError:
             pass
 
+class TestRefreshTokenSweeper(HttpTestCase):
+    def test_sweeper_runs_at_startup(self) -> None:
+        admin_access, _ = self.login(Login(username="admin", password="admin"))
+        response = self.get(path="/metrics", access_token=admin_access)
+        self.assertOk(response.status_code)
+        stats: dict = response.json()["refresh_token_sweeper"]
+        self.assertGreaterEqual(stats["sweeps"], 1, msg=f"Expired refresh tokens were not swept at startup. Metrics: {stats}")
+        self.assertEqual(stats["errors"], 0, msg=f"Sweeping refresh tokens failed. Metrics: {stats}")
+
 class TestChangePassword(HttpTestCase):
     def test_passwd(self) -> None:
         username: str = "username" + str(random.randint(1, 10**9))
@@ -119,3 +134,103 @@ class TestChangePassword(HttpTestCase):
 
 
 
+
+
+class TestJwtBackends(unittest.TestCase):
+    key: str = "secret"
+
+    def test_backends_agree(self) -> None:
+        claims: dict = {"sub": "user1", "id": 2, "exp": datetime.now(tz=timezone.utc) + timedelta(minutes=5)}
+        for encoder in jwt_backends.backends.values():
+            token: str = encoder().encode(claims, self.key)
+            for decoder in jwt_backends.backends.values():
+                payload: dict = decoder().decode(token, self.key)
+                self.assertEqual((payload["sub"], payload["id"]), ("user1", 2), msg=f"{decoder.__name__} could not decode a token from {encoder.__name__}")
+
+
+    def test_invalid_tokens(self) -> None:
+        expired: dict = {"sub": "user1", "id": 2, "exp": datetime.now(tz=timezone.utc) - timedelta(minutes=5)}
+        valid: dict = {"sub": "user1", "id": 2, "exp": datetime.now(tz=timezone.utc) + timedelta(minutes=5)}
+        for name, backend in jwt_backends.backends.items():
+            token: str = backend().encode(valid, self.key)
+            for invalid in [backend().encode(expired, self.key), backend().encode(valid, "other secret"), token[:-2], "not.a.token", "", "é.é.é"]:
+                with self.assertRaises(jwt_backends.InvalidTokenError, msg=f"{name} accepted '{invalid}'"):
+                    backend().decode(invalid, self.key)
+
+
+class TestPasswordExecutor(unittest.TestCase):
+    def test_threadpool(self) -> None:
+        hashed: str = asyncio.run(PasswordSecurity.hash_async("password"))
+        self.assertTrue(asyncio.run(PasswordSecurity.verify_async("password", hashed)))
+        self.assertFalse(asyncio.run(PasswordSecurity.verify_async("wrong", hashed)))
+        self.assertEqual(PasswordSecurity.executor_stats(), {"workers": 0, "in_flight": 0, "queue_depth": 0})
+
+    def test_process_pool_queue_depth(self) -> None:
+        async def verify_three(hashed: str) -> tuple[dict[str, int], list[bool]]:
+            jobs = [asyncio.ensure_future(PasswordSecurity.verify_async(password, hashed)) for password in ["password", "wrong", "password"]]
+            await asyncio.sleep(0)
+            # one job runs on the one worker, the others wait for it
+            stats: dict[str, int] = PasswordSecurity.executor_stats()
+            return stats, list(await asyncio.gather(*jobs))
+
+        with mock.patch.object(PasswordSecurity, "_workers", 1):
+            PasswordSecurity.start_executor()
+            try:
+                hashed: str = asyncio.run(PasswordSecurity.hash_async("password"))
+                stats, results = asyncio.run(verify_three(hashed))
+            finally:
+                PasswordSecurity.shutdown_executor()
+
+        self.assertEqual(stats, {"workers": 1, "in_flight": 3, "queue_depth": 2})
+        self.assertEqual(results, [True, False, True])
+        self.assertEqual(PasswordSecurity.executor_stats(), {"workers": 0, "in_flight": 0, "queue_depth": 0})
+
+class TestLoginRateLimit(HttpTestCase):
+    def _login(self, username: str, password: str, client: str | None = None) -> requests.Response:
+        headers = {"Content-Type": "application/x-www-form-urlencoded"}
+        if client is not None:
+            # uvicorn trusts X-Forwarded-For from 127.0.0.1
+            headers["X-Forwarded-For"] = client
+        return requests.post(ServerSettings.BASE_URL+"/token", headers=headers, data=f"username={username}&password={password}")
+
+    def test_failed_logins_are_limited(self) -> None:
+        username: str = "ratelimited" + str(random.randint(1, 10**9))
+        self.signup(Signup(username=username, password="password"))
+        for _ in range(5):
+            self.assertEqual(self._login(username, "wrong").status_code, 401)
+
+        for password in ["wrong", "password"]:
+            response = self._login(username, password)
+            self.assertEqual(response.status_code, 429, msg=f"Login was not rate limited. Server response: {response.json()}")
+            self.assertGreater(int(response.headers["Retry-After"]), 0)
+        # the limit is per username, not per spelling of it
+        self.assertEqual(self._login(username.upper(), "wrong").status_code, 429)
+
+    def test_failed_logins_from_another_client_do_not_lock_out_the_user(self) -> None:
+        username: str = "ratelimited" + str(random.randint(1, 10**9))
+        self.signup(Signup(username=username, password="password"))
+        attacker: str = f"203.0.113.{random.randint(1, 254)}"
+        for _ in range(5):
+            self.assertEqual(self._login(username, "wrong", attacker).status_code, 401)
+        self.assertEqual(self._login(username, "password", attacker).status_code, 429)
+
+        response = self._login(username, "password", f"198.51.100.{random.randint(1, 254)}")
+        self.assertOk(response.status_code, msg=f"The user was locked out by another client. Server response: {response.json()}")
+
+    def test_failed_logins_spread_across_clients_are_limited(self) -> None:
+        username: str = "ratelimited" + str(random.randint(1, 10**9))
+        self.signup(Signup(username=username, password="password"))
+        # the per client limit of the username is 5 and the username's limit is 20
+        for client in range(4):
+            for _ in range(5):
+                self.assertEqual(self._login(username, "wrong", f"203.0.113.{client + 1}").status_code, 401)
+
+        # the username's bucket refills a token every 3 seconds while the attempts above are hashed
+        status_codes: list[int] = [self._login(username, "wrong", f"198.51.100.{client + 1}").status_code for client in range(5)]
+        self.assertIn(429, status_codes, msg="Logins spread across clients were not rate limited")
+
+    def test_successful_logins_are_not_limited(self) -> None:
+        username: str = "ratelimited" + str(random.randint(1, 10**9))
+        self.signup(Signup(username=username, password="password"))
+        for _ in range(10):
+            self.assertOk(self._login(username, "password").status_code)
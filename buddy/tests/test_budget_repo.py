@@ -1,8 +1,10 @@
 import random
+import requests
 from pydantic import ValidationError
 from requests import Response
-from buddy.dtos import BudgetExpenseDto, NewBudgetExpense, UserDto
+from buddy.dtos import AccessTokenDto, BudgetExpenseDto, NewBudgetExpense, NewMonthlyIncome, UserDto
 from buddy.tests.http_test import RepoTestCase
+from buddy.tests._env import ServerSettings
 from buddy.dtos import BudgetExpenseDto
 
 
@@ -179,7 +181,86 @@ class TestDeleteExpense(BudgetRepoTestCase):
         self.assertNotFound(response.status_code)
 
 
+class TestConditionalGet(RepoTestCase):
+    access: AccessTokenDto
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.access = cls.signup_and_login("etag")
+
+
+    def _get(self, path: str, etag: str) -> Response:
+        return requests.get(ServerSettings.BASE_URL + path,
+                            headers={"Authorization": "Bearer " + self.access.access_token, "If-None-Match": etag})
+
+
+    def test_not_modified(self) -> None:
+        self.post(path="/budgeting/expenses/me", body=NewBudgetExpense(expense_type="Rent", amount=900, description=None), access_token=self.access)
+        response: Response = self.get(path="/budgeting/expenses/me", access_token=self.access)
+        etag: str = response.headers["ETag"]
+        self.assertEqual(self.get(path="/budgeting/expenses/me", access_token=self.access).headers["ETag"], etag)
+
+        response = self._get("/budgeting/expenses/me", etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers["ETag"], etag)
+        self.assertEqual(self._get("/budgeting/expenses/me", f'"other", {etag.removeprefix("W/")}').status_code, 304)
+        self.assertEqual(self._get("/budgeting/expenses/me", "*").status_code, 304)
+        self.assertOk(self._get("/budgeting/expenses/me?limit=1", etag).status_code)
+
+
+    def test_writes_change_etag(self) -> None:
+        self.post(path="/budgeting/income/me", body=NewMonthlyIncome(income_type="Salary", amount=100), access_token=self.access)
+        etag: str = self.get(path="/budgeting/income/me", access_token=self.access).headers["ETag"]
+        expenses_etag: str = self.get(path="/budgeting/expenses/me", access_token=self.access).headers["ETag"]
+
+        self.post(path="/budgeting/income/me", body=NewMonthlyIncome(income_type="Bonus", amount=100), access_token=self.access)
+        response: Response = self._get("/budgeting/income/me", etag)
+        self.assertOk(response.status_code)
+        self.assertEqual(len(response.json()), 2)
+        self.assertEqual(self._get("/budgeting/expenses/me", expenses_etag).status_code, 304)
+
+        etag = response.headers["ETag"]
+        self.delete(path="/budgeting/income/me/bonus", access_token=self.access)
+        self.assertOk(self._get("/budgeting/income/me", etag).status_code)
+
+
+class TestBudgetCache(RepoTestCase):
+    access: AccessTokenDto
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.access = cls.signup_and_login("budgetcache")
+
+
+    def _stats(self) -> dict:
+        return self.get(path="/metrics", access_token=self.admin_access).json()["budget_cache"]
+
+
+    def test_read_through(self) -> None:
+        for expense_type in ("Rent", "Food"):
+            self.post(path="/budgeting/expenses/me", body=NewBudgetExpense(expense_type=expense_type, amount=10, description=None), access_token=self.access)
+        first: Response = self.get(path="/budgeting/expenses/me?limit=1", access_token=self.access)
+        before: dict = self._stats()
+        second: Response = self.get(path="/budgeting/expenses/me?limit=1", access_token=self.access)
+        after: dict = self._stats()
+
+        self.assertEqual(after["hits"], before["hits"] + 1)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second.headers["X-Next-Cursor"], first.headers["X-Next-Cursor"])
+        self.assertEqual(second.headers["ETag"], first.headers["ETag"])
+        self.assertEqual(second.headers["Content-Type"], "application/json")
 
 
+    def test_writes_invalidate(self) -> None:
+        self.post(path="/budgeting/income/me", body=NewMonthlyIncome(income_type="Salary", amount=100), access_token=self.access)
+        self.get(path="/budgeting/income/me", access_token=self.access)
 
+        self.post(path="/budgeting/income/me", body=NewMonthlyIncome(income_type="Bonus", amount=100), access_token=self.access)
+        response: Response = self.get(path="/budgeting/income/me", access_token=self.access)
+        self.assertEqual([income["income_type"] for income in response.json()], ["Bonus", "Salary"])
 
+        self.delete(path="/budgeting/income/me/salary", access_token=self.access)
+        response = self.get(path="/budgeting/income/me", access_token=self.access)
+        self.assertEqual([income["income_type"] for income in response.json()], ["Bonus"])
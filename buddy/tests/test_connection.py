@@ -8,3 +8,7 @@ class TestServerConnectivity(HttpTestCase):
         self.assertEqual(response.json(), "Buddy is running")
 
 
+    def test_content_security_policy(self) -> None:
+        for path in ["/", "/docs", "/does-not-exist"]:
+            response: requests.Response = self.get(path=path)
+            self.assertIn("default-src 'self';", response.headers.get("Content-Security-Policy", ""), msg=f"No CSP header on {path}")
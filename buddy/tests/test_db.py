@@ -0,0 +1,64 @@
+import os
+import unittest
+from unittest import mock
+
+from sqlalchemy import Engine, inspect
+from sqlmodel import SQLModel, create_engine
+
+from buddy.src import db
+
+
+class TestSqliteProfile(unittest.TestCase):
+    def _profile(self, **environ: str) -> tuple[dict[str, str], dict[str, int]]:
+        with mock.patch.dict(os.environ, environ, clear=True):
+            return db._sqlite_profile()
+
+    def test_default(self) -> None:
+        self.assertEqual(self._profile(), ({}, {}))
+
+    def test_production(self) -> None:
+        pragmas, pool = self._profile(SQLITE_PROFILE="production")
+        self.assertEqual((pragmas["journal_mode"], pragmas["synchronous"], pragmas["busy_timeout"]), ("WAL", "NORMAL", "5000"))
+        self.assertEqual(pool, {"pool_size": 20, "max_overflow": 10, "pool_timeout": 30})
+
+    def test_overrides(self) -> None:
+        pragmas, pool = self._profile(SQLITE_PROFILE="production", SQLITE_JOURNAL_MODE="DELETE", SQLITE_CACHE_SIZE="-2048", DB_POOL_SIZE="5")
+        self.assertEqual((pragmas["journal_mode"], pragmas["cache_size"], pragmas["synchronous"]), ("DELETE", "-2048", "NORMAL"))
+        self.assertEqual(pool, {"pool_size": 5, "max_overflow": 10, "pool_timeout": 30})
+
+    def test_invalid(self) -> None:
+        for environ in [{"SQLITE_PROFILE": "fast"}, {"SQLITE_JOURNAL_MODE": "WAL; DROP TABLE user"}, {"SQLITE_CACHE_SIZE": ""}]:
+            with self.assertRaises(RuntimeError, msg=f"{environ} was accepted"):
+                self._profile(**environ)
+
+    def test_pragmas_are_set_on_connect(self) -> None:
+        engine: Engine = create_engine("sqlite://")
+        db._set_pragmas_on_connect(engine, {"cache_size": "-2048", "temp_store": "MEMORY"})
+        with engine.connect() as connection:
+            self.assertEqual(connection.exec_driver_sql("PRAGMA cache_size").scalar(), -2048)
+            self.assertEqual(connection.exec_driver_sql("PRAGMA temp_store").scalar(), 2)
+        engine.dispose()
+
+
+class TestCreateSchema(unittest.TestCase):
+    def _index_names(self, engine: Engine) -> set[str]:
+        inspector = inspect(engine)
+        return {index["name"] for table in inspector.get_table_names() for index in inspector.get_indexes(table) if index["name"] is not None}
+
+    def test_missing_indexes_are_created_on_existing_tables(self) -> None:
+        declared: set[str] = {str(index.name) for table in SQLModel.metadata.sorted_tables for index in table.indexes}
+        engine: Engine = create_engine("sqlite://")
+        with engine.begin() as connection:
+            db.create_schema(connection)
+        self.assertLessEqual(declared, self._index_names(engine))
+
+        # a database created before the indexes were declared
+        with engine.begin() as connection:
+            for name in declared:
+                connection.exec_driver_sql(f'DROP INDEX "{name}"')
+        self.assertFalse(declared & self._index_names(engine))
+
+        with engine.begin() as connection:
+            db.create_schema(connection)
+        self.assertLessEqual(declared, self._index_names(engine))
+        engine.dispose()
@@ -0,0 +1,44 @@
+import os
+import unittest
+from typing import Any
+from unittest import mock
+
+from buddy.src import launcher
+
+
+class TestServerOptions(unittest.TestCase):
+    def _options(self, **environ: str) -> dict[str, Any]:
+        with mock.patch.dict(os.environ, environ, clear=True):
+            return launcher.server_options()
+
+    def test_defaults(self) -> None:
+        with self.assertLogs(launcher.__name__, "WARNING"):
+            options: dict[str, Any] = self._options()
+        self.assertEqual(options["workers"], 1)
+        self.assertEqual((options["loop"], options["http"]), ("uvloop", "httptools"))
+        self.assertEqual((options["host"], options["port"]), ("127.0.0.1", 8000))
+        self.assertEqual((options["backlog"], options["limit_concurrency"]), (2048, None))
+        self.assertNotIn("uds", options)
+
+    def test_workers_default_to_the_cpu_count_with_shared_rate_limits(self) -> None:
+        for backend in ["manager", "none"]:
+            self.assertEqual(self._options(RATE_LIMIT_BACKEND=backend)["workers"], os.cpu_count() or 1)
+            self.assertEqual(self._options(RATE_LIMIT_BACKEND=backend, SERVER_WORKERS="3")["workers"], 3)
+
+    def test_local_rate_limits_allow_one_worker(self) -> None:
+        self.assertEqual(self._options(RATE_LIMIT_BACKEND="local", SERVER_WORKERS="1")["workers"], 1)
+        with self.assertRaises(RuntimeError):
+            self._options(RATE_LIMIT_BACKEND="local", SERVER_WORKERS="2")
+        with self.assertRaises(RuntimeError):
+            self._options(SERVER_WORKERS="2")
+
+    def test_invalid_values(self) -> None:
+        for environ in [{"SERVER_WORKERS": "many"}, {"SERVER_PORT": "http"}, {"SERVER_LOOP": "trio"}, {"SERVER_HTTP": "h2"}]:
+            with self.assertRaises(RuntimeError, msg=f"{environ} was accepted"):
+                self._options(RATE_LIMIT_BACKEND="manager", **environ)
+
+    def test_unix_socket(self) -> None:
+        options: dict[str, Any] = self._options(RATE_LIMIT_BACKEND="manager", SERVER_UDS="/tmp/buddy.sock")
+        self.assertEqual((options["uds"], options["forwarded_allow_ips"]), ("/tmp/buddy.sock", "*"))
+        self.assertNotIn("host", options)
+        self.assertNotIn("port", options)
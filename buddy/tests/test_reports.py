@@ -0,0 +1,39 @@
+from requests import Response
+from buddy.dtos import AccessTokenDto, NewAccountingExpense, NewAccountingIncome, NewBudgetExpense, NewMonthlyIncome, VarianceReportDto
+from buddy.tests.http_test import RepoTestCase
+
+
+class TestVarianceReport(RepoTestCase):
+    access: AccessTokenDto
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.access = cls.signup_and_login("variance")
+
+        cls.post(path="/budgeting/expenses/me", body=NewBudgetExpense(expense_type="rent", amount=1000, description=None), access_token=cls.access)
+        cls.post(path="/budgeting/expenses/me", body=NewBudgetExpense(expense_type="food", amount=300, description=None), access_token=cls.access)
+        cls.post(path="/budgeting/income/me", body=NewMonthlyIncome(income_type="salary", amount=3000), access_token=cls.access)
+        cls.post(path="/accounting/expenses/me", body=NewAccountingExpense(expense_type="Food", amount=120, date="2024-07-02", description=None), access_token=cls.access)
+        cls.post(path="/accounting/expenses/me", body=NewAccountingExpense(expense_type="Food", amount=230, date="2024-07-09", description=None), access_token=cls.access)
+        cls.post(path="/accounting/expenses/me", body=NewAccountingExpense(expense_type="Gifts", amount=50, date="2024-07-20", description=None), access_token=cls.access)
+        cls.post(path="/accounting/expenses/me", body=NewAccountingExpense(expense_type="Rent", amount=1000, date="2024-08-01", description=None), access_token=cls.access)
+        cls.post(path="/accounting/income/me", body=NewAccountingIncome(income_type="Salary", amount=3000, date="2024-07-15"), access_token=cls.access)
+
+
+    def test_variance(self) -> None:
+        response: Response = self.get(path="/reports/variance?month=2024-07", access_token=self.access)
+        self.assertOk(response.status_code)
+
+        report: VarianceReportDto = VarianceReportDto.model_validate(response.json())
+        self.assertEqual(report.month, "2024-07")
+        self.assertEqual(
+            [(row.kind, row.category, float(row.planned), float(row.actual), float(row.delta)) for row in report.categories],
+            [("expense", "Food", 300, 350, 50), ("expense", "Gifts", 0, 50, 50), ("expense", "Rent", 1000, 0, -1000), ("income", "Salary", 3000, 3000, 0)],
+        )
+
+
+    def test_invalid_month(self) -> None:
+        for path in ["/reports/variance", "/reports/variance?month=July"]:
+            response: Response = self.get(path=path, access_token=self.access)
+            self.assertClientError(response.status_code)
@@ -0,0 +1,67 @@
+import datetime
+import json
+import unittest
+from decimal import Decimal
+from typing import Any, Sequence
+
+from fastapi import Response
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from buddy.dtos import AccountingExpenseDto, BudgetExpenseDto, MonthlySummaryDto
+from buddy.src.models import AccountingExpense, BudgetExpense, User, UserRoles
+from buddy.src.responses import JSONList, ORJSONResponse
+
+
+class TestORJSONResponse(unittest.TestCase):
+    def test_matches_pydantic_json(self) -> None:
+        dtos = [
+            AccountingExpenseDto(user_id=1, expense_type="Food", date=datetime.date(2024, 5, 1), amount=Decimal("10.50"), description=None),
+            AccountingExpenseDto(user_id=1, expense_type="Rent", date="2024-05-02", amount=1000.25, description="May"),
+        ]
+        for dto in dtos:
+            self.assertEqual(json.loads(bytes(ORJSONResponse(dto).body)), json.loads(dto.model_dump_json()))
+            self.assertEqual(json.loads(bytes(ORJSONResponse(dto.model_dump()).body)), json.loads(dto.model_dump_json()))
+
+    def test_decimals_keep_their_exact_value(self) -> None:
+        summary = MonthlySummaryDto(month="2024-05", income=Decimal("0.10"), expenses=Decimal("0.20"), net=Decimal("-0.10"))
+        self.assertEqual(ORJSONResponse(summary.model_dump()).body, b'{"month":"2024-05","income":"0.10","expenses":"0.20","net":"-0.10"}')
+        self.assertEqual(ORJSONResponse({1: Decimal("1E+2")}).body, b'{"1":"1E+2"}')
+
+    def test_unsupported_type(self) -> None:
+        with self.assertRaises(TypeError):
+            ORJSONResponse({"value": object()})
+
+
+class TestJSONList(unittest.TestCase):
+    def _per_dto(self, dto: type[AccountingExpenseDto] | type[BudgetExpenseDto], rows: Sequence[Any]) -> bytes:
+        # what the routes rendered before: a DTO per row, dumped the way FastAPI dumps a response model
+        return bytes(ORJSONResponse([dto.model_validate(row, from_attributes=True).model_dump(mode="json") for row in rows]).body)
+
+    def test_matches_the_dtos(self) -> None:
+        expenses: list[AccountingExpense] = [
+            AccountingExpense(user_id=1, expense_type="Food", date=datetime.date(2024, 5, 1), amount=Decimal("10.50"), description=None),
+            AccountingExpense(user_id=2, expense_type="Rent", date=datetime.date(2024, 12, 31), amount=Decimal("1000"), description="Dec"),
+        ]
+        self.assertEqual(bytes(JSONList(AccountingExpenseDto).response(expenses, Response()).body), self._per_dto(AccountingExpenseDto, expenses))
+        self.assertEqual(bytes(JSONList(AccountingExpenseDto).response([], Response()).body), b"[]")
+
+    def test_expired_rows_are_loaded(self) -> None:
+        engine = create_engine("sqlite://")
+        SQLModel.metadata.create_all(engine)
+        with Session(engine) as session:
+            session.add(User(id=1, username="user", password="hash", role=UserRoles.user))
+            session.add(BudgetExpense(user_id=1, expense_type="Food", amount=Decimal("12.30"), description="Groceries"))
+            session.commit()
+            expenses: Sequence[BudgetExpense] = session.exec(select(BudgetExpense)).all()
+            # expired rows no longer have their columns in __dict__
+            session.expire_all()
+            body: bytes = bytes(JSONList(BudgetExpenseDto).response(expenses, Response()).body)
+            self.assertEqual(body, self._per_dto(BudgetExpenseDto, expenses))
+        engine.dispose()
+
+    def test_headers_are_kept(self) -> None:
+        response = Response()
+        response.headers["X-Next-Cursor"] = "cursor"
+        rendered = JSONList(AccountingExpenseDto).response([], response)
+        self.assertEqual(rendered.headers["X-Next-Cursor"], "cursor")
+        self.assertEqual(rendered.headers["Content-Length"], "2")
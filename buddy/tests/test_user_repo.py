@@ -1,4 +1,5 @@
 import requests
+from jose import jwt
 from requests import Response
 from pydantic import ValidationError
 from buddy.tests.http_test import RepoTestCase 
@@ -153,3 +154,44 @@ class TestUnauthorizedAccess(RepoTestCase):
 
 
 
+
+class TestUserCache(RepoTestCase):
+    def test_cache_hits(self) -> None:
+        if self.get(path="/metrics", access_token=self.admin_access).json()["access_tokens"]["stateless"]:
+            self.skipTest("Stateless access tokens don't use the user cache")
+        before: dict = self.get(path="/metrics", access_token=self.admin_access).json()["user_cache"]
+        self.get(path="/users/me", access_token=self.access1)
+        self.get(path="/users/me", access_token=self.access1)
+        after: dict = self.get(path="/metrics", access_token=self.admin_access).json()["user_cache"]
+
+        self.assertGreater(after["hits"], before["hits"], msg=f"User cache was not used. Metrics: {after}")
+
+
+    def test_deleted_user_token_rejected(self) -> None:
+        self.signup(Signup(username="deletemecached", password="deleteme"))
+        access, _ = self.login(Login(username="deletemecached", password="deleteme"))
+        self.assertOk(self.get(path="/users/me", access_token=access).status_code)
+
+        response = self.delete(path="/users/delete/me", access_token=access)
+        self.assertOk(response.status_code)
+
+        response = self.get(path="/users/me", access_token=access)
+        self.assertClientError(response.status_code, msg=f"Deleted user's token is still accepted. Server response: {response.json()}")
+
+
+
+class TestStatelessAccessTokens(RepoTestCase):
+    def test_token_claims(self) -> None:
+        claims: dict = jwt.get_unverified_claims(self.access1.access_token)
+        self.assertEqual(claims["role"], "user")
+        self.assertIsInstance(claims["epoch"], int)
+
+
+    def test_user_from_claims(self) -> None:
+        before: dict = self.get(path="/metrics", access_token=self.admin_access).json()["access_tokens"]
+        if not before["stateless"]:
+            self.skipTest("The server isn't using stateless access tokens")
+        self.assertOk(self.get(path="/users/me", access_token=self.access1).status_code)
+        after: dict = self.get(path="/metrics", access_token=self.admin_access).json()["access_tokens"]
+
+        self.assertGreater(after["from_claims"], before["from_claims"], msg=f"Token claims were not used. Metrics: {after}")
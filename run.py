@@ -7,18 +7,43 @@ if __name__ == "__main__":
 
     args = sys.argv[1:] if sys.argv[0] == "python" else sys.argv
     if len(args) == 1:
-        print("No argument supplied. Please specify 'prod' or 'dev'")
+        print("No argument supplied. Please specify 'prod', 'dev', 'rebuild-summary', 'vacuum' or 'shared-state'")
         exit(1)
 
     arg = args[1]
-    if arg != "prod" and arg != "dev":
-        print("Argument must be 'prod' or 'dev'")
+    if arg != "prod" and arg != "dev" and arg != "rebuild-summary" and arg != "vacuum" and arg != "shared-state":
+        print("Argument must be 'prod', 'dev', 'rebuild-summary', 'vacuum' or 'shared-state'")
         exit(1)
-    if arg == "prod":
+    if arg == "rebuild-summary":
         file = pathlib.Path("./.env")
         if file.is_file():
             dotenv.load_dotenv(dotenv_path="./.env")
-        uvicorn.run("buddy.src.main:app", reload=False)
+
+        from buddy.src.db import rebuild_accounting_summary
+        rebuild_accounting_summary()
+        print("Rebuilt the monthly accounting summary")
+    elif arg == "vacuum":
+        file = pathlib.Path("./.env")
+        if file.is_file():
+            dotenv.load_dotenv(dotenv_path="./.env")
+
+        from buddy.src.db import vacuum_database
+        vacuum_database()
+        print("Vacuumed the database and rebuilt the search indexes")
+    elif arg == "shared-state":
+        file = pathlib.Path("./.env")
+        if file.is_file():
+            dotenv.load_dotenv(dotenv_path="./.env")
+
+        from buddy.src import shared_state
+        shared_state.serve()
+    elif arg == "prod":
+        file = pathlib.Path("./.env")
+        if file.is_file():
+            dotenv.load_dotenv(dotenv_path="./.env")
+
+        from buddy.src import launcher
+        launcher.run()
     else:
         file = pathlib.Path("./development.env")
         if not file.is_file():